@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from groq import Groq
+import metrics
 
 load_dotenv()
 
@@ -12,6 +13,11 @@ if GROQ_API_KEY:
 # Use a standard Groq model
 MODEL_NAME = "llama-3.1-8b-instant" 
 
+def _create_completion(operation: str, **kwargs):
+    # client.chat.completions.create, timed per operation for /metrics
+    with metrics.timed(metrics.LLM_REQUESTS, operation):
+        return client.chat.completions.create(**kwargs)
+
 def get_chat_response(query: str, observation_context: dict = None):
     """
     Generates a normal AI response to the user query based on the observation context using Groq.
@@ -52,7 +58,7 @@ def get_chat_response(query: str, observation_context: dict = None):
     
     try:
         print(f"Sending prompt to Groq model: {MODEL_NAME}")
-        chat_completion = client.chat.completions.create(
+        chat_completion = _create_completion("chat",
             messages=[
                 {
                     "role": "user",
@@ -92,7 +98,7 @@ def parse_observation_from_text(text: str):
     """
     
     try:
-        chat_completion = client.chat.completions.create(
+        chat_completion = _create_completion("parse_observation",
             messages=[
                 {
                     "role": "user",
@@ -137,7 +143,7 @@ def clean_observation_data(data_list: list):
     """
     
     try:
-        chat_completion = client.chat.completions.create(
+        chat_completion = _create_completion("clean_data",
             messages=[
                 {
                     "role": "user",
@@ -185,7 +191,7 @@ def summarize_environmental_news(category: str, news_list: list):
     """
     
     try:
-        chat_completion = client.chat.completions.create(
+        chat_completion = _create_completion("summarize_news",
             messages=[
                 {
                     "role": "system",
@@ -0,0 +1,85 @@
+"""
+Backtest of the seasonal forecasting engine on synthetic hourly series.
+
+Each series has a daily cycle (random amplitude and phase), a slow trend, level shifts
+and noise, plus missing hours. The last 72 hours are held out; the engine is fitted on
+the rest and compared with a seasonal-naive forecast (repeat the last day) and the old
+baseline + fixed sine projection. Also reports fit time per thousand series.
+
+Run from backend/:  python benchmarks/backtest_forecast.py [--series 1000,10000] [--days 14] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_engine import fit_forecasts, fill_gaps, SEASON_HOURS, HORIZON_HOURS
+
+def synthetic_series(n, days, rng, missing=0.1):
+    T = days * 24 + HORIZON_HOURS
+    t = np.arange(T)
+    level = rng.uniform(20, 150, (n, 1))
+    amplitude = rng.uniform(0.05, 0.3, (n, 1)) * level
+    phase = rng.uniform(0, 24, (n, 1))
+    trend = rng.normal(0, 0.02, (n, 1)) * level / 24
+    Y = level + amplitude * np.sin(2 * np.pi * (t - phase) / 24) + trend * t / 24 + rng.normal(0, 0.05, (n, 1)) * level * rng.standard_normal((n, T))
+    Y = np.maximum(Y, 0)
+    train, test = Y[:, :-HORIZON_HOURS].copy(), Y[:, -HORIZON_HOURS:]
+    train[rng.random(train.shape) < missing] = np.nan
+    return train, test
+
+def legacy_forecast(train):
+    # Baseline = mean of the last 24h, plus the old fixed diurnal sine (hour-of-day relative to series start)
+    baseline = np.nanmean(train[:, -24:], axis=1)
+    h = np.arange(train.shape[1], train.shape[1] + HORIZON_HOURS)
+    return np.maximum(baseline[:, None] + 10 * np.sin(2 * np.pi * (h % 24 - 8) / 24), 0)
+
+def errors(forecast, test):
+    mae = np.mean(np.abs(forecast - test))
+    smape = np.mean(2 * np.abs(forecast - test) / (np.abs(forecast) + np.abs(test) + 1e-9))
+    return mae, smape
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=str, default="1000,10000")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = []
+    print(f"{'series':>8} | {'method':>15} | {'MAE':>7} | {'sMAPE':>7} | {'fit s / 1k series':>18}")
+    print("-" * 68)
+    for n in [int(s) for s in args.series.split(",")]:
+        train, test = synthetic_series(n, args.days, rng)
+
+        start = time.perf_counter()
+        forecast, _sigma, _params = fit_forecasts(fill_gaps(train))
+        forecast = np.maximum(forecast, 0)
+        fit_seconds = time.perf_counter() - start
+
+        filled = fill_gaps(train)
+        naive = np.tile(filled[:, -SEASON_HOURS:], (1, HORIZON_HOURS // SEASON_HOURS))
+
+        for method, f, seconds in (
+            ("holt_winters", forecast, fit_seconds),
+            ("seasonal_naive", naive, None),
+            ("legacy_sine", legacy_forecast(train), None)
+        ):
+            mae, smape = errors(f, test)
+            per_1k = f"{seconds / n * 1000:.3f}" if seconds is not None else "-"
+            print(f"{n:>8} | {method:>15} | {mae:>7.2f} | {smape:>7.2%} | {per_1k:>18}")
+            results.append({"series": n, "method": method, "mae": float(mae), "smape": float(smape),
+                            "fit_seconds_per_1k": seconds / n * 1000 if seconds is not None else None})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
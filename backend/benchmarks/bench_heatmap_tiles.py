@@ -0,0 +1,75 @@
+"""
+Heatmap tile rendering benchmark (uncached).
+
+Indexes N synthetic source points clustered around cities, then renders tiles at several
+zoom levels over the densest area and reports build time and per-tile render + PNG
+encode time. The budget is tens of milliseconds per tile at 100k sources.
+
+Run from backend/:  python benchmarks/bench_heatmap_tiles.py [--points 100000] [--tiles 30] [--out tile.png]
+"""
+import os
+import sys
+import math
+import time
+import argparse
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heatmap_service import HeatmapSources, heatmap_service, encode_png
+
+def synthetic_sources(n, rng):
+    cities = np.column_stack([rng.uniform(8, 38, 200), rng.uniform(68, 98, 200)])
+    pick = rng.integers(0, len(cities), n)
+    lats = cities[pick, 0] + rng.normal(0, 0.3, n)
+    longs = cities[pick, 1] + rng.normal(0, 0.3, n)
+    values = rng.gamma(4, 20, n)
+    return lats, longs, values
+
+def tile_of(lat, long, z):
+    n = 2 ** z
+    x = int((long + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--tiles", type=int, default=30, help="Tiles rendered per zoom level")
+    parser.add_argument("--out", type=str, default=None, help="Write one sample PNG tile here")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lats, longs, values = synthetic_sources(args.points, rng)
+    start = time.perf_counter()
+    sources = HeatmapSources(lats, longs, values)
+    print(f"Indexed {args.points:,} sources in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'zoom':>5} | {'render ms':>10} | {'encode ms':>10} | {'total p50':>10} | {'total max':>10} | {'PNG KB':>7}")
+    print("-" * 68)
+    sample = None
+    for z in (4, 6, 8, 10, 12):
+        render_ms, encode_ms, sizes = [], [], []
+        for i in range(args.tiles):
+            k = rng.integers(0, args.points)
+            x, y = tile_of(lats[k], longs[k], z)
+            start = time.perf_counter()
+            tile_values, alpha = heatmap_service.render(sources, z, x, y)
+            mid = time.perf_counter()
+            png = encode_png(heatmap_service.colorize(sources, tile_values, alpha))
+            end = time.perf_counter()
+            render_ms.append((mid - start) * 1000)
+            encode_ms.append((end - mid) * 1000)
+            sizes.append(len(png))
+            if z == 8 and sample is None:
+                sample = png
+        total = np.array(render_ms) + np.array(encode_ms)
+        print(f"{z:>5} | {np.median(render_ms):>10.2f} | {np.median(encode_ms):>10.2f} | {np.median(total):>10.2f} | {total.max():>10.2f} | {np.mean(sizes) / 1024:>7.1f}")
+
+    if args.out and sample:
+        with open(args.out, "wb") as f:
+            f.write(sample)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: instrumentation overhead per ingested observation.
+
+Replays the metric updates one /api/observe request makes (request counter, latency
+histogram and in-progress gauge in the middleware, four validation stage timings, ML
+scoring latency of the three ensemble members, one external call, DB commit timer and the outcome counter) and compares
+them with the same loop without metrics. Also times one render of /metrics.
+
+Run from backend/:  python benchmarks/bench_metrics_overhead.py
+"""
+import os
+import sys
+import time
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+
+N = 200_000
+STAGES = ("range", "ml", "live", "news")
+
+def baseline(i):
+    start = time.perf_counter()
+    for stage in STAGES:
+        started = time.perf_counter()
+        time.perf_counter() - started
+    time.perf_counter() - start
+
+def instrumented(i):
+    metrics.HTTP_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    for stage in STAGES:
+        started = time.perf_counter()
+        metrics.VALIDATION_STAGE.labels(stage).observe(time.perf_counter() - started)
+    for member in ("isolation_forest", "lof", "one_class_svm"):
+        metrics.ML_SCORING.labels("outlier_ensemble", member).observe(0.0004)
+    with metrics.timed(metrics.EXTERNAL_HTTP, "openaq"):
+        pass
+    with metrics.DB_COMMIT.labels("observe").time():
+        pass
+    metrics.OBSERVATIONS.labels("air", "valid" if i % 10 else "rejected").inc()
+    metrics.HTTP_IN_PROGRESS.dec()
+    metrics.HTTP_REQUESTS.labels("POST", "/api/observe", "200").inc()
+    metrics.HTTP_LATENCY.labels("POST", "/api/observe").observe(time.perf_counter() - start)
+
+def per_call_us(fn):
+    for i in range(1000): # Warm up label children
+        fn(i)
+    start = time.perf_counter()
+    for i in range(N):
+        fn(i)
+    return (time.perf_counter() - start) / N * 1e6
+
+if __name__ == "__main__":
+    base = min(per_call_us(baseline) for _ in range(3))
+    inst = min(per_call_us(instrumented) for _ in range(3))
+    print(f"Without metrics: {base:.2f} us/observation")
+    print(f"With metrics:    {inst:.2f} us/observation")
+    print(f"Overhead:        {inst - base:.2f} us/observation")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"/metrics render: {(time.perf_counter() - start) * 1000:.2f} ms ({len(text.splitlines())} lines)")
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: per-row throughput of the outlier ensemble.
+
+Compares the legacy per-observation path (1x3 array, predict + decision_function
+on each model = six sklearn calls per row) with the batch API check_outliers
+at batch sizes 1, 100 and 10k.
+
+Run from backend/:  python benchmarks/bench_outlier_scoring.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_service import detector
+
+BATCH_SIZES = [1, 100, 10_000]
+MIN_SECONDS = 1.0 # Repeat each case until at least this much time has elapsed
+
+def legacy_check_outlier(value, lat, long):
+    features_scaled = detector.scaler.transform(np.array([[value, lat, long]]))
+    votes = sum(1 for m in (detector.iso_forest, detector.lof, detector.oc_svm) if m.predict(features_scaled)[0] == -1)
+    scores = [m.decision_function(features_scaled)[0] for m in (detector.iso_forest, detector.oc_svm, detector.lof)]
+    with np.errstate(over="ignore"):
+        return votes >= 2, float(np.mean([1 / (1 + np.exp(-10 * s)) for s in scores]))
+
+def make_batch(n, rng):
+    return (
+        rng.uniform(0, 300, n),
+        rng.uniform(8, 38, n),
+        rng.uniform(68, 98, n)
+    )
+
+def rows_per_second(fn, n_rows):
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return runs * n_rows / elapsed
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>8} | {'legacy rows/s':>14} | {'batch rows/s':>14} | {'speedup':>8}")
+    print("-" * 54)
+    for n in BATCH_SIZES:
+        values, lats, longs = make_batch(n, rng)
+
+        # Legacy path is row-at-a-time; cap the rows it scores so large batches stay quick
+        n_legacy = min(n, 200)
+        legacy = rows_per_second(
+            lambda: [legacy_check_outlier(values[i], lats[i], longs[i]) for i in range(n_legacy)], n_legacy
+        )
+        batch = rows_per_second(lambda: detector.check_outliers(values, lats, longs), n)
+        print(f"{n:>8} | {legacy:>14,.0f} | {batch:>14,.0f} | {batch / legacy:>7.1f}x")
+
+    # Sanity check: the batch API agrees with the legacy per-row path
+    values, lats, longs = make_batch(500, rng)
+    outliers, reliability = detector.check_outliers(values, lats, longs)
+    legacy = [legacy_check_outlier(v, a, o) for v, a, o in zip(values, lats, longs)]
+    assert all(bool(o) == l[0] for o, l in zip(outliers, legacy)), "vote mismatch"
+    assert np.allclose(reliability, [l[1] for l in legacy]), "reliability mismatch"
+    print("\nBatch results match the legacy per-row path on 500 random observations.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Latency and memory of the read endpoints against a synthetic fixture (generate_fixture.py).
+
+Each endpoint is called in-process through the FastAPI test client: one cold call (first
+hit, caches empty), then --repeat warm calls for p50/p95, then one call under tracemalloc
+for the peak Python allocation. Growth of the process's peak RSS over the endpoint's calls
+is reported as well. /api/v1/export/ai-cleaned is left out: it is bound by the LLM call.
+
+Run from backend/:  python benchmarks/bench_read_endpoints.py --database-url sqlite:///benchmarks/fixtures/synthetic.db
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+ENDPOINTS = [
+    ("data", "/api/v1/data"),
+    ("data_10k", "/api/v1/data?limit=10000"),
+    ("export_csv", "/api/v1/export"),
+    ("forecast_global", "/api/v1/forecast/health?type=air"),
+    ("forecast_cell", "/api/v1/forecast/health?type=air&lat=28.61&long=77.21"),
+    ("forecast_regions", "/api/v1/forecast/regions?type=air"),
+    ("series_7d", "/api/v1/series?type=air&points=500"),
+    ("heatmap_tile", "/api/v1/heatmap/air/5/22/13.png"),
+    ("feedback", "/api/v1/feedback"),
+    ("acoustic_recordings", "/api/v1/acoustic/recordings")
+]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def bench_endpoint(client, path: str, repeat: int) -> dict:
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    response = client.get(path)
+    cold = time.perf_counter() - start
+    if response.status_code != 200:
+        return {"status": response.status_code, "error": response.text[:200]}
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(path)
+        warm.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    client.get(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    warm_ms = np.array(warm) * 1000
+    return {
+        "status": 200,
+        "bytes": len(response.content),
+        "cold_ms": round(cold * 1000, 2),
+        "p50_ms": round(float(np.percentile(warm_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(warm_ms, 95)), 2),
+        "peak_alloc_mb": round(peak / 2 ** 20, 2),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 2)
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read endpoint latency/memory benchmark")
+    parser.add_argument("--database-url", default="sqlite:///benchmarks/fixtures/synthetic.db")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm calls per endpoint")
+    parser.add_argument("--endpoints", default=None, help="Comma-separated subset of: " + ",".join(n for n, _ in ENDPOINTS))
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    # main reads its configuration at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("FORECAST_SCHEDULER_ENABLED", "0")
+    from fastapi.testclient import TestClient
+    import main
+    import models
+
+    with models.SessionLocal() as db:
+        n_rows = db.query(models.Observation).count()
+    client = TestClient(main.app)
+    selected = set(args.endpoints.split(",")) if args.endpoints else None
+
+    print(f"{n_rows:,} observations in {args.database_url}")
+    print(f"{'endpoint':<22}{'cold ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'KB':>10}{'alloc MB':>10}{'RSS +MB':>10}")
+    results = {}
+    for name, path in ENDPOINTS:
+        if selected and name not in selected:
+            continue
+        r = results[name] = {"path": path, **bench_endpoint(client, path, args.repeat)}
+        if r["status"] != 200:
+            print(f"{name:<22} HTTP {r['status']}: {r['error']}")
+            continue
+        print(f"{name:<22}{r['cold_ms']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['bytes'] / 1024:>10.1f}{r['peak_alloc_mb']:>10}{r['rss_growth_mb']:>10}")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "observations": n_rows,
+        "database": models.engine.dialect.name,
+        "repeat": args.repeat,
+        "endpoints": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"read_endpoints_{commit}_{n_rows}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
@@ -0,0 +1,173 @@
+"""
+Local stand-ins for the external services hit during ingest: Nominatim (reverse geocoding),
+OpenAQ, Open-Meteo air quality, iNaturalist and the Groq chat completions API.
+
+Each service answers with a plausible payload after a log-normally distributed delay and
+fails with HTTP 503 at a configurable rate, per latency/error profile. Used by
+load_test_ingest.py; can also be run on its own to point a dev server at it:
+
+    python benchmarks/fake_services.py --port 9100 --profile realistic
+
+    NOMINATIM_URL=http://127.0.0.1:9100 OPENAQ_URL=http://127.0.0.1:9100/v2/latest \\
+    OPEN_METEO_AQ_URL=http://127.0.0.1:9100/v1/air-quality \\
+    INATURALIST_URL=http://127.0.0.1:9100/v1/observations \\
+    GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:9100 uvicorn main:app
+
+Run from backend/.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Per service: (median latency in ms, log-normal sigma, error rate)
+PROFILES = {
+    "fast": {
+        "nominatim": (2, 0.2, 0.0), "openaq": (2, 0.2, 0.0), "open_meteo": (2, 0.2, 0.0),
+        "inaturalist": (2, 0.2, 0.0), "groq": (5, 0.2, 0.0)
+    },
+    "realistic": {
+        "nominatim": (150, 0.4, 0.01), "openaq": (300, 0.5, 0.02), "open_meteo": (200, 0.4, 0.01),
+        "inaturalist": (250, 0.5, 0.01), "groq": (800, 0.4, 0.01)
+    },
+    "degraded": {
+        "nominatim": (600, 0.8, 0.10), "openaq": (1500, 0.8, 0.20), "open_meteo": (800, 0.8, 0.10),
+        "inaturalist": (1000, 0.8, 0.10), "groq": (3000, 0.6, 0.10)
+    }
+}
+
+ROUTES = {
+    ("GET", "/reverse"): "nominatim",
+    ("GET", "/v2/latest"): "openaq",
+    ("GET", "/v1/air-quality"): "open_meteo",
+    ("GET", "/v1/observations"): "inaturalist",
+    ("POST", "/openai/v1/chat/completions"): "groq"
+}
+
+def _payload(service: str, query: dict, rng: random.Random):
+    if service == "nominatim":
+        return {"display_name": "Testville, Testland", "address": {"city": "Testville", "country": "Testland"}}
+    if service == "openaq":
+        return {"results": [{
+            "location": "Fake Station",
+            "distance": rng.uniform(500, 20000),
+            "measurements": [{"parameter": "pm25", "value": round(rng.uniform(20, 90), 1)}]
+        }]}
+    if service == "open_meteo":
+        return {"current": {"us_aqi": rng.randint(30, 150), "pm2_5": round(rng.uniform(10, 60), 1), "pm10": round(rng.uniform(20, 90), 1)}}
+    if service == "inaturalist":
+        n = rng.randint(0, 40)
+        return {"total_results": n, "results": [{"taxon": {"name": name}} for name in ["Common Myna", "House Sparrow", "Indian Crow"][:n]]}
+    # Groq / OpenAI-compatible chat completion
+    content = json.dumps({"justified": rng.random() < 0.3, "reason": "Fake news context", "event_type": "Fake Event"})
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }
+
+class FakeServices:
+    def __init__(self, profile: str = "realistic", latency_scale: float = 1.0, error_rate: float = None, seed: int = 0):
+        self.profile = {
+            service: (median * latency_scale, sigma, rate if error_rate is None else error_rate)
+            for service, (median, sigma, rate) in PROFILES[profile].items()
+        }
+        self.stats = {service: {"requests": 0, "errors": 0} for service in self.profile}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def handle(self, method: str, path: str, query: dict):
+        """
+        Returns (status, body) after the simulated delay, or None for an unknown route.
+        """
+        service = ROUTES.get((method, path))
+        if service is None:
+            return None
+        median, sigma, error_rate = self.profile[service]
+        with self._lock:
+            delay = median * self._rng.lognormvariate(0, sigma) / 1000
+            failed = self._rng.random() < error_rate
+            body = None if failed else _payload(service, query, self._rng)
+            self.stats[service]["requests"] += 1
+            self.stats[service]["errors"] += int(failed)
+        time.sleep(delay)
+        if failed:
+            return 503, {"error": "Simulated outage"}
+        return 200, body
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                result = services.handle(method, url.path, parse_qs(url.query))
+                status, body = result if result else (404, {"error": "Unknown route"})
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @staticmethod
+    def app_env(base_url: str) -> dict:
+        """
+        Environment variables pointing the backend at these stand-ins.
+        """
+        return {
+            "NOMINATIM_URL": base_url,
+            "OPENAQ_URL": f"{base_url}/v2/latest",
+            "OPEN_METEO_AQ_URL": f"{base_url}/v1/air-quality",
+            "INATURALIST_URL": f"{base_url}/v1/observations",
+            "GROQ_API_KEY": "fake-key",
+            "GROQ_BASE_URL": base_url
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=None, help="Overrides every service's error rate")
+    args = parser.parse_args()
+
+    fake = FakeServices(args.profile, args.latency_scale, args.error_rate)
+    url = fake.start(port=args.port)
+    print(f"Fake services ({args.profile}) listening on {url}")
+    for key, value in FakeServices.app_env(url).items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(fake.stats))
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,220 @@
+"""
+Deterministic synthetic database fixture for read-path benchmarks.
+
+Generates --rows observations (10k .. 10M) over the last --days days across every category
+and a spread of cities in India, the USA and elsewhere. Values follow per-category daily
+cycles (local solar hour), regional levels and noise, with a share of rejected outliers and
+readings pending review. Also creates acoustic recordings and feedback entries. Rows are
+written with bulk Core INSERTs in chunks, then the hourly/daily rollups and the forecast
+snapshots are rebuilt so aggregate endpoints have data.
+
+The same --seed and --rows always give the same rows (timestamps are relative to --end,
+which defaults to the start of the current hour).
+
+Run from backend/:  python benchmarks/generate_fixture.py --rows 1000000 --database-url sqlite:///benchmarks/fixtures/1m.db
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK_ROWS = 50_000 # Generation unit; fixed so the output does not depend on the batch size
+MIN_ROWS, MAX_ROWS = 10_000, 10_000_000
+
+# (name, lat, long, region)
+CITIES = [
+    ("Delhi", 28.61, 77.21, "india"), ("Mumbai", 19.08, 72.88, "india"), ("Bengaluru", 12.97, 77.59, "india"),
+    ("Chennai", 13.08, 80.27, "india"), ("Kolkata", 22.57, 88.36, "india"), ("Hyderabad", 17.39, 78.49, "india"),
+    ("Pune", 18.52, 73.86, "india"), ("Jaipur", 26.91, 75.79, "india"), ("Lucknow", 26.85, 80.95, "india"),
+    ("New York", 40.71, -74.01, "usa"), ("Los Angeles", 34.05, -118.24, "usa"), ("Chicago", 41.88, -87.63, "usa"),
+    ("Houston", 29.76, -95.37, "usa"), ("Phoenix", 33.45, -112.07, "usa"), ("Seattle", 47.61, -122.33, "usa"),
+    ("London", 51.51, -0.13, "other"), ("Nairobi", -1.29, 36.82, "other"), ("Sao Paulo", -23.55, -46.63, "other"),
+    ("Sydney", -33.87, 151.21, "other"), ("Jakarta", -6.21, 106.85, "other")
+]
+CITY_WEIGHTS = np.array([8, 8, 6, 5, 5, 4, 3, 3, 2, 5, 4, 3, 2, 2, 2, 3, 1, 2, 1, 2], dtype=float)
+
+# type -> (weight, detail key, base level, daily amplitude, noise sd, peak local hour, lo, hi)
+CATEGORIES = {
+    "air": (0.35, "aqi", 90, 30, 20, 8, 0, 500),
+    "weather": (0.15, "temp", 26, 6, 2, 15, -50, 60),
+    "noise": (0.12, "db", 60, 12, 6, 18, 0, 140),
+    "water": (0.10, "ph", 7.2, 0.2, 0.3, 14, 0, 14),
+    "soil": (0.08, "moisture", 35, 4, 8, 6, 0, 100),
+    "biodiversity": (0.08, "species_richness", 20, 6, 5, 6, 0, 10000),
+    "waste": (0.06, "recycling_rate", 40, 0, 10, 12, 0, 100),
+    "radiation": (0.06, "uv_index", 0, 8, 0.8, 13, 0, 20)
+}
+# Regional level multipliers (air quality is much worse in the Indian cities)
+REGION_FACTOR = {
+    "air": {"india": 1.7, "usa": 0.5, "other": 0.8},
+    "weather": {"india": 1.1, "usa": 0.7, "other": 0.8}
+}
+SOURCES = np.array(["manual", "iot", "scraper", "pdf_extraction"])
+SOURCE_WEIGHTS = np.array([0.45, 0.35, 0.15, 0.05])
+INVALID_FRACTION = 0.05
+REVIEW_FRACTION = 0.02
+
+def observation_chunk(chunk: int, n: int, seed: int, start: datetime, span_seconds: float, total_rows: int):
+    """
+    Rows chunk*CHUNK_ROWS .. +n as dicts for Observation, timestamps increasing with the row index.
+    """
+    rng = np.random.default_rng([seed, chunk])
+    types = list(CATEGORIES)
+    idx = chunk * CHUNK_ROWS + np.arange(n)
+    offsets = (idx + rng.random(n)) * span_seconds / total_rows
+    stamps = (np.datetime64(start, "us") + (offsets * 1e6).astype("timedelta64[us]")).tolist()
+
+    city = rng.choice(len(CITIES), n, p=CITY_WEIGHTS / CITY_WEIGHTS.sum())
+    lats = np.array([CITIES[c][1] for c in city]) + rng.normal(0, 0.08, n)
+    longs = np.array([CITIES[c][2] for c in city]) + rng.normal(0, 0.08, n)
+    type_idx = rng.choice(len(types), n, p=[CATEGORIES[t][0] for t in types])
+
+    # Local solar hour from the row's time of day and longitude
+    local_hour = (offsets / 3600 + start.hour + longs / 15) % 24
+    values = np.empty(n)
+    for i, type_cat in enumerate(types):
+        mask = type_idx == i
+        _, _, base, amplitude, noise, peak, lo, hi = CATEGORIES[type_cat]
+        factor = np.array([REGION_FACTOR.get(type_cat, {}).get(CITIES[c][3], 1.0) for c in city[mask]])
+        cycle = np.cos(2 * np.pi * (local_hour[mask] - peak) / 24)
+        if type_cat == "radiation":
+            cycle = np.maximum(cycle, 0) # No UV at night
+        values[mask] = np.clip((base + amplitude * cycle) * factor + rng.normal(0, noise, mask.sum()), lo, hi)
+
+    is_valid = rng.random(n) >= INVALID_FRACTION
+    values[~is_valid] *= rng.uniform(2.5, 4, (~is_valid).sum()) # Rejected rows are mostly implausible spikes
+    needs_review = is_valid & (rng.random(n) < REVIEW_FRACTION)
+    status = np.where(~is_valid, "rejected", np.where(needs_review, "pending", "auto"))
+    reliability = np.where(is_valid, rng.uniform(55, 99, n), rng.uniform(5, 45, n)).round(2)
+    sources = rng.choice(SOURCES, n, p=SOURCE_WEIGHTS)
+    experts = rng.random(n) < 0.08
+
+    rows = []
+    for j in range(n):
+        type_cat = types[type_idx[j]]
+        value = round(float(values[j]), 2)
+        rows.append({
+            "type": type_cat,
+            "value": value,
+            "lat": round(float(lats[j]), 5),
+            "long": round(float(longs[j]), 5),
+            "location_name": CITIES[city[j]][0],
+            "is_valid": bool(is_valid[j]),
+            "timestamp": stamps[j],
+            "source": str(sources[j]),
+            "details": {CATEGORIES[type_cat][1]: value},
+            "outlier_score": float(reliability[j]),
+            "validation_report": {"ml_status": "Passed" if is_valid[j] else "Outlier Detected", "reliability_score": float(reliability[j]), "trust_level": "Expert" if experts[j] else "Standard"},
+            "needs_review": bool(needs_review[j]),
+            "validation_status": str(status[j]),
+            "is_expert": bool(experts[j])
+        })
+    return rows
+
+def recordings(n: int, seed: int, start: datetime, span_seconds: float):
+    rng = np.random.default_rng([seed, 1_000_001])
+    labels = ["Common Myna", "House Sparrow", "Koel", "Traffic", "Rain", "Frog chorus"]
+    rows = []
+    for i in range(n):
+        name, lat, long, _ = CITIES[rng.integers(len(CITIES))]
+        annotations = [
+            {"user": f"user{rng.integers(1000)}", "label": labels[rng.integers(len(labels))], "confidence": round(float(rng.uniform(0.4, 1)), 2), "timestamp": start.isoformat()}
+            for _ in range(rng.integers(0, 6))
+        ]
+        rows.append({
+            "title": f"Recording {i}",
+            "audio_url": f"https://example.org/audio/{seed}/{i}.wav",
+            "location_name": name,
+            "lat": round(lat + float(rng.normal(0, 0.05)), 5),
+            "long": round(long + float(rng.normal(0, 0.05)), 5),
+            "timestamp": start + timedelta(seconds=float(rng.uniform(0, span_seconds))),
+            "duration_seconds": round(float(rng.uniform(10, 300)), 1),
+            "annotations": annotations,
+            "status": "consensus_reached" if len(annotations) >= 3 else "pending"
+        })
+    return rows
+
+def feedback(n: int, seed: int, start: datetime, span_seconds: float):
+    rng = np.random.default_rng([seed, 1_000_002])
+    categories = ["bug", "feature_request", "general_query"]
+    words = "map sensor reading wrong value location slow export chart forecast great please add support data".split()
+    return [{
+        "user_name": f"User {i}",
+        "email": f"user{i}@example.org",
+        "category": categories[rng.integers(len(categories))],
+        "message": " ".join(words[k] for k in rng.integers(len(words), size=rng.integers(10, 60))),
+        "timestamp": start + timedelta(seconds=float(rng.uniform(0, span_seconds))),
+        "status": ["unread", "read", "addressed"][rng.integers(3)]
+    } for i in range(n)]
+
+def insert(engine, table, rows, batch_size: int):
+    with engine.begin() as conn:
+        for i in range(0, len(rows), batch_size):
+            conn.execute(table.insert(), rows[i:i + batch_size])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic synthetic fixture generator")
+    parser.add_argument("--rows", type=int, default=100_000, help=f"Observations ({MIN_ROWS:,} .. {MAX_ROWS:,})")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--end", default=None, help="ISO time of the newest row (default: start of the current hour)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default="sqlite:///benchmarks/fixtures/synthetic.db")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per INSERT")
+    parser.add_argument("--recordings", type=int, default=None, help="Default: rows / 1000")
+    parser.add_argument("--feedback", type=int, default=None, help="Default: rows / 1000")
+    parser.add_argument("--append", action="store_true", help="Allow writing into a database that already has observations")
+    parser.add_argument("--skip-aggregates", action="store_true", help="Do not rebuild rollups and forecasts")
+    args = parser.parse_args()
+
+    if not MIN_ROWS <= args.rows <= MAX_ROWS:
+        parser.error(f"--rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}")
+    if args.database_url.startswith("sqlite:///") and not args.database_url.startswith("sqlite:////"):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len("sqlite:///"):])) or ".", exist_ok=True)
+
+    # models reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    import models
+    from sqlalchemy import event
+
+    engine = models.engine
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _fast_bulk_load(dbapi_conn, _):
+            # Fixture data can be regenerated, so trade durability for load speed
+            dbapi_conn.execute("PRAGMA synchronous=OFF")
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+    models.Base.metadata.create_all(bind=engine)
+    with models.SessionLocal() as db:
+        if db.query(models.Observation.id).first() is not None and not args.append:
+            sys.exit("Database already has observations; use --append or a fresh --database-url")
+
+    end = datetime.fromisoformat(args.end) if args.end else datetime.now().replace(minute=0, second=0, microsecond=0)
+    span = args.days * 86400
+    start = end - timedelta(seconds=span)
+
+    started = time.perf_counter()
+    table = models.Observation.__table__
+    for chunk in range((args.rows + CHUNK_ROWS - 1) // CHUNK_ROWS):
+        n = min(CHUNK_ROWS, args.rows - chunk * CHUNK_ROWS)
+        insert(engine, table, observation_chunk(chunk, n, args.seed, start, span, args.rows), args.batch_size)
+        done = chunk * CHUNK_ROWS + n
+        print(f"  {done:,}/{args.rows:,} observations ({done / (time.perf_counter() - started):,.0f} rows/s)", end="\r")
+    print()
+
+    insert(engine, models.AcousticRecording.__table__, recordings(args.recordings if args.recordings is not None else args.rows // 1000, args.seed, start, span), args.batch_size)
+    insert(engine, models.Feedback.__table__, feedback(args.feedback if args.feedback is not None else args.rows // 1000, args.seed, start, span), args.batch_size)
+    print(f"Inserted in {time.perf_counter() - started:.1f}s")
+
+    if not args.skip_aggregates:
+        import rollups
+        from forecast_engine import forecast_engine
+        with models.SessionLocal() as db:
+            t0 = time.perf_counter()
+            print(f"Rollups: {rollups.rebuild(db)} ({time.perf_counter() - t0:.1f}s)")
+            forecast_engine.run(db, now=end)
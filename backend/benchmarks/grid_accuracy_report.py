@@ -0,0 +1,52 @@
+"""
+Accuracy-vs-resolution report for the precomputed reliability lookup grid.
+
+Builds grids of increasing resolution for the active global model and compares grid
+lookups with exact model scoring on random observations around the training data:
+vote agreement, mean absolute reliability error, grid size, build and lookup cost.
+
+Run from backend/:  python benchmarks/grid_accuracy_report.py [--n-eval 20000] [--json report.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_service import detector
+from reliability_grid import accuracy_report, grid_bounds
+
+RESOLUTIONS = [(16, 15, 30), (32, 30, 60), (64, 60, 120), (128, 90, 180)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-eval", type=int, default=20000)
+    parser.add_argument("--json", type=str, default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    low, high = grid_bounds(detector.scaler)
+    X_eval = rng.uniform(low, high, (args.n_eval, 3))
+
+    start = time.perf_counter()
+    detector.votes_and_reliability(*detector.decision_scores(detector.scaler.transform(X_eval)))
+    exact_us = (time.perf_counter() - start) / args.n_eval * 1e6
+
+    report = accuracy_report(detector, X_eval, RESOLUTIONS)
+    print(f"Model {detector.version}: exact batch scoring {exact_us:.2f} us/row\n")
+    print(f"{'resolution':>14} | {'size MB':>8} | {'build s':>8} | {'vote agree':>10} | {'rel. MAE':>8} | {'us/row':>7}")
+    print("-" * 72)
+    for r in report:
+        res = "x".join(str(n) for n in r["resolution"])
+        print(f"{res:>14} | {r['size_mb']:>8} | {r['build_seconds']:>8} | {r['vote_agreement']:>10.2%} | {r['reliability_mae']:>8} | {r['lookup_us_per_row']:>7}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": detector.version, "exact_us_per_row": exact_us, "grids": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
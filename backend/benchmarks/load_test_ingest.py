@@ -0,0 +1,300 @@
+"""
+Load test for the ingest endpoints (/api/observe and the IoT /api/v1/update) with every
+external dependency replaced by local stand-ins (see fake_services.py).
+
+Boots the API with uvicorn against a scratch SQLite database and the fake services, warms it
+up, then drives it open-loop at --rate requests/s for --duration seconds. Latency is measured
+from each request's scheduled send time, so a stalled server shows up as queueing instead of
+silently lowering the offered load. Reports throughput, p50/p95/p99 latency per endpoint, a
+per-stage breakdown (validation stages from validation_report.stage_timings_ms; external
+calls, LLM calls and DB commits from /metrics) and writes everything as JSON, tagged with the
+git commit, for comparison across commits (--compare).
+
+Run from backend/:  python benchmarks/load_test_ingest.py --rate 20 --duration 30 --profile realistic
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_services import FakeServices, PROFILES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+# Around the service areas (India, USA)
+CITIES = [
+    (28.61, 77.21), (19.08, 72.88), (12.97, 77.59), (13.08, 80.27), (22.57, 88.36),
+    (40.71, -74.01), (34.05, -118.24), (41.88, -87.63)
+]
+# type -> (low, high) of plausible values
+VALUE_RANGES = {
+    "air": (20, 300), "water": (6, 9), "noise": (40, 100), "soil": (10, 60),
+    "biodiversity": (0, 50), "weather": (15, 40)
+}
+
+def make_request(rng: random.Random, iot_fraction: float, expert_fraction: float):
+    type_cat = rng.choice(list(VALUE_RANGES))
+    lat, long = rng.choice(CITIES)
+    lat, long = round(lat + rng.uniform(-0.1, 0.1), 5), round(long + rng.uniform(-0.1, 0.1), 5)
+    value = round(rng.uniform(*VALUE_RANGES[type_cat]), 2)
+    if rng.random() < iot_fraction:
+        return "iot", {"api_key": "loadtest", "type": type_cat, "value": value, "lat": lat, "long": long}
+    return "observe", {"type": type_cat, "value": value, "lat": lat, "long": long, "is_expert": rng.random() < expert_fraction}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def boot_app(port: int, workers: int, env: dict, log_path: str, timeout: float):
+    log = open(log_path, "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited during startup, see {log_path}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"API did not start within {timeout:.0f}s, see {log_path}")
+
+class LoadGenerator:
+    def __init__(self, base_url: str, concurrency: int, iot_fraction: float, expert_fraction: float, seed: int):
+        self.base_url = base_url
+        self.iot_fraction = iot_fraction
+        self.expert_fraction = expert_fraction
+        self.rng = random.Random(seed)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, endpoint: str, payload: dict, scheduled: float):
+        sent = time.perf_counter()
+        result = {"endpoint": endpoint, "queue_delay": sent - scheduled}
+        try:
+            if endpoint == "iot":
+                response = self._session().get(f"{self.base_url}/api/v1/update", params=payload, timeout=60)
+            else:
+                response = self._session().post(f"{self.base_url}/api/observe", json=payload, timeout=60)
+            result["status"] = response.status_code
+            if response.status_code == 200:
+                body = response.json()
+                result["validation_status"] = body.get("validation_status")
+                result["stages"] = (body.get("validation_report") or {}).get("stage_timings_ms") or {}
+        except requests.RequestException as e:
+            result["status"] = type(e).__name__
+        done = time.perf_counter()
+        result["latency"] = done - scheduled
+        result["service_time"] = done - sent
+        return result
+
+    def run(self, rate: float, duration: float):
+        """
+        Sends rate * duration requests on a fixed schedule; returns (results, elapsed seconds).
+        """
+        n = int(rate * duration)
+        futures = []
+        start = time.perf_counter()
+        for i in range(n):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint, payload = make_request(self.rng, self.iot_fraction, self.expert_fraction)
+            futures.append(self.executor.submit(self._send, endpoint, payload, scheduled))
+        results = [f.result() for f in futures]
+        return results, time.perf_counter() - start
+
+def percentiles_ms(values) -> dict:
+    if not len(values):
+        return {}
+    values = np.asarray(values) * 1000
+    return {
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+def parse_metrics(text: str) -> dict:
+    """
+    {(metric name, labels string): value} for the _sum and _count series of /metrics.
+    """
+    series = {}
+    for line in text.splitlines():
+        if line.startswith("#") or not line.strip():
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        name, _, labels = name_labels.partition("{")
+        if name.endswith("_sum") or name.endswith("_count"):
+            series[(name, labels.rstrip("}"))] = float(value)
+    return series
+
+def metric_means(before: dict, after: dict, metric: str) -> dict:
+    """
+    Calls and mean ms per label set of a histogram over the measured window.
+    """
+    breakdown = {}
+    for (name, labels), total in after.items():
+        if name != f"{metric}_count":
+            continue
+        calls = total - before.get((name, labels), 0)
+        seconds = after.get((f"{metric}_sum", labels), 0) - before.get((f"{metric}_sum", labels), 0)
+        if calls > 0:
+            breakdown[labels or "all"] = {"calls": int(calls), "mean_ms": round(seconds / calls * 1000, 2)}
+    return breakdown
+
+def summarize(results, elapsed: float, metrics_before: dict, metrics_after: dict) -> dict:
+    ok = [r for r in results if r["status"] == 200]
+    statuses = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    outcomes = {}
+    for r in ok:
+        outcomes[r.get("validation_status")] = outcomes.get(r.get("validation_status"), 0) + 1
+
+    stage_names = sorted({s for r in ok for s in r.get("stages", {})})
+    stages = {
+        name: {"runs": len(v), **percentiles_ms(np.array(v) / 1000)}
+        for name in stage_names
+        for v in [[r["stages"][name] for r in ok if name in r.get("stages", {})]]
+    }
+    return {
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else 0.0,
+        "statuses": statuses,
+        "validation_outcomes": outcomes,
+        "latency_ms": percentiles_ms([r["latency"] for r in ok]),
+        "service_time_ms": percentiles_ms([r["service_time"] for r in ok]),
+        "latency_ms_by_endpoint": {
+            endpoint: percentiles_ms([r["latency"] for r in ok if r["endpoint"] == endpoint])
+            for endpoint in sorted({r["endpoint"] for r in ok})
+        },
+        "stages_ms": stages,
+        "external_http": metric_means(metrics_before, metrics_after, "external_http_duration_seconds"),
+        "llm": metric_means(metrics_before, metrics_after, "llm_request_duration_seconds"),
+        "db_commit": metric_means(metrics_before, metrics_after, "db_commit_duration_seconds")
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(report: dict, baseline: dict = None):
+    summary = report["summary"]
+    print(f"\nCommit {report['commit']} | profile {report['config']['profile']} | "
+          f"{summary['requests']} requests in {summary['elapsed_s']}s")
+    print(f"Throughput: {summary['throughput_rps']} req/s | errors: {summary['error_rate'] * 100:.2f}% {summary['statuses']}")
+    print(f"{'':<22}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = [("latency", summary["latency_ms"]), ("service time", summary["service_time_ms"])]
+    rows += [(f"  {e}", v) for e, v in summary["latency_ms_by_endpoint"].items()]
+    rows += [(f"  stage {s}", v) for s, v in summary["stages_ms"].items()]
+    for label, p in rows:
+        if p:
+            print(f"{label:<22}{p['p50']:>10}{p['p95']:>10}{p['p99']:>10}{p['max']:>10}")
+    for section in ("external_http", "llm", "db_commit"):
+        for labels, v in summary[section].items():
+            print(f"{section} {labels}: {v['calls']} calls, mean {v['mean_ms']} ms")
+
+    if baseline:
+        base = baseline["summary"]
+        print(f"\nvs. {baseline['commit']}:")
+        print(f"  throughput {base['throughput_rps']} -> {summary['throughput_rps']} req/s")
+        for q in ("p50", "p95", "p99"):
+            old, new = base["latency_ms"].get(q), summary["latency_ms"].get(q)
+            if old and new:
+                print(f"  {q} {old} -> {new} ms ({(new - old) / old * 100:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest load test with fake external services")
+    parser.add_argument("--rate", type=float, default=20, help="Offered load, requests/s")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max in-flight requests")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic", help="Fake service latency/error profile")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=None, help="Overrides every fake service's error rate")
+    parser.add_argument("--iot-fraction", type=float, default=0.2, help="Share of requests sent to /api/v1/update")
+    parser.add_argument("--expert-fraction", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--database-url", default=None, help="Default: a scratch SQLite file")
+    parser.add_argument("--boot-timeout", type=float, default=600, help="Cold starts may train the outlier model")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="loadtest_")
+    fake = FakeServices(args.profile, args.latency_scale, args.error_rate, seed=args.seed)
+    fake_url = fake.start()
+    port = free_port()
+    env = {
+        **FakeServices.app_env(fake_url),
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(scratch, 'loadtest.db')}",
+        "FORECAST_SCHEDULER_ENABLED": "0"
+    }
+    print(f"Fake services at {fake_url}; booting API on port {port} (log: {scratch}/api.log)")
+    proc = boot_app(port, args.workers, env, os.path.join(scratch, "api.log"), args.boot_timeout)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        generator = LoadGenerator(base_url, args.concurrency, args.iot_fraction, args.expert_fraction, args.seed)
+        if args.warmup > 0:
+            generator.run(args.rate, args.warmup)
+        metrics_before = parse_metrics(requests.get(f"{base_url}/metrics", timeout=10).text)
+        results, elapsed = generator.run(args.rate, args.duration)
+        metrics_after = parse_metrics(requests.get(f"{base_url}/metrics", timeout=10).text)
+        generator.executor.shutdown()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        fake.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "summary": summarize(results, elapsed, metrics_before, metrics_after),
+        "fake_services": fake.stats
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_test_{report['commit']}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
@@ -0,0 +1,90 @@
+"""
+Validates the scalable One-Class SVM mode (Nystroem + SGDOneClassSVM) against the
+exact RBF OneClassSVM used by the outlier ensemble.
+
+1. Agreement: both ensembles are fitted on the same training set and their votes are
+   compared on a held-out set (held-out normal points + random probes, which include
+   obvious outliers). The check fails if the ensemble disagreement exceeds --tolerance.
+2. Scaling: fit time of the SVM member at growing training-set sizes. The exact RBF
+   SVM is only timed up to --rbf-max rows since it grows super-linearly.
+
+Run from backend/:  python benchmarks/validate_scalable_svm.py [--n-train 20000] [--tolerance 0.02]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add backend directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_service import AdvancedOutlierDetector, make_one_class_svm
+
+def synthetic_observations(n, rng):
+    # Same shape as the cold-start baseline: India and USA service areas, values 0-150
+    half = n // 2
+    india = np.column_stack([rng.uniform(0, 150, half), rng.uniform(8, 38, half), rng.uniform(68, 98, half)])
+    usa = np.column_stack([rng.uniform(0, 150, n - half), rng.uniform(25, 50, n - half), rng.uniform(-125, -65, n - half)])
+    return np.vstack([india, usa])
+
+def random_probes(n, rng):
+    return np.column_stack([rng.uniform(0, 500, n), rng.uniform(-60, 70, n), rng.uniform(-180, 180, n)])
+
+def check_agreement(n_train, tolerance, rng):
+    X_train = synthetic_observations(n_train, rng)
+    X_holdout = np.vstack([synthetic_observations(n_train // 5, rng), random_probes(n_train // 10, rng)])
+
+    exact = AdvancedOutlierDetector(load_persisted=False, cold_start=False, svm_mode="rbf")
+    scalable = AdvancedOutlierDetector(load_persisted=False, cold_start=False, svm_mode="scalable")
+    exact.fit(X_train)
+    scalable.fit(X_train)
+
+    args = (X_holdout[:, 0], X_holdout[:, 1], X_holdout[:, 2])
+    out_exact, rel_exact = exact.check_outliers(*args)
+    out_scalable, rel_scalable = scalable.check_outliers(*args)
+
+    X_scaled = exact.scaler.transform(X_holdout)
+    svm_exact = exact.oc_svm.decision_function(X_scaled) <= 0
+    svm_scalable = scalable.oc_svm.decision_function(X_scaled) <= 0
+
+    ensemble_disagreement = float(np.mean(out_exact != out_scalable))
+    print(f"Held-out set: {len(X_holdout)} rows ({out_exact.mean():.1%} flagged by the exact ensemble)")
+    print(f"SVM member disagreement:  {np.mean(svm_exact != svm_scalable):.2%}")
+    print(f"Ensemble vote disagreement: {ensemble_disagreement:.2%} (tolerance {tolerance:.2%})")
+    print(f"Mean |reliability delta|:   {np.mean(np.abs(rel_exact - rel_scalable)):.4f}")
+    return ensemble_disagreement <= tolerance
+
+def time_svm_fits(sizes, rbf_max, rng):
+    print(f"\n{'rows':>9} | {'rbf fit (s)':>12} | {'scalable fit (s)':>16} | {'scalable us/row':>15}")
+    print("-" * 62)
+    for n in sizes:
+        X = synthetic_observations(n, rng)
+        X = (X - X.mean(axis=0)) / X.std(axis=0)
+        rbf_seconds = "skipped"
+        if n <= rbf_max:
+            start = time.perf_counter()
+            make_one_class_svm(n, "rbf").fit(X)
+            rbf_seconds = f"{time.perf_counter() - start:.2f}"
+        start = time.perf_counter()
+        make_one_class_svm(n, "scalable").fit(X)
+        scalable_seconds = time.perf_counter() - start
+        print(f"{n:>9,} | {rbf_seconds:>12} | {scalable_seconds:>16.2f} | {scalable_seconds / n * 1e6:>15.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-train", type=int, default=20000)
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--sizes", type=str, default="10000,50000,100000,200000,400000")
+    parser.add_argument("--rbf-max", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    passed = check_agreement(args.n_train, args.tolerance, rng)
+    time_svm_fits([int(s) for s in args.sizes.split(",")], args.rbf_max, rng)
+
+    print("\nPASS" if passed else "\nFAIL: scalable ensemble disagrees beyond tolerance")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+# Tests never touch the configured database or model artifacts: point both at a throwaway
+# directory before any backend module reads its configuration at import time.
+_TEST_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ["MODEL_ARTIFACT_DIR"] = os.path.join(_TEST_DIR, "model_artifacts")
+os.environ["FORECAST_SCHEDULER_ENABLED"] = "0"
+os.environ["SCRAPER_METRICS_FILE"] = os.path.join(_TEST_DIR, "scraper_metrics.prom")
+
+# The older test_*.py scripts call live services at import time and are run by hand;
+# test_out*.txt are saved console logs
+collect_ignore = [
+    "test_delhi.py", "test_gemini_diag.py", "test_gemini_simple.py", "test_rag.py",
+    "test_submission.py", "test_tn_outlier.py", "test_tn_outlier_simple.py", "test_us_outlier.py",
+    "test_out.txt", "test_out_2.txt"
+]
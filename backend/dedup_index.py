@@ -0,0 +1,141 @@
+import os
+import math
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+# Spatio-temporal index of recent observations for near-duplicate detection at ingest.
+# Scraper reruns, retrying IoT gateways and double-submitted forms produce the same reading
+# again: same sender, type, (almost) the same place, time and value. The sender is the row's
+# source plus the id it was sent under: details["device_id"] for IoT sensors, ["station"] for
+# scraped stations, ["client_id"] for the web form (one id per browser). Rows without any of
+# these are never deduplicated, so two people reporting similar values nearby always keep
+# their own, corroborating rows.
+# Observations are hashed by (type, sender, DEDUP_CELL_SIZE_DEG cell, DEDUP_WINDOW_SECONDS
+# time bucket), with the reading's own timestamp (a station's measurement time for scraped
+# rows, ingest time otherwise). A lookup probes the
+# 3x3 neighbouring cells in the previous, current and next bucket (27 dict lookups),
+# so matches across cell or bucket edges are found in constant time.
+# Only originals are indexed: a row flagged as a duplicate never extends the window, so a steady
+# sensor is not flagged forever. The index is per process and rebuilt from the last
+# DEDUP_RETENTION_SECONDS of rows at startup.
+
+DEDUP_MODE = os.getenv("DEDUP_MODE", "flag") # flag: store but mark, merge: return the existing row, off
+CELL_SIZE_DEG = float(os.getenv("DEDUP_CELL_SIZE_DEG", 0.005)) # ~500 m
+WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", 600))
+VALUE_TOLERANCE = float(os.getenv("DEDUP_VALUE_TOLERANCE", 0.02)) # Relative
+RETENTION_SECONDS = float(os.getenv("DEDUP_RETENTION_SECONDS", 86400))
+
+def origin_of(details) -> str:
+    """
+    Device, station or client id a reading was sent by, if the payload carries one.
+    """
+    details = details if isinstance(details, dict) else {}
+    origin = details.get("device_id") or details.get("station") or details.get("client_id")
+    return str(origin) if origin is not None else None
+
+class DuplicateIndex:
+    def __init__(self, cell_size: float = CELL_SIZE_DEG, window: float = WINDOW_SECONDS,
+                 tolerance: float = VALUE_TOLERANCE, retention: float = RETENTION_SECONDS):
+        self.cell_size = cell_size
+        self.window = window
+        self.tolerance = tolerance
+        self.retention = retention
+        self._buckets = {} # (type, source, origin, row, col, time bucket) -> [(value, lat, long, ts, obs_id)]
+        self._expiry = deque() # (ts, key) in insertion order, for pruning
+        self._lock = threading.Lock()
+
+    def _key(self, type_cat: str, source: str, origin: str, lat: float, long: float, ts: float):
+        return (
+            (type_cat or "").lower(),
+            source or "manual",
+            origin,
+            int(math.floor((lat + 90.0) / self.cell_size)),
+            int(math.floor((long + 180.0) / self.cell_size)),
+            int(ts // self.window)
+        )
+
+    def _is_match(self, entry, value, lat, long, ts) -> bool:
+        e_value, e_lat, e_long, e_ts, _ = entry
+        return (
+            abs(e_ts - ts) <= self.window
+            and abs(e_lat - lat) <= self.cell_size
+            and abs(e_long - long) <= self.cell_size
+            and abs(e_value - value) <= max(self.tolerance * max(abs(e_value), abs(value)), 1e-6)
+        )
+
+    def find(self, type_cat: str, value: float, lat: float, long: float, timestamp: datetime = None,
+             source: str = "manual", origin: str = None):
+        """
+        Returns the id of a recent near-duplicate observation from the same sender, or None.
+        Always None for a reading without a known sender (origin None).
+        """
+        if origin is None:
+            return None
+        ts = (timestamp or datetime.now()).timestamp()
+        type_key, source_key, origin_key, row, col, bucket = self._key(type_cat, source, origin, lat, long, ts)
+        with self._lock:
+            for dt in (-1, 0, 1):
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        for entry in self._buckets.get((type_key, source_key, origin_key, row + dr, col + dc, bucket + dt), ()):
+                            if self._is_match(entry, value, lat, long, ts):
+                                return entry[4]
+        return None
+
+    def add(self, type_cat: str, value: float, lat: float, long: float, timestamp: datetime, obs_id: int,
+            source: str = "manual", origin: str = None):
+        # Callers add originals only, never rows flagged as duplicates
+        if origin is None:
+            return # Never matched, so never indexed
+        ts = (timestamp or datetime.now()).timestamp()
+        key = self._key(type_cat, source, origin, lat, long, ts)
+        with self._lock:
+            self._buckets.setdefault(key, []).append((value, lat, long, ts, obs_id))
+            self._expiry.append((ts, key))
+            self._prune(ts)
+
+    def _prune(self, now_ts: float):
+        cutoff = now_ts - self.retention
+        while self._expiry and self._expiry[0][0] < cutoff:
+            ts, key = self._expiry.popleft()
+            entries = self._buckets.get(key)
+            if entries is None:
+                continue
+            entries[:] = [e for e in entries if e[3] >= cutoff]
+            if not entries:
+                del self._buckets[key]
+
+    def rebuild(self, db) -> int:
+        """
+        Reloads the index from the last `retention` seconds of observations, duplicates excluded.
+        """
+        from sqlalchemy import select, or_
+        import models
+
+        since = datetime.now() - timedelta(seconds=self.retention)
+        rows = db.execute(
+            select(models.Observation.id, models.Observation.type, models.Observation.value,
+                   models.Observation.lat, models.Observation.long, models.Observation.timestamp,
+                   models.Observation.source, models.Observation.details)
+            .where(models.Observation.timestamp >= since)
+            .where(or_(models.Observation.validation_status.is_(None), models.Observation.validation_status != "duplicate"))
+            .order_by(models.Observation.timestamp)
+        ).all()
+        with self._lock:
+            self._buckets.clear()
+            self._expiry.clear()
+        n = 0
+        for obs_id, type_cat, value, lat, long, ts, source, details in rows:
+            origin = origin_of(details)
+            if None in (value, lat, long, ts, origin):
+                continue
+            self.add(type_cat, value, lat, long, ts, obs_id, source, origin)
+            n += 1
+        return n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": DEDUP_MODE, "buckets": len(self._buckets), "entries": len(self._expiry)}
+
+dedup_index = DuplicateIndex()
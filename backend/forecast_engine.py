@@ -0,0 +1,219 @@
+import os
+import time
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from geo_cells import cell_ids, cell_center
+
+# Seasonal forecasting engine.
+# A batch job turns the last FORECAST_HISTORY_DAYS of hourly rollups into hourly mean
+# series per (type, region), where region is "global" or a geo cell, fits additive
+# Holt-Winters models (daily season, damped trend) to all series at once and stores the
+# forecasts as ForecastSnapshot rows. Serving a forecast is then a single-row read.
+# The recursion runs over time, vectorized across series, and the smoothing parameters are
+# picked per series from a small grid by one-step-ahead squared error.
+
+SEASON_HOURS = 24
+HORIZON_HOURS = 72
+HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", 14))
+FORECAST_CELL_SIZE_DEG = float(os.getenv("FORECAST_CELL_SIZE_DEG", 1.0))
+MIN_OBSERVED_HOURS = int(os.getenv("FORECAST_MIN_OBSERVED_HOURS", 6)) # Sparser series are not forecast
+REFRESH_SECONDS = float(os.getenv("FORECAST_REFRESH_SECONDS", 3600))
+GLOBAL_REGION = "global"
+
+ALPHAS = (0.1, 0.3, 0.6) # Level
+BETAS = (0.0, 0.05) # Trend
+GAMMAS = (0.05, 0.2, 0.4) # Season
+PHI = 0.98 # Trend damping, keeps 72h extrapolations from running away
+
+def hourly_series(db, now: datetime = None, history_days: int = HISTORY_DAYS, cell_size: float = FORECAST_CELL_SIZE_DEG):
+    """
+    Reads the hourly rollups (rollups.py) and returns (keys, sums, counts, start) where keys
+    are (type, region) pairs and sums/counts are (n_series x n_hours) arrays of hourly buckets.
+    Rollup cells are mapped to the forecast cell containing their centre, and every cell also
+    counts towards its type's global series.
+    """
+    from sqlalchemy import select
+    import models
+
+    now = now or datetime.now()
+    end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = end - timedelta(days=history_days)
+    n_hours = history_days * 24
+
+    table = models.ObservationRollupHourly
+    rows = db.execute(
+        select(table.type, table.cell, table.bucket_start, table.count, table.sum).where(
+            table.bucket_start >= start, table.bucket_start < end, table.count > 0
+        )
+    ).all()
+    if not rows:
+        return [], np.zeros((0, n_hours)), np.zeros((0, n_hours)), start
+
+    types, cells, buckets, counts, sums = zip(*rows)
+    hours = np.array([int((b - start).total_seconds() // 3600) for b in buckets])
+    centers = np.array([cell_center(c) for c in cells])
+    regions = cell_ids(centers[:, 0], centers[:, 1], cell_size)
+
+    keys = list(zip(types, regions)) + [(t, GLOBAL_REGION) for t in types]
+    index = {}
+    for key in keys:
+        index.setdefault(key, len(index))
+    rows_idx = np.array([index[k] for k in keys])
+
+    series_sums = np.zeros((len(index), n_hours))
+    series_counts = np.zeros((len(index), n_hours))
+    np.add.at(series_sums, (rows_idx, np.concatenate([hours, hours])), np.tile(np.asarray(sums, dtype=float), 2))
+    np.add.at(series_counts, (rows_idx, np.concatenate([hours, hours])), np.tile(np.asarray(counts, dtype=float), 2))
+    return sorted(index, key=index.get), series_sums, series_counts, start
+
+def fill_gaps(Y):
+    """
+    Forward-fills NaN hours per series (back-filling leading gaps), vectorized.
+    """
+    Y = np.array(Y, dtype=float)
+    n, T = Y.shape
+    observed = ~np.isnan(Y)
+    idx = np.where(observed, np.arange(T), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = Y[np.arange(n)[:, None], idx]
+    first = np.argmax(observed, axis=1)
+    leading = np.arange(T) < first[:, None]
+    filled[leading] = np.broadcast_to(Y[np.arange(n), first][:, None], Y.shape)[leading]
+    return filled
+
+def holt_winters(Y, alpha, beta, gamma, season: int = SEASON_HOURS, horizon: int = HORIZON_HOURS, phi: float = PHI):
+    """
+    Additive damped Holt-Winters over all rows of Y (n_series x T) at once.
+    alpha/beta/gamma are scalars or per-series arrays.
+    Returns (forecast (n x horizon), one-step-ahead SSE per series after the first season).
+    """
+    n, T = Y.shape
+    level = Y[:, :season].mean(axis=1)
+    trend = (Y[:, season:2 * season].mean(axis=1) - level) / season if T >= 2 * season else np.zeros(n)
+    seasonal = Y[:, :season] - level[:, None]
+    sse = np.zeros(n)
+
+    for t in range(T):
+        s = seasonal[:, t % season]
+        y = Y[:, t]
+        if t >= season:
+            sse += (y - (level + phi * trend + s)) ** 2
+        new_level = alpha * (y - s) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        seasonal[:, t % season] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    h = np.arange(1, horizon + 1)
+    damped = np.cumsum(phi ** h) # phi + phi^2 + ... + phi^h
+    forecast = level[:, None] + damped[None, :] * trend[:, None] + seasonal[:, (T + h - 1) % season]
+    return forecast, sse
+
+def fit_forecasts(Y, season: int = SEASON_HOURS, horizon: int = HORIZON_HOURS):
+    """
+    Fits every parameter combination of the grid to all series and keeps, per series, the
+    one with the lowest one-step-ahead error. Returns (forecast, sigma, params (n x 3)).
+    """
+    Y = np.asarray(Y, dtype=float)
+    n, T = Y.shape
+    best_sse = np.full(n, np.inf)
+    best_forecast = np.zeros((n, horizon))
+    best_params = np.zeros((n, 3))
+    for alpha in ALPHAS:
+        for beta in BETAS:
+            for gamma in GAMMAS:
+                forecast, sse = holt_winters(Y, alpha, beta, gamma, season, horizon)
+                better = sse < best_sse
+                best_sse[better] = sse[better]
+                best_forecast[better] = forecast[better]
+                best_params[better] = (alpha, beta, gamma)
+    sigma = np.sqrt(best_sse / max(T - season, 1))
+    return best_forecast, sigma, best_params
+
+class ForecastEngine:
+    def __init__(self):
+        self.last_run = None # Summary of the last batch run in this process
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    def run(self, db, now: datetime = None) -> dict:
+        """
+        Recomputes and stores the forecasts for every (type, region) series.
+        """
+        import models
+
+        with self._run_lock:
+            started = time.perf_counter()
+            now = now or datetime.now()
+            keys, sums, counts, start = hourly_series(db, now)
+            observed_hours = (counts > 0).sum(axis=1)
+            keep = observed_hours >= MIN_OBSERVED_HOURS
+            keys = [k for k, kept in zip(keys, keep) if kept]
+            sums, counts = sums[keep], counts[keep]
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                Y = sums / counts # NaN for hours without observations
+            forecast, sigma, params = fit_forecasts(fill_gaps(Y)) if keys else (np.empty((0, HORIZON_HOURS)), np.empty(0), np.empty((0, 3)))
+            forecast = np.maximum(forecast, 0)
+
+            history = Y[:, -24:]
+            start_time = start + timedelta(hours=Y.shape[1]) if keys else None
+            generated_at = datetime.now()
+            snapshots = []
+            for i, (type_cat, region) in enumerate(keys):
+                recent = history[i][~np.isnan(history[i])]
+                snapshots.append({
+                    "type": type_cat,
+                    "region": region,
+                    "generated_at": generated_at,
+                    "start_time": start_time,
+                    "baseline": round(float(recent.mean()), 2) if len(recent) else None,
+                    "history": [None if np.isnan(v) else round(float(v), 2) for v in history[i]],
+                    "values": [round(float(v), 2) for v in forecast[i]],
+                    "sigma": round(float(sigma[i]), 4),
+                    "model": {"method": "holt_winters", "alpha": params[i][0], "beta": params[i][1], "gamma": params[i][2], "phi": PHI},
+                    "n_observations": int(counts[i].sum())
+                })
+
+            # Replace the previous run in one transaction, so readers never see a partial set
+            db.query(models.ForecastSnapshot).delete()
+            if snapshots:
+                db.bulk_insert_mappings(models.ForecastSnapshot, snapshots)
+            db.commit()
+
+            self.last_run = {
+                "generated_at": generated_at.isoformat(),
+                "series": len(keys),
+                "skipped_sparse": int((~keep).sum()),
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+            print(f"Forecast run: {self.last_run}")
+            return self.last_run
+
+    def is_fresh(self, db) -> bool:
+        from sqlalchemy import func
+        import models
+        latest = db.query(func.max(models.ForecastSnapshot.generated_at)).scalar()
+        return latest is not None and (datetime.now() - latest).total_seconds() < REFRESH_SECONDS
+
+    def _loop(self):
+        from models import SessionLocal
+        while True:
+            db = SessionLocal()
+            try:
+                # With several workers, whoever runs first refreshes for everyone
+                if not self.is_fresh(db):
+                    self.run(db)
+            except Exception as e:
+                print(f"Forecast run failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            time.sleep(REFRESH_SECONDS)
+
+    def start_scheduler(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="forecast-scheduler", daemon=True)
+            self._thread.start()
+
+forecast_engine = ForecastEngine()
@@ -1,75 +1,212 @@
+import os
+import time
+import threading
 import numpy as np
 from datetime import datetime, timedelta
 from quality_classifier import QualityClassifier
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 import models
+import rollups
+from forecast_engine import GLOBAL_REGION, REFRESH_SECONDS, FORECAST_CELL_SIZE_DEG
+from geo_cells import cell_id, parse_cell_id, cell_center
+
+# The dashboard polls the forecast constantly, so results are cached per (type, region) for a short TTL.
+# All snapshots of a type are read in one query and cached together, so serving any cell
+# after the first is a dict lookup.
+FORECAST_CACHE_TTL_SECONDS = float(os.getenv("FORECAST_CACHE_TTL_SECONDS", 60))
+MAX_CACHED_FORECASTS = 4096
+FORECAST_HORIZON_HOURS = 72
+
+# Fallback baselines
+BASELINES = {
+    "air": 45, 
+    "water": 15, 
+    "biodiversity": 85,
+    "soil": 62,
+    "noise": 52,
+    "waste": 78,
+    "weather": 28,
+    "radiation": 3
+}
 
 class HealthForecastService:
     def __init__(self):
         self.classifier = QualityClassifier()
+        self.rng = np.random.default_rng()
+        self._cache = {} # (type, region) -> (expires_at, result)
+        self._snapshots = {} # type -> (expires_at, {region: snapshot})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resolve_region(lat: float = None, long: float = None, region: str = None) -> str:
+        """
+        Region id for a request: an explicit region id, the forecast cell containing
+        lat/long, or "global". Raises ValueError for a malformed region id.
+        """
+        if region and region != GLOBAL_REGION:
+            parse_cell_id(region)
+            return region
+        if lat is not None and long is not None:
+            return cell_id(lat, long, FORECAST_CELL_SIZE_DEG)
+        return GLOBAL_REGION
+
+    def get_forecast(self, db: Session, type_cat: str = "air", lat: float = None, long: float = None, region: str = None):
+        region = self.resolve_region(lat, long, region)
+        key = (type_cat, region)
+        now_ts = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > now_ts:
+            return cached[1]
+
+        # Precomputed Holt-Winters forecast (forecast_engine.py). Cells without enough data
+        # get the global forecast; the on-the-fly baseline projection is only used until
+        # the first batch run has produced a snapshot
+        snapshots = self._type_snapshots(db, type_cat)
+        snapshot = snapshots.get(region) or snapshots.get(GLOBAL_REGION)
+        result = self._snapshot_forecast(type_cat, snapshot) if snapshot else self._compute_forecast(db, type_cat)
+        result["requested_region"] = region
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_FORECASTS:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now_ts}
+            self._cache[key] = (now_ts + FORECAST_CACHE_TTL_SECONDS, result)
+        return result
+
+    def list_regions(self, db: Session, type_cat: str = "air"):
+        """
+        Regions (cells) with their own forecast for this type.
+        """
+        regions = []
+        for region, snapshot in self._type_snapshots(db, type_cat).items():
+            if region == GLOBAL_REGION:
+                continue
+            lat, long = cell_center(region)
+            regions.append({"region": region, "lat": lat, "long": long, "baseline": snapshot["baseline"], "n_observations": snapshot["n_observations"]})
+        return regions
+
+    def invalidate(self, type_cat: str = None):
+        with self._lock:
+            if type_cat is None:
+                self._cache.clear()
+                self._snapshots.clear()
+            else:
+                self._cache = {k: v for k, v in self._cache.items() if k[0] != type_cat}
+                self._snapshots.pop(type_cat, None)
+
+    def _type_snapshots(self, db: Session, type_cat: str) -> dict:
+        # Every region of a type in one query, as plain dicts (safe to share across sessions)
+        now_ts = time.time()
+        with self._lock:
+            cached = self._snapshots.get(type_cat)
+        if cached and cached[0] > now_ts:
+            return cached[1]
+
+        stale_before = datetime.now() - timedelta(seconds=3 * REFRESH_SECONDS)
+        rows = db.query(models.ForecastSnapshot).filter(
+            models.ForecastSnapshot.type == type_cat.lower(),
+            models.ForecastSnapshot.generated_at >= stale_before # Ignore leftovers from a scheduler that stopped running
+        ).all()
+        columns = ("region", "generated_at", "start_time", "baseline", "history", "values", "sigma", "model", "n_observations")
+        snapshots = {row.region: {c: getattr(row, c) for c in columns} for row in rows}
+        with self._lock:
+            self._snapshots[type_cat] = (now_ts + FORECAST_CACHE_TTL_SECONDS, snapshots)
+        return snapshots
 
-    def get_forecast(self, db: Session, type_cat: str = "air"):
-        # 1. Determine baseline from last 24h of valid data
+    def _snapshot_forecast(self, type_cat: str, snapshot: dict):
+        now = datetime.now()
+        history_start = snapshot["start_time"] - timedelta(hours=len(snapshot["history"]))
+        all_data = []
+        observed = [(i, v) for i, v in enumerate(snapshot["history"]) if v is not None]
+        labels = self.classify_many(type_cat, [v for _, v in observed])
+        for (i, value), classification in zip(observed, labels):
+            ts = history_start + timedelta(hours=i)
+            all_data.append({
+                "time": ts.isoformat(),
+                "hour": round((ts - now).total_seconds() / 3600, 1),
+                "value": value,
+                "label": classification["quality_label"],
+                "color": classification["color_code"],
+                "health_msg": classification["health_msg"],
+                "is_real": True
+            })
+
+        values = np.asarray(snapshot["values"], dtype=float)
+        steps = np.arange(1, len(values) + 1)
+        # Approximate 95% band: one-step error growing with the square root of the horizon
+        band = 1.96 * (snapshot["sigma"] or 0.0) * np.sqrt(steps)
+        for i, (value, classification) in enumerate(zip(values.tolist(), self.classify_many(type_cat, values))):
+            ts = snapshot["start_time"] + timedelta(hours=i)
+            all_data.append({
+                "time": ts.isoformat(),
+                "hour": round((ts - now).total_seconds() / 3600, 1),
+                "value": value,
+                "lower": round(max(0.0, value - band[i]), 2),
+                "upper": round(value + band[i], 2),
+                "label": classification["quality_label"],
+                "color": classification["color_code"],
+                "health_msg": classification["health_msg"],
+                "is_real": False
+            })
+
+        baseline = snapshot["baseline"] if snapshot["baseline"] is not None else BASELINES.get(type_cat.lower(), 50)
+        return {
+            "type": type_cat,
+            "region": snapshot["region"],
+            "baseline": round(baseline, 2),
+            "model": snapshot["model"],
+            "generated_at": snapshot["generated_at"].isoformat(),
+            "forecast": all_data,
+            "summary": self._generate_summary(type_cat, all_data)
+        }
+
+    def _compute_forecast(self, db: Session, type_cat: str):
+        # 1. Determine baseline from last 24h of valid data (hourly rollups)
         last_24h = datetime.now() - timedelta(hours=24)
-        recent_obs = db.query(models.Observation).filter(
-            models.Observation.type == type_cat,
+        recent = (
+            func.lower(models.Observation.type) == type_cat.lower(), # Same matching as the rollups
             models.Observation.is_valid == True,
             models.Observation.timestamp >= last_24h
-        ).all()
-        
-        if recent_obs:
-            baseline = sum(o.value for o in recent_obs) / len(recent_obs)
-        else:
-            # Fallback baselines
-            baselines = {
-                "air": 45, 
-                "water": 15, 
-                "biodiversity": 85,
-                "soil": 62,
-                "noise": 52,
-                "waste": 78,
-                "weather": 28,
-                "radiation": 3
-            }
-            baseline = baselines.get(type_cat.lower(), 50)
+        )
+        count, mean, _std, _min, _max = rollups.totals(db, type_cat, since=last_24h)
+        baseline = float(mean) if count else BASELINES.get(type_cat.lower(), 50)
 
         # 2. Prepare forecast and historical data
         all_data = []
         now = datetime.now()
         
-        # Add historical points
-        if recent_obs:
-            # Sort by timestamp
-            sorted_obs = sorted(recent_obs, key=lambda x: x.timestamp)
-            for obs in sorted_obs:
-                time_diff = (obs.timestamp - now).total_seconds() / 3600
-                classification = self.classifier.classify(type_cat, obs.value)
+        # Add historical points (only the two columns needed, sorted by the DB)
+        if count:
+            history = db.execute(
+                select(models.Observation.timestamp, models.Observation.value).where(*recent).order_by(models.Observation.timestamp)
+            ).all()
+            timestamps = [t for t, _ in history]
+            values = [v for _, v in history]
+            for ts, value, classification in zip(timestamps, values, self.classify_many(type_cat, values)):
                 all_data.append({
-                    "time": obs.timestamp.isoformat(),
-                    "hour": round(time_diff, 1),
-                    "value": obs.value,
+                    "time": ts.isoformat(),
+                    "hour": round((ts - now).total_seconds() / 3600, 1),
+                    "value": value,
                     "label": classification["quality_label"],
                     "color": classification["color_code"],
                     "health_msg": classification["health_msg"],
                     "is_real": True
                 })
 
-        # 3. Generate 72 hours of predictive data
+        # 3. Generate 72 hours of predictive data in one vectorized pass
         trend_slope = 0.05 / 72 if type_cat in ["air", "water"] else -0.05 / 72
-        
-        for h in range(73):
-            time_offset = (now + timedelta(hours=h)).hour
-            diurnal = 10 * np.sin(2 * np.pi * (time_offset - 8) / 24)
-            trend = baseline * (1 + trend_slope * h)
-            noise = np.random.normal(0, 2)
-            predicted_value = max(0, trend + diurnal + noise)
-            
-            classification = self.classifier.classify(type_cat, predicted_value)
-            
+        h = np.arange(FORECAST_HORIZON_HOURS + 1)
+        hour_of_day = (now.hour + h) % 24
+        diurnal = 10 * np.sin(2 * np.pi * (hour_of_day - 8) / 24)
+        trend = baseline * (1 + trend_slope * h)
+        noise = self.rng.normal(0, 2, len(h))
+        predicted = np.round(np.maximum(0, trend + diurnal + noise), 2)
+
+        for hour, value, classification in zip(h.tolist(), predicted.tolist(), self.classify_many(type_cat, predicted)):
             all_data.append({
-                "time": (now + timedelta(hours=h)).isoformat(),
-                "hour": h,
-                "value": round(predicted_value, 2),
+                "time": (now + timedelta(hours=hour)).isoformat(),
+                "hour": hour,
+                "value": value,
                 "label": classification["quality_label"],
                 "color": classification["color_code"],
                 "health_msg": classification["health_msg"],
@@ -78,11 +215,23 @@ class HealthForecastService:
             
         return {
             "type": type_cat,
+            "region": GLOBAL_REGION,
             "baseline": round(baseline, 2),
             "forecast": all_data,
             "summary": self._generate_summary(type_cat, all_data)
         }
 
+    def classify_many(self, type_cat, values):
+        """
+        Batch classification: classifies each distinct value once and maps the results back.
+        """
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return []
+        uniq, inverse = np.unique(values, return_inverse=True)
+        labels = [self.classifier.classify(type_cat, float(v)) for v in uniq]
+        return [labels[i] for i in inverse.ravel()]
+
     def _generate_summary(self, type_cat, forecast):
         # AI-like summarization of the trend
         start_val = forecast[0]["value"]
@@ -0,0 +1,36 @@
+import os
+import math
+import numpy as np
+
+# Regular lat/long grid shared by caches, indexes and per-region aggregates.
+# A cell is addressed by its (row, col) on a grid of `size` degrees and serialized
+# as a region id like "0.5:236:512" so it can be passed around in URLs and DB keys.
+
+CELL_SIZE_DEG = float(os.getenv("GEO_CELL_SIZE_DEG", 0.5))
+
+def cell_of(lat: float, long: float, size: float = CELL_SIZE_DEG):
+    return int(math.floor((lat + 90.0) / size)), int(math.floor((long + 180.0) / size))
+
+def cell_id(lat: float, long: float, size: float = CELL_SIZE_DEG) -> str:
+    row, col = cell_of(lat, long, size)
+    return f"{size:g}:{row}:{col}"
+
+def cell_ids(lats, longs, size: float = CELL_SIZE_DEG) -> np.ndarray:
+    """
+    Vectorized cell_id for arrays of coordinates.
+    """
+    rows = np.floor((np.asarray(lats, dtype=float) + 90.0) / size).astype(np.int64)
+    cols = np.floor((np.asarray(longs, dtype=float) + 180.0) / size).astype(np.int64)
+    prefix = f"{size:g}:"
+    return np.array([f"{prefix}{r}:{c}" for r, c in zip(rows, cols)], dtype=object)
+
+def parse_cell_id(region_id: str):
+    """
+    Returns (size, row, col) for a region id produced by cell_id. Raises ValueError otherwise.
+    """
+    size, row, col = region_id.split(":")
+    return float(size), int(row), int(col)
+
+def cell_center(region_id: str):
+    size, row, col = parse_cell_id(region_id)
+    return (row + 0.5) * size - 90.0, (col + 0.5) * size - 180.0
@@ -1,11 +1,16 @@
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
+from urllib.parse import urlparse
 import time
+import os
+
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
 
 class GeocodingService:
     def __init__(self):
         # Using a custom user agent as required by Nominatim's usage policy
-        self.geolocator = Nominatim(user_agent="mechovate_environmental_monitor")
+        url = urlparse(NOMINATIM_URL)
+        self.geolocator = Nominatim(user_agent="mechovate_environmental_monitor", domain=url.netloc, scheme=url.scheme)
 
     def get_location_name(self, lat: float, lng: float) -> str:
         try:
@@ -0,0 +1,218 @@
+import os
+import math
+import time
+import zlib
+import struct
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from scipy.spatial import cKDTree
+from sqlalchemy import select
+import models
+
+# Interpolated heatmap tiles (Web Mercator z/x/y, 256 px) for the Leaflet map.
+# Recent valid observations of a type are indexed in a KD-tree on the unit sphere, so
+# chord distances follow great-circle distances. Each tile is interpolated with
+# inverse-distance weighting over the k nearest sources on a coarse grid of
+# HEATMAP_RENDER_SIZE^2 nodes. The IDW numerator and denominator are then bilinearly
+# upsampled to 256 px, which keeps tiles smooth at a fraction of the neighbour queries.
+# Sources are rebuilt per (type, time bucket) or when new data lands. Encoded tiles go in
+# an LRU cache keyed by (type, z, x, y, time bucket, format).
+
+TILE_SIZE = 256
+RENDER_SIZE = int(os.getenv("HEATMAP_RENDER_SIZE", 64))
+WINDOW_HOURS = float(os.getenv("HEATMAP_WINDOW_HOURS", 24))
+BUCKET_SECONDS = int(os.getenv("HEATMAP_BUCKET_SECONDS", 300))
+K_NEIGHBORS = int(os.getenv("HEATMAP_K_NEIGHBORS", 8))
+MAX_DISTANCE_KM = float(os.getenv("HEATMAP_MAX_DISTANCE_KM", 50))
+POWER = 2.0
+TILE_CACHE_SIZE = int(os.getenv("HEATMAP_TILE_CACHE_SIZE", 2048))
+MIN_REFRESH_SECONDS = float(os.getenv("HEATMAP_MIN_REFRESH_SECONDS", 30)) # Coalesces invalidations under steady ingest
+EARTH_RADIUS_KM = 6371.0
+
+# Green -> yellow -> orange -> red -> purple, like the AQI colour scale
+COLOR_STOPS = np.array([
+    [0, 228, 0], [255, 255, 0], [255, 126, 0], [255, 0, 0], [143, 63, 151]
+], dtype=float)
+
+def to_unit_vectors(lats, longs):
+    lat, lon = np.radians(lats), np.radians(longs)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def tile_coordinates(z: int, x: int, y: int, size: int):
+    """
+    (lats, longs) of a size x size grid spanning the tile edge to edge, row-major from the top.
+    """
+    n = 2 ** z
+    frac = np.linspace(0, 1, size)
+    longs = (x + frac) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + frac) / n))))
+    lat_grid, long_grid = np.meshgrid(lats, longs, indexing="ij")
+    return lat_grid.ravel(), long_grid.ravel()
+
+def encode_png(rgba) -> bytes:
+    """
+    Minimal RGBA PNG encoder (zlib only).
+    """
+    h, w, _ = rgba.shape
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), rgba.reshape(h, w * 4)]).tobytes() # Filter type 0 per row
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)) + \
+        chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+def bilinear_upsample(grid, size: int):
+    """
+    Upsamples an (n x n) node grid spanning the tile edge to edge to (size x size) pixel centres.
+    """
+    n = grid.shape[0]
+    pos = (np.arange(size) + 0.5) / size * (n - 1)
+    i0 = np.minimum(pos.astype(np.int64), n - 2)
+    f = pos - i0
+    rows = grid[i0] * (1 - f)[:, None] + grid[i0 + 1] * f[:, None]
+    return rows[:, i0] * (1 - f)[None, :] + rows[:, i0 + 1] * f[None, :]
+
+class HeatmapSources:
+    def __init__(self, lats, longs, values):
+        self.values = np.asarray(values, dtype=float)
+        self.tree = cKDTree(to_unit_vectors(lats, longs)) if len(self.values) else None
+        # Colour scale from the sources' robust range, shared by every tile of this set
+        if len(self.values):
+            self.low, self.high = np.percentile(self.values, [2, 98])
+        else:
+            self.low, self.high = 0.0, 1.0
+        if self.high <= self.low:
+            self.high = self.low + 1.0
+
+    def interpolate(self, lats, longs, max_chord: float):
+        """
+        IDW numerator, denominator and nearest distance at the given points.
+        """
+        d, idx = self.tree.query(to_unit_vectors(lats, longs), k=min(K_NEIGHBORS, len(self.values)), distance_upper_bound=max_chord)
+        if d.ndim == 1:
+            d, idx = d[:, None], idx[:, None]
+        found = np.isfinite(d)
+        w = np.where(found, 1.0 / np.maximum(d, 1e-9) ** POWER, 0.0)
+        v = self.values[np.where(found, idx, 0)]
+        return (w * v).sum(axis=1), w.sum(axis=1), np.where(found[:, 0], d[:, 0], max_chord)
+
+class HeatmapService:
+    def __init__(self):
+        self._sources = {} # type -> (bucket, version, HeatmapSources)
+        self._versions = {} # type -> [latest version, version served, when it started being served]
+        self._tiles = OrderedDict() # (type, z, x, y, bucket, version, fmt) -> bytes
+        self._lock = threading.Lock()
+
+    def invalidate(self, type_cat: str):
+        # New data for this type: tiles are re-rendered once MIN_REFRESH_SECONDS have passed
+        with self._lock:
+            self._versions.setdefault(type_cat, [0, 0, 0.0])[0] += 1
+
+    def _serving_version(self, type_cat: str) -> int:
+        state = self._versions.setdefault(type_cat, [0, 0, 0.0])
+        now = time.time()
+        if state[0] != state[1] and now - state[2] >= MIN_REFRESH_SECONDS:
+            state[1], state[2] = state[0], now
+        return state[1]
+
+    def _load_sources(self, db, type_cat: str, bucket: int, version: int):
+        with self._lock:
+            cached = self._sources.get(type_cat)
+        if cached and cached[0] == bucket and cached[1] == version:
+            return cached[2]
+
+        since = datetime.now() - timedelta(hours=WINDOW_HOURS)
+        rows = db.execute(
+            select(models.Observation.lat, models.Observation.long, models.Observation.value).where(
+                models.Observation.type == type_cat,
+                models.Observation.is_valid == True,
+                models.Observation.timestamp >= since,
+                models.Observation.lat.isnot(None),
+                models.Observation.long.isnot(None),
+                models.Observation.value.isnot(None)
+            )
+        ).all()
+        data = np.array(rows, dtype=float).reshape(-1, 3)
+        sources = HeatmapSources(data[:, 0], data[:, 1], data[:, 2])
+        with self._lock:
+            self._sources[type_cat] = (bucket, version, sources)
+        return sources
+
+    def render(self, sources: HeatmapSources, z: int, x: int, y: int):
+        """
+        Returns (values, alpha) as (256 x 256) arrays; values are NaN where there is no data.
+        """
+        empty = np.full((TILE_SIZE, TILE_SIZE), np.nan), np.zeros((TILE_SIZE, TILE_SIZE))
+        if sources.tree is None:
+            return empty
+
+        # Search radius: MAX_DISTANCE_KM, widened at low zooms so sparse points stay visible
+        node_km = 2 * math.pi * EARTH_RADIUS_KM / (2 ** z) / (RENDER_SIZE - 1)
+        max_chord = max(MAX_DISTANCE_KM, 2 * node_km) / EARTH_RADIUS_KM
+
+        # Skip tiles with no source within reach of any node
+        lats, longs = tile_coordinates(z, x, y, RENDER_SIZE)
+        center = to_unit_vectors([lats.mean()], [longs.mean()])
+        corner = to_unit_vectors(lats[:1], longs[:1])
+        reach = np.linalg.norm(center - corner) + max_chord
+        if not sources.tree.query_ball_point(center[0], reach, return_length=True):
+            return empty
+
+        num, den, nearest = sources.interpolate(lats, longs, max_chord)
+        shape = (RENDER_SIZE, RENDER_SIZE)
+        num = bilinear_upsample(num.reshape(shape), TILE_SIZE)
+        den = bilinear_upsample(den.reshape(shape), TILE_SIZE)
+        nearest = bilinear_upsample(nearest.reshape(shape), TILE_SIZE)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.where(den > 0, num / den, np.nan)
+        alpha = np.where(den > 0, 200 * np.sqrt(np.clip(1 - nearest / max_chord, 0, 1)), 0)
+        return values, alpha
+
+    def colorize(self, sources: HeatmapSources, values, alpha):
+        t = np.clip((np.nan_to_num(values, nan=sources.low) - sources.low) / (sources.high - sources.low), 0, 1)
+        pos = t * (len(COLOR_STOPS) - 1)
+        i0 = np.minimum(pos.astype(np.int64), len(COLOR_STOPS) - 2)
+        f = (pos - i0)[..., None]
+        rgb = COLOR_STOPS[i0] * (1 - f) + COLOR_STOPS[i0 + 1] * f
+        return np.dstack([rgb, alpha]).astype(np.uint8)
+
+    def get_tile(self, db, type_cat: str, z: int, x: int, y: int, fmt: str = "png"):
+        """
+        Returns (bytes, media_type). fmt "png" is a coloured RGBA tile; "array" is the raw
+        interpolated values as little-endian float16 (NaN = no data), row-major from the top.
+        Raises ValueError for tiles outside the zoom level or an unknown format.
+        """
+        if fmt not in ("png", "array"):
+            raise ValueError("format must be 'png' or 'array'")
+        if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError("Tile out of range")
+
+        bucket = int(time.time() // BUCKET_SECONDS)
+        with self._lock:
+            version = self._serving_version(type_cat)
+            key = (type_cat, z, x, y, bucket, version, fmt)
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key], self.media_type(fmt)
+
+        sources = self._load_sources(db, type_cat, bucket, version)
+        values, alpha = self.render(sources, z, x, y)
+        if fmt == "png":
+            data = encode_png(self.colorize(sources, values, alpha))
+        else:
+            data = values.astype("<f2").tobytes()
+
+        with self._lock:
+            self._tiles[key] = data
+            while len(self._tiles) > TILE_CACHE_SIZE:
+                self._tiles.popitem(last=False)
+        return data, self.media_type(fmt)
+
+    @staticmethod
+    def media_type(fmt: str) -> str:
+        return "image/png" if fmt == "png" else "application/octet-stream"
+
+heatmap_service = HeatmapService()
@@ -1,19 +1,41 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Query, Response, Header
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
 import os
-import models, schemas, ml_service, extraction_service, ai_agent_service, news_service
+import models, schemas, ml_service, validation_service, extraction_service, ai_agent_service, news_service, rollups, metrics
 from models import SessionLocal, engine, Observation
 from livekit import api
 from forecast_service import forecast_service
+from forecast_engine import forecast_engine
+from series_service import series_service
+from heatmap_service import heatmap_service
+from dedup_index import dedup_index, origin_of, DEDUP_MODE
 from geocoding_service import geocoder
+from profiler import profiler, admin_token_valid, RequestProfilerMiddleware, REQUEST_PROFILING
 
 # Initialize DB
 models.Base.metadata.create_all(bind=engine)
+# create_all only builds indexes together with new tables; add any missing ones to existing DBs
+for index in models.Observation.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
 print(f"Startup - Observation columns: {models.Observation.__table__.columns.keys()}")
 
+# Hourly/daily aggregates per (type, cell), maintained on every flush (see rollups.py)
+rollups.install(SessionLocal)
+with SessionLocal() as _db:
+    rollups.ensure_built(_db)
+    # Recent rows for near-duplicate detection at ingest (see dedup_index.py)
+    print(f"Dedup index loaded with {dedup_index.rebuild(_db)} recent observations")
+    # Recent validated rows, the local reference for check_live_data (see validation_service.py)
+    validation_service.validator.local_validator.rebuild(_db)
+
+# Hourly batch job that refits the seasonal forecasts (see forecast_engine.py)
+if os.getenv("FORECAST_SCHEDULER_ENABLED", "1") == "1":
+    forecast_engine.start_scheduler()
+
 app = FastAPI()
 
 # CORS
@@ -24,6 +46,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+if REQUEST_PROFILING:
+    app.add_middleware(RequestProfilerMiddleware) # Opt-in "X-Profile: 1" header (see profiler.py)
 
 # Dependency
 def get_db():
@@ -33,26 +58,59 @@ def get_db():
     finally:
         db.close()
 
+def _type_label(type_cat: str) -> str:
+    # Metric label for a user-supplied category, bounded to the known ones
+    type_cat = (type_cat or "").lower()
+    return type_cat if type_cat in validation_service.validator.standards else "other"
+
 @app.post("/api/observe", response_model=schemas.Observation)
 def create_observation(observation: schemas.ObservationCreate, db: Session = Depends(get_db)):
+    type_label = _type_label(observation.type)
     try:
         # Expert status is now trust-based for this session
         is_expert_verified = observation.is_expert
-        
-        # ML & World Geo Validation
-        is_valid, validation_report, needs_review = ml_service.validate_observation(
-            observation.value, 
-            observation.lat, 
-            observation.long,
-            type_cat=observation.type,
-            details=observation.details,
-            is_expert=observation.is_expert
-        )
-        
-        # Get location name if not provided
-        location_name = observation.location_name
-        if not location_name:
-            location_name = geocoder.get_location_name(observation.lat, observation.long)
+
+        # Near-duplicate of a recent submission by the same sender (client retries, double taps)?
+        # Only readings sent under a device or client id are checked (see dedup_index.py)
+        duplicate_of = None
+        origin = origin_of(observation.details)
+        if DEDUP_MODE != "off":
+            duplicate_of = dedup_index.find(observation.type, observation.value, observation.lat, observation.long, origin=origin)
+        original = None
+        if duplicate_of is not None:
+            original = db.query(models.Observation).filter(models.Observation.id == duplicate_of).first()
+            if original is None:
+                duplicate_of = None # Deleted since it was indexed: treat as a new reading
+        if original is not None and DEDUP_MODE == "merge":
+            metrics.OBSERVATIONS.labels(type_label, "duplicate_merged").inc()
+            return original # Idempotent: no second row, no second round of validation
+
+        if original is not None:
+            # Flag mode: keep the row for audit, but out of retraining, rollups and exports.
+            # The original's verdict is copied instead of validating again, so a duplicate makes
+            # no external calls and is not counted in drift or shadow statistics.
+            is_valid, needs_review = False, False
+            validation_report = {
+                **(original.validation_report or {}),
+                "duplicate_of": duplicate_of,
+                "original_status": original.validation_status
+            }
+            location_name = observation.location_name or original.location_name
+        else:
+            # ML & World Geo Validation
+            is_valid, validation_report, needs_review = ml_service.validate_observation(
+                observation.value, 
+                observation.lat, 
+                observation.long,
+                type_cat=observation.type,
+                details=observation.details,
+                is_expert=observation.is_expert
+            )
+            
+            # Get location name if not provided
+            location_name = observation.location_name
+            if not location_name:
+                location_name = geocoder.get_location_name(observation.lat, observation.long)
 
         # Create DB object
         db_observation = models.Observation(
@@ -64,18 +122,27 @@ def create_observation(observation: schemas.ObservationCreate, db: Session = Dep
             is_valid=is_valid,
             details=observation.details,
             validation_report=validation_report,
-            outlier_score=validation_report.get("reliability_score", 0.0),
+            outlier_score=original.outlier_score if original is not None else validation_report.get("reliability_score", 0.0),
             needs_review=needs_review,
-            validation_status="pending" if needs_review else ("auto" if is_valid else "rejected"),
+            validation_status="duplicate" if original is not None else ("pending" if needs_review else ("auto" if is_valid else "rejected")),
             is_expert=observation.is_expert
         )
         db.add(db_observation)
-        db.commit()
+        with metrics.DB_COMMIT.labels("observe").time():
+            db.commit()
         db.refresh(db_observation)
+        outcome = "duplicate" if duplicate_of is not None else ("review" if needs_review else ("valid" if is_valid else "rejected"))
+        metrics.OBSERVATIONS.labels(type_label, outcome).inc()
+        if duplicate_of is None:
+            dedup_index.add(db_observation.type, db_observation.value, db_observation.lat, db_observation.long, db_observation.timestamp, db_observation.id, db_observation.source, origin)
+        if db_observation.is_valid:
+            heatmap_service.invalidate(observation.type)
+            validation_service.validator.local_validator.add(db_observation.type, db_observation.value, db_observation.lat, db_observation.long, db_observation.timestamp)
         return db_observation
     except Exception as e:
         import traceback
         print(f"Error in create_observation: {e}")
+        metrics.OBSERVATIONS.labels(type_label, "error").inc()
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -104,17 +171,99 @@ def validate_observation_manual(observation_id: int, is_valid: bool, db: Session
     # If human validates it, we assume it's true ground truth now.
     obs.source = "human_review" 
     db.commit()
+    heatmap_service.invalidate(obs.type)
+    if is_valid:
+        validation_service.validator.local_validator.add(obs.type, obs.value, obs.lat, obs.long, obs.timestamp)
     return {"message": "Observation updated and human verified"}
 
-@app.post("/api/ml/retrain")
-def retrain_ml(db: Session = Depends(get_db)):
-    # Fetch all VALID observations to retrain the model on what is "normal"
-    valid_obs = db.query(models.Observation).filter(models.Observation.is_valid == True).all()
-    if not valid_obs:
+@app.post("/api/ml/retrain", status_code=202)
+def retrain_ml(shadow: bool = False, db: Session = Depends(get_db)):
+    # Retrain on VALID observations to learn what is "normal"
+    if not db.query(models.Observation.id).filter(models.Observation.is_valid == True).first():
         return {"message": "No valid data to retrain on"}
     
-    ml_service.retrain_models(valid_obs)
-    return {"message": f"Model retrained on {len(valid_obs)} samples"}
+    # The worker process streams a bounded, stratified sample from the DB, fits the global
+    # model and per-region shards, and the new models are swapped in when ready.
+    # With ?shadow=true the new global model is only evaluated in shadow mode (see /api/ml/shadow)
+    job = ml_service.submit_retrain(shadow_only=shadow)
+    return {"message": "Retrain started", **job}
+
+@app.get("/api/ml/retrain/{job_id}")
+def retrain_status(job_id: str):
+    job = ml_service.get_retrain_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Retrain job not found")
+    return job
+
+@app.get("/api/ml/models")
+def list_ml_models():
+    # Versioned model artifacts: training-set hash, size and fit time per version
+    from model_registry import registry
+    return {
+        "loaded_version": ml_service.detector.version,
+        "shards": ml_service.shards.stats(),
+        "models": registry.list_models()
+    }
+
+@app.get("/api/ml/shadow")
+def shadow_status(recent: int = 50):
+    # Disagreement rates and score deltas of the shadow model vs. the serving global model, per type
+    return ml_service.shadow.summary(recent)
+
+@app.post("/api/ml/shadow")
+def start_shadow(version: str):
+    if not ml_service.shadow.start(version):
+        raise HTTPException(status_code=404, detail="Model version not found")
+    return ml_service.shadow.summary(0)
+
+@app.delete("/api/ml/shadow")
+def stop_shadow():
+    ml_service.shadow.stop()
+    return {"message": "Shadow evaluation stopped"}
+
+@app.post("/api/ml/shadow/promote")
+def promote_shadow():
+    version = ml_service.shadow.promote()
+    if not version:
+        raise HTTPException(status_code=400, detail="No shadow model to promote")
+    return {"message": "Shadow model promoted", "version": version}
+
+@app.get("/api/ml/monitoring")
+def ml_monitoring():
+    # Rolling feature stats per type and PSI drift vs. the training set (scoring latency is on /metrics)
+    from ml_monitoring import monitor
+    return monitor.report(ml_service.detector.training_meta, ml_service.detector.version)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    # Prometheus text format; values are per worker process (see metrics.py)
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.post("/api/admin/profile")
+def profile_worker(seconds: float = 5.0, interval_ms: float = 5.0, x_admin_token: str = Header(None)):
+    """
+    Samples this worker's threads for `seconds` and returns collapsed stacks
+    (flamegraph.pl / speedscope input). Requires the X-Admin-Token header.
+    """
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    try:
+        collapsed = profiler.profile(seconds, interval_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(content=collapsed, media_type="text/plain")
+
+@app.get("/api/admin/profile/requests/{profile_id}")
+def get_request_profile(profile_id: str, x_admin_token: str = Header(None)):
+    # Profile of a single request sent with "X-Profile: 1" (id from its X-Profile-Id header)
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    collapsed = profiler.get_request_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=collapsed, media_type="text/plain")
 
 @app.post("/api/scrape")
 def trigger_scrape():
@@ -293,9 +442,68 @@ def read_news(category: str = None):
     intelligence = ai_agent_service.summarize_environmental_news(category or "all", raw_news)
     return intelligence
 
+@app.post("/api/v1/news/ingest")
+def ingest_news(db: Session = Depends(get_db)):
+    """
+    Incrementally pulls configured news feeds (NEWS_FEEDS, NEWS_API_KEY or the local fixture).
+    Only articles newer than each feed's cursor are processed; syndicated copies are dropped.
+    """
+    from news_ingestion import news_ingestion
+    return {"feeds": news_ingestion.run(db)}
+
 @app.get("/api/v1/forecast/health")
-def get_health_forecast(type: str = "air", db: Session = Depends(get_db)):
-    return forecast_service.get_forecast(db, type)
+def get_health_forecast(type: str = "air", lat: float = None, long: float = None, region: str = None, db: Session = Depends(get_db)):
+    # Forecast for the grid cell at lat/long or a region id from /api/v1/forecast/regions (default: global)
+    try:
+        return forecast_service.get_forecast(db, type, lat=lat, long=long, region=region)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid region id")
+
+@app.get("/api/v1/forecast/regions")
+def get_forecast_regions(type: str = "air", db: Session = Depends(get_db)):
+    return forecast_service.list_regions(db, type)
+
+@app.post("/api/v1/forecast/refresh")
+def refresh_forecasts(db: Session = Depends(get_db)):
+    # Runs the batch forecast job now instead of waiting for the scheduler
+    run = forecast_engine.run(db)
+    forecast_service.invalidate()
+    return run
+
+@app.get("/api/v1/series")
+def get_series(
+    type: str = "air",
+    region: str = None,
+    start: datetime = Query(None, alias="from"),
+    end: datetime = Query(None, alias="to"),
+    points: int = 500,
+    method: str = "lttb",
+    db: Session = Depends(get_db)):
+    """
+    Chart-ready series: at most `points` points (LTTB or min/max buckets) for any time range.
+    Example: GET /api/v1/series?type=air&region=0.5:205:520&from=2026-01-01T00:00:00&points=300
+    """
+    try:
+        return series_service.get_series(db, type, region=region, start=start, end=end, points=points, method=method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/heatmap/{type}/{z}/{x}/{y}")
+def get_heatmap_tile(type: str, z: int, x: int, y: str, format: str = "png", db: Session = Depends(get_db)):
+    """
+    IDW-interpolated heatmap tile of recent valid observations, e.g. for a Leaflet TileLayer:
+    /api/v1/heatmap/air/{z}/{x}/{y}.png  (?format=array for raw float16 values)
+    """
+    try:
+        data, media_type = heatmap_service.get_tile(db, type, z, x, int(y.split(".")[0]), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=data, media_type=media_type, headers={"Cache-Control": "public, max-age=60"})
+
+@app.post("/api/v1/rollups/rebuild")
+def rebuild_rollups(db: Session = Depends(get_db)):
+    # Recomputes the hourly/daily rollups from scratch (e.g. after bulk imports or direct SQL edits)
+    return rollups.rebuild(db)
 
 @app.get("/api/v1/acoustic/recordings")
 def get_acoustic_recordings(db: Session = Depends(get_db)):
@@ -0,0 +1,297 @@
+import os
+import time
+import bisect
+import threading
+from threading import get_ident
+
+# In-process counters, gauges and histograms, rendered in the Prometheus text format at /metrics.
+# Label children are created once and cached, so a hot-path update is two dict lookups and
+# an add (see benchmarks/bench_metrics_overhead.py). Every worker process keeps its own
+# values; Prometheus scrapes each worker, or sums them, as usual for multi-process deployments.
+# The scraper runs as a separate short-lived process: it writes its own registry to
+# SCRAPER_METRICS_FILE when a crawl ends, and /metrics appends that file.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Default next to this module, so the scraper and the API agree whatever their working directory
+SCRAPER_METRICS_FILE = os.getenv(
+    "SCRAPER_METRICS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper_metrics.prom")
+)
+
+# Upper bounds in seconds, from sub-millisecond local checks to slow external calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+# Hot-path updates are lock-free: each thread adds into its own slot (keyed by thread id) and
+# scrapes sum the slots. Only the owning thread writes a slot, so no update is lost under the GIL.
+
+class _CounterChild:
+    def __init__(self):
+        self._slots = {} # thread id -> [value]
+
+    def inc(self, amount: float = 1.0):
+        slot = self._slots.get(get_ident())
+        if slot is None:
+            slot = self._slots.setdefault(get_ident(), [0.0])
+        slot[0] += amount
+
+    @property
+    def value(self):
+        return sum(slot[0] for slot in list(self._slots.values()))
+
+class _GaugeChild:
+    # Gauges can be set, so they keep a single value behind a lock
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._slots = {} # thread id -> non-cumulative bucket counts (last: +Inf) followed by the sum
+
+    def observe(self, value: float):
+        slot = self._slots.get(get_ident())
+        if slot is None:
+            slot = self._slots.setdefault(get_ident(), [0] * (len(self.buckets) + 1) + [0.0])
+        slot[bisect.bisect_left(self.buckets, value)] += 1
+        slot[-1] += value
+
+    def snapshot(self):
+        """
+        (bucket counts, sum) summed over threads.
+        """
+        totals = [0] * (len(self.buckets) + 2)
+        for slot in list(self._slots.values()):
+            for i, v in enumerate(slot):
+                totals[i] += v
+        return totals[:-1], totals[-1]
+
+    def time(self):
+        return _Timer(self)
+
+class _Timer:
+    # Plain context manager class: cheaper to enter and exit than a @contextmanager generator
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.start)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self):
+        """
+        (suffix, label names, label values, value) tuples for the text format.
+        """
+        for values, child in list(self._children.items()):
+            yield "", self.labelnames, values, child.value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        names = self.labelnames + ("le",)
+        for values, child in list(self._children.items()):
+            counts, total_sum = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", names, values + (_format_value(bound),), cumulative
+            yield "_count", self.labelnames, values, cumulative
+            yield "_sum", self.labelnames, values, total_sum
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, names, values, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_label_str(names, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        # Written to a temp file and renamed, so a concurrent /metrics never reads half a file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+REGISTRY = Registry()
+
+class timed:
+    """
+    Observes the block's duration under labels + (outcome,), outcome "ok" or "error".
+    """
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, *labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = "ok" if exc_type is None else "error"
+        self.histogram.labels(*self.labels, outcome).observe(time.perf_counter() - self.start)
+
+def render() -> str:
+    """
+    The API worker's metrics plus those of the last scraper run, if any.
+    """
+    text = REGISTRY.render()
+    try:
+        with open(SCRAPER_METRICS_FILE, encoding="utf-8") as f:
+            text += f.read()
+    except FileNotFoundError:
+        pass
+    return text
+
+# --- API ---
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by method, route template and status code.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by method and route template.", ("method", "route"))
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served.")
+OBSERVATIONS = Counter("observations_ingested_total", "Submitted observations by type and outcome (valid, review, rejected, duplicate, duplicate_merged, error).", ("type", "outcome"))
+DB_COMMIT = Histogram("db_commit_duration_seconds", "Database commit latency by write path.", ("path",))
+
+# --- Validation and ML ---
+VALIDATION_STAGE = Histogram("validation_stage_duration_seconds", "Time spent in each validation pipeline stage.", ("stage",))
+VALIDATION_REJECTIONS = Counter("validation_rejections_total", "Observations rejected on the spot, by pipeline stage.", ("stage",))
+ML_SCORING = Histogram("ml_scoring_duration_seconds", "Outlier ensemble scoring latency per model (global detector or shard) and ensemble member.", ("model", "member"),
+                       buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+EXTERNAL_HTTP = Histogram("external_http_duration_seconds", "Outbound HTTP calls to validation data sources.", ("service", "outcome"))
+LLM_REQUESTS = Histogram("llm_request_duration_seconds", "LLM completion calls by operation.", ("operation", "outcome"))
+
+# --- Scraper (separate process, own registry; see SCRAPER_METRICS_FILE) ---
+SCRAPER_REGISTRY = Registry()
+SCRAPER_ITEMS = Counter("scraper_items_total", "Scraped items by spider and outcome (stored, duplicate, duplicate_skipped).", ("spider", "outcome"), registry=SCRAPER_REGISTRY)
+SCRAPER_DB_COMMIT = Histogram("scraper_db_commit_duration_seconds", "Scraper pipeline commit latency.", ("spider",), registry=SCRAPER_REGISTRY)
+SCRAPER_LAST_RUN = Gauge("scraper_last_run_timestamp_seconds", "Unix time the last crawl finished.", ("spider",), registry=SCRAPER_REGISTRY)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route request counts and latency. Routes are labelled
+    by their path template (e.g. /api/observations/{observation_id}/validate) to keep label
+    cardinality bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.labels(method, path, str(status[0])).inc()
+            HTTP_LATENCY.labels(method, path).observe(elapsed)
@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import deque
+import numpy as np
+
+# Input drift monitoring for the outlier ensemble. Scoring latency is exported per model and
+# ensemble member as metrics.ML_SCORING (ml_scoring_duration_seconds on /metrics).
+# - Features: rolling window of the last ML_DRIFT_WINDOW observations per type, with mean and
+#   variance kept up to date by Welford updates (add the new row, remove the evicted one).
+# - Drift: population stability index (PSI) of each feature in the window against the
+#   decile snapshot taken from the training set at fit time (see feature_snapshot).
+# Everything is in-process and per worker; the report is what /api/ml/monitoring returns.
+
+FEATURES = ("value", "lat", "long")
+DRIFT_WINDOW = int(os.getenv("ML_DRIFT_WINDOW", 5000))
+SNAPSHOT_BINS = 10
+MIN_DRIFT_SAMPLES = 100 # PSI over fewer rows is mostly noise
+
+# Usual PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = float(os.getenv("ML_PSI_RETRAIN_THRESHOLD", 0.25))
+
+def feature_snapshot(X, bins: int = SNAPSHOT_BINS):
+    """
+    Quantile bin edges and expected proportions per feature of a training matrix.
+    Small enough to be stored in the model's registry metadata.
+    """
+    X = np.asarray(X, dtype=float)
+    snapshot = {"n_samples": int(len(X))}
+    for i, name in enumerate(FEATURES):
+        # Interior decile edges; duplicates collapse for discrete or constant features
+        edges = np.unique(np.quantile(X[:, i], np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, X[:, i], side="right"), minlength=len(edges) + 1)
+        snapshot[name] = {
+            "edges": [round(float(e), 6) for e in edges],
+            "expected": [round(float(p), 6) for p in counts / max(len(X), 1)]
+        }
+    return snapshot
+
+def psi(expected, actual, eps: float = 1e-4) -> float:
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+class RollingFeatureStats:
+    """
+    Mean and variance of (value, lat, long) over the last `window` rows.
+    """
+    def __init__(self, window: int = DRIFT_WINDOW):
+        self.rows = deque(maxlen=window)
+        self.seen = 0
+        self.mean = np.zeros(len(FEATURES))
+        self.m2 = np.zeros(len(FEATURES))
+
+    def add(self, row):
+        row = np.asarray(row, dtype=float)
+        if len(self.rows) == self.rows.maxlen:
+            self._remove(self.rows[0]) # The deque drops it on append below
+        self.rows.append(row)
+        self.seen += 1
+        n = len(self.rows)
+        delta = row - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (row - self.mean)
+
+    def _remove(self, row):
+        # Inverse Welford update for the row leaving the window
+        n = len(self.rows)
+        if n <= 1:
+            self.mean[:] = 0.0
+            self.m2[:] = 0.0
+            return
+        delta = row - self.mean
+        self.mean -= delta / (n - 1)
+        self.m2 -= delta * (row - self.mean)
+        np.maximum(self.m2, 0.0, out=self.m2) # Guard against rounding below zero
+
+    def summary(self) -> dict:
+        n = len(self.rows)
+        var = self.m2 / (n - 1) if n > 1 else np.full(len(FEATURES), np.nan)
+        return {
+            "window": n,
+            "seen": self.seen,
+            **{name: {"mean": round(float(self.mean[i]), 4), "var": round(float(var[i]), 4)} for i, name in enumerate(FEATURES)}
+        }
+
+    def drift(self, snapshot: dict) -> dict:
+        """
+        PSI per feature of the current window against a feature_snapshot().
+        """
+        if len(self.rows) < MIN_DRIFT_SAMPLES:
+            return {"status": "insufficient_data", "window": len(self.rows)}
+        X = np.array(self.rows)
+        scores = {}
+        for i, name in enumerate(FEATURES):
+            edges = np.asarray(snapshot[name]["edges"])
+            counts = np.bincount(np.searchsorted(edges, X[:, i], side="right"), minlength=len(edges) + 1)
+            scores[name] = round(psi(snapshot[name]["expected"], counts / len(X)), 4)
+        worst = max(scores.values())
+        status = "significant" if worst > PSI_SIGNIFICANT else "moderate" if worst > PSI_MODERATE else "stable"
+        return {"status": status, "window": len(X), "psi": scores, "retrain_recommended": worst > PSI_SIGNIFICANT}
+
+class ScoringMonitor:
+    def __init__(self, window: int = DRIFT_WINDOW):
+        self.window = window
+        self.features = {} # type -> RollingFeatureStats
+        self._lock = threading.Lock()
+
+    def observe(self, type_cat: str, value: float, lat: float, long: float):
+        type_cat = (type_cat or "").lower()
+        with self._lock:
+            stats = self.features.get(type_cat)
+            if stats is None:
+                stats = self.features[type_cat] = RollingFeatureStats(self.window)
+            stats.add((value, lat, long))
+
+    def report(self, training_meta: dict = None, model_version: str = None) -> dict:
+        """
+        Rolling feature statistics and drift against the given model's training snapshot.
+        Types with their own snapshot are compared against it, the rest against the whole training set.
+        """
+        snapshots = (training_meta or {}).get("feature_snapshot") or {}
+        with self._lock:
+            drift = {}
+            for type_cat, stats in self.features.items():
+                snapshot = snapshots.get(type_cat) or snapshots.get("*")
+                if snapshot is None:
+                    drift[type_cat] = {"status": "no_training_snapshot"}
+                else:
+                    drift[type_cat] = {**stats.drift(snapshot), "baseline": type_cat if type_cat in snapshots else "*"}
+            return {
+                "model_version": model_version or (training_meta or {}).get("version"),
+                "features": {type_cat: stats.summary() for type_cat, stats in self.features.items()},
+                "drift": drift,
+                "retrain_recommended": any(d.get("retrain_recommended") for d in drift.values())
+            }
+
+monitor = ScoringMonitor()
@@ -1,16 +1,161 @@
 from sklearn.ensemble import IsolationForest
 from sklearn.neighbors import LocalOutlierFactor
 from sklearn.svm import OneClassSVM
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.kernel_approximation import Nystroem
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 import joblib
 import os
+import re
+import glob
+import time
+import uuid
+import queue
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict, deque
+from geo_cells import cell_id, cell_ids
 import validation_service
+from model_registry import registry, training_hash, file_hash
+from reliability_grid import ReliabilityGrid, GRID_ENABLED
+from ml_monitoring import monitor, feature_snapshot, MIN_DRIFT_SAMPLES
+import metrics
 
-# Persistent model storage could be added here (e.g., joblib.dump)
+# Fitted models are persisted as versioned artifacts (see model_registry.py), so workers
+# load the active version at startup instead of re-training the cold-start ensemble.
+MODEL_NAME = "outlier_ensemble"
+TRAINING_DATA_PATH = "training_data.json"
+REGISTRY_POLL_SECONDS = float(os.getenv("ML_REGISTRY_POLL_SECONDS", 30)) # How often workers look for newer versions
+
+# One-Class SVM member: "rbf" (exact kernel SVM, super-linear fit time), "scalable"
+# (Nystroem kernel approximation + linear SGD one-class SVM, linear fit time) or
+# "auto" (scalable once the training set exceeds ML_SCALABLE_SVM_THRESHOLD rows).
+SVM_MODE = os.getenv("ML_SVM_MODE", "auto")
+SCALABLE_SVM_THRESHOLD = int(os.getenv("ML_SCALABLE_SVM_THRESHOLD", 50000))
+NYSTROEM_COMPONENTS = int(os.getenv("ML_NYSTROEM_COMPONENTS", 300))
+
+class ScalableOneClassSVM:
+    """
+    Drop-in for OneClassSVM(kernel="rbf") on large training sets.
+    Maps inputs through a Nystroem approximation of the same RBF kernel and fits a linear
+    one-class SVM with SGD, so fitting is linear in the number of samples.
+    Decision values are rescaled by nu * n_samples to match libsvm's (unnormalized) scale,
+    which keeps the reliability sigmoid comparable between the two modes.
+    """
+    def __init__(self, nu=0.1, gamma=0.1, n_components=NYSTROEM_COMPONENTS, random_state=42):
+        self.nu = nu
+        self.gamma = gamma
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit(self, X):
+        n_components = min(self.n_components, len(X))
+        self.feature_map_ = Nystroem(kernel="rbf", gamma=self.gamma, n_components=n_components, random_state=self.random_state)
+        self.model_ = SGDOneClassSVM(nu=self.nu, max_iter=20, tol=None, random_state=self.random_state)
+        self.model_.fit(self.feature_map_.fit_transform(X))
+        self.score_scale_ = self.nu * len(X)
+        return self
+
+    def decision_function(self, X):
+        return self.model_.decision_function(self.feature_map_.transform(X)) * self.score_scale_
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) <= 0, -1, 1)
+
+def make_one_class_svm(n_samples: int, mode: str = None):
+    mode = mode or SVM_MODE
+    if mode == "auto":
+        mode = "scalable" if n_samples > SCALABLE_SVM_THRESHOLD else "rbf"
+    if mode == "scalable":
+        return ScalableOneClassSVM(nu=0.1, gamma=0.1)
+    return OneClassSVM(nu=0.1, kernel="rbf", gamma=0.1)
+
+# Cold-start baseline: uniform synthetic data over the main service areas plus a Gaussian
+# cluster around every real AQICN point in training_data.json. Generated in one vectorized
+# pass with a seeded Generator, so every worker builds the same model, and cached on disk
+# keyed by the hash of training_data.json.
+COLD_START_SEED = int(os.getenv("ML_COLD_START_SEED", 42))
+COLD_START_MAX_ROWS = int(os.getenv("ML_COLD_START_MAX_ROWS", 200000))
+COLD_START_REGIONS = [
+    # (value, lat, long) lower and upper bounds
+    ([0, 8, 68], [150, 38, 98]), # India (focus on TN)
+    ([0, 25, -125], [150, 50, -65]) # USA (broad coverage)
+]
+N_PER_REGION = 1000
+N_PER_CLUSTER = 500
+
+def _real_training_points(path: str):
+    """
+    (value, lat, long) rows with a positive value, one per city: points within ~1 km
+    (coordinates rounded to 0.01 deg) are merged and their values averaged.
+    """
+    import json
+    if not os.path.exists(path):
+        return np.empty((0, 3))
+    with open(path, "r") as f:
+        real_data = json.load(f)
+    print(f"Loading {len(real_data)} real data points from AQICN...")
+
+    points = np.array([[p.get("value", 0), p.get("lat", 0), p.get("long", 0)] for p in real_data], dtype=float).reshape(-1, 3)
+    points = points[points[:, 0] > 0]
+    if not len(points):
+        return points
+    cities, inverse = np.unique(np.round(points[:, 1:], 2), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    values = np.bincount(inverse, weights=points[:, 0]) / np.bincount(inverse)
+    return np.column_stack([values, cities])
+
+def cold_start_training_set(path: str = TRAINING_DATA_PATH, seed: int = COLD_START_SEED, max_rows: int = COLD_START_MAX_ROWS):
+    data_hash = file_hash(path) or "none"
+    cache_path = os.path.join(registry.artifact_dir, f"cold_start_{data_hash[:16]}_{seed}_{max_rows}.npy")
+    if os.path.exists(cache_path):
+        try:
+            return np.load(cache_path)
+        except Exception as e:
+            print(f"Error reading cold-start cache: {e}")
+
+    rng = np.random.default_rng(seed)
+
+    # 1. Broad Baseline: Generate synthetic data for general regions
+    parts = [rng.uniform(low, high, (N_PER_REGION, 3)) for low, high in COLD_START_REGIONS]
+
+    # 2. Real Data Augmentation: a cluster around each real point reinforces it as "normal"
+    # Value variance: +/- 10%, Location variance: +/- 0.5 deg
+    try:
+        cities = _real_training_points(path)
+    except Exception as e:
+        print(f"Error loading real training data: {e}")
+        cities = np.empty((0, 3))
+    budget = max(max_rows - N_PER_REGION * len(COLD_START_REGIONS), 0)
+    if len(cities) and budget:
+        if len(cities) > budget:
+            cities = cities[rng.choice(len(cities), budget, replace=False)]
+        n_cluster = min(N_PER_CLUSTER, budget // len(cities))
+        centers = np.repeat(cities, n_cluster, axis=0)
+        scale = np.column_stack([centers[:, 0] * 0.1, np.full(len(centers), 0.5), np.full(len(centers), 0.5)])
+        parts.append(rng.normal(centers, scale))
+
+    X_train = np.vstack(parts)
+    try:
+        os.makedirs(registry.artifact_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(registry.artifact_dir, "cold_start_*.npy")):
+            os.remove(old) # Built from an older training_data.json or other settings
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, X_train)
+        os.replace(tmp, cache_path)
+    except Exception as e:
+        print(f"Error writing cold-start cache: {e}")
+    return X_train
 
 class AdvancedOutlierDetector:
-    def __init__(self):
+    def __init__(self, load_persisted: bool = True, svm_mode: str = None, cold_start: bool = True, name: str = MODEL_NAME):
+        self.name = name # Registry name: the global model or a shard (see ShardedDetectorRegistry)
+        self.svm_mode = svm_mode # None -> ML_SVM_MODE
         self.scaler = StandardScaler()
         # Initialize models
         # Contamination: expected proportion of outliers
@@ -20,68 +165,99 @@ class AdvancedOutlierDetector:
         self.oc_svm = OneClassSVM(nu=0.1, kernel="rbf", gamma=0.1)
         
         self.is_fitted = False
-        
-        # Initialize with synthetic data for MVP "cold start"
-        self._initial_fit()
+        self.version = None
+        self.training_meta = {}
+        self.grid = None # Optional ReliabilityGrid for this version (ML_LOOKUP_GRID=1)
 
-    def _initial_fit(self):
-        # 1. Broad Baseline: Generate synthetic data for general regions
-        n_per_region = 1000
-        
-        # Region 1: India (focus on TN)
-        val_in = np.random.uniform(0, 150, (n_per_region, 1))
-        lat_in = np.random.uniform(8, 38, (n_per_region, 1))
-        long_in = np.random.uniform(68, 98, (n_per_region, 1))
-        X_base_in = np.hstack([val_in, lat_in, long_in])
-        
-        # Region 2: USA (broad coverage)
-        val_us = np.random.uniform(0, 150, (n_per_region, 1))
-        lat_us = np.random.uniform(25, 50, (n_per_region, 1))
-        long_us = np.random.uniform(-125, -65, (n_per_region, 1))
-        X_base_us = np.hstack([val_us, lat_us, long_us])
-        
-        X_train_list = [X_base_in, X_base_us]
+        if not load_persisted:
+            if cold_start:
+                self._initial_fit()
+            return
+
+        if self.load():
+            return
+        # No usable artifact: one worker trains the cold-start model, the others wait and load it
+        with registry.exclusive(self.name):
+            if not self.load():
+                # Initialize with synthetic data for MVP "cold start"
+                self._initial_fit()
+                self.save(source="cold_start")
 
-        # 2. Real Data Augmentation: Load scraped AQICN data
+    def load(self, version: str = None) -> bool:
+        """
+        Loads a persisted version (default: the active one), memory-mapped.
+        A cold-start artifact is ignored once training_data.json has changed.
+        """
         try:
-            import json
-            if os.path.exists("training_data.json"):
-                with open("training_data.json", "r") as f:
-                    real_data = json.load(f)
-                
-                print(f"Loading {len(real_data)} real data points from AQICN...")
-                
-                # For each real point, generate a cluster to reinforce this as "normal"
-                for point in real_data:
-                    p_val = point.get("value", 0)
-                    p_lat = point.get("lat", 0)
-                    p_long = point.get("long", 0)
-                    
-                    if p_val > 0:
-                        # Create cluster of 500 points around this real observation
-                        # Value variance: +/- 10%, Location variance: +/- 0.5 deg
-                        n_cluster = 500
-                        c_vals = np.random.normal(p_val, p_val * 0.1, (n_cluster, 1))
-                        c_lats = np.random.normal(p_lat, 0.5, (n_cluster, 1))
-                        c_longs = np.random.normal(p_long, 0.5, (n_cluster, 1))
-                        
-                        X_cluster = np.hstack([c_vals, c_lats, c_longs])
-                        X_train_list.append(X_cluster)
+            payload, meta = registry.load(self.name, version)
         except Exception as e:
-            print(f"Error loading real training data: {e}")
+            print(f"Error loading model artifact: {e}")
+            return False
+        if payload is None:
+            return False
+        if version is None and meta.get("source") == "cold_start" and meta.get("training_data_hash") != file_hash(TRAINING_DATA_PATH):
+            print("Cold-start model is stale (training_data.json changed), re-training.")
+            return False
 
-        # Combine all data
-        X_train = np.vstack(X_train_list)
-        self.fit(X_train)
+        self.scaler = payload["scaler"]
+        self.iso_forest = payload["iso_forest"]
+        self.lof = payload["lof"]
+        self.oc_svm = payload["oc_svm"]
+        self.version = meta["version"]
+        self.training_meta = meta
+        self.is_fitted = True
+        self.grid = ReliabilityGrid.load(registry.path_prefix(self.version)) if GRID_ENABLED and self.name == MODEL_NAME else None
+        print(f"Loaded model {self.version} ({meta.get('n_samples')} samples)")
+        return True
 
-    def fit(self, X):
+    def save(self, source: str = "retrain", activate: bool = True) -> str:
+        """
+        Persists the fitted models as a new version in the registry.
+        """
+        meta = {**self.training_meta, "source": source}
+        if source == "cold_start":
+            meta["training_data_hash"] = file_hash(TRAINING_DATA_PATH)
+        payload = {
+            "scaler": self.scaler,
+            "iso_forest": self.iso_forest,
+            "lof": self.lof,
+            "oc_svm": self.oc_svm
+        }
+        try:
+            self.version = registry.save(self.name, payload, meta, activate=activate)
+        except Exception as e:
+            print(f"Error saving model artifact: {e}")
+            return self.version
+
+        if GRID_ENABLED and self.name == MODEL_NAME:
+            # Regenerated for every new version, so the grid always matches the models.
+            # Global model only: a full grid takes seconds and megabytes per version, and
+            # dozens of shards would add minutes to every retrain for little gain, since
+            # shards only see the traffic of their own cell. Shards are scored exactly.
+            try:
+                self.grid = ReliabilityGrid.build(self)
+                self.grid.save(registry.path_prefix(self.version))
+            except Exception as e:
+                print(f"Error building reliability grid: {e}")
+                self.grid = None
+        return self.version
+
+    def _initial_fit(self):
+        # Initialize with synthetic data for MVP "cold start"
+        self.fit(cold_start_training_set())
+
+    def fit(self, X, types=None):
         """
         Retrain the models on new data X.
         X should be shape (n_samples, n_features) -> [value, lat, long]
+        types (optional, one category per row) adds per-type drift baselines.
+        Returns True if the models were refitted.
         """
         if len(X) < 10:
             print("Not enough data to retrain, skipping.")
-            return
+            return False
+
+        start = time.perf_counter()
 
         # Scale data
         self.scaler.fit(X)
@@ -90,35 +266,56 @@ class AdvancedOutlierDetector:
         # Fit models
         self.iso_forest.fit(X_scaled)
         self.lof.fit(X_scaled)
+        self.oc_svm = make_one_class_svm(len(X), self.svm_mode)
         self.oc_svm.fit(X_scaled)
         
         self.is_fitted = True
+        self.grid = None # Describes the previous models; rebuilt by save()
+        self.training_meta = {
+            "training_hash": training_hash(X),
+            "n_samples": int(len(X)),
+            "svm_mode": "scalable" if isinstance(self.oc_svm, ScalableOneClassSVM) else "rbf",
+            "fit_seconds": round(time.perf_counter() - start, 3),
+            "feature_snapshot": self._feature_snapshots(X, types)
+        }
         print("Models retrained successfully.")
+        return True
 
-    def check_outlier(self, value, lat, long):
+    @staticmethod
+    def _feature_snapshots(X, types=None):
+        # Training distribution baselines for drift monitoring (ml_monitoring.py)
+        X = np.asarray(X, dtype=float)
+        snapshots = {"*": feature_snapshot(X)}
+        if types is not None:
+            types = np.array([(t or "").lower() for t in types], dtype=object)
+            for type_cat in np.unique(types):
+                rows = types == type_cat
+                if rows.sum() >= MIN_DRIFT_SAMPLES:
+                    snapshots[type_cat] = feature_snapshot(X[rows])
+        return snapshots
+
+    def decision_scores(self, X_scaled):
         """
-        Returns (is_outlier, reliability_score)
-        reliability_score: 0.0 to 1.0 (1.0 = highly reliable inlier)
+        One decision_function call per model for the whole batch, each timed into
+        metrics.ML_SCORING under its member label.
+        Returns (score_iso, score_lof, score_svm) arrays; negative = outlier side.
         """
-        if not self.is_fitted:
-            self._initial_fit()
-            
-        features = np.array([[value, lat, long]])
-        features_scaled = self.scaler.transform(features)
-
-        # 1. Binary Predictions
-        pred_iso = 1 if self.iso_forest.predict(features_scaled)[0] == -1 else 0
-        pred_lof = 1 if self.lof.predict(features_scaled)[0] == -1 else 0
-        pred_svm = 1 if self.oc_svm.predict(features_scaled)[0] == -1 else 0
-        votes = pred_iso + pred_lof + pred_svm
-        is_outlier = votes >= 2
+        scores = []
+        for member, model in (("isolation_forest", self.iso_forest), ("lof", self.lof), ("one_class_svm", self.oc_svm)):
+            start = time.perf_counter()
+            scores.append(model.decision_function(X_scaled))
+            metrics.ML_SCORING.labels(self.name, member).observe(time.perf_counter() - start)
+        return tuple(scores)
 
-        # 2. Decision Scores for Reliability
-        # decision_function returns signed distance to hyperplane/threshold
-        # These need normalization.
-        score_iso = self.iso_forest.decision_function(features_scaled)[0]
-        score_svm = self.oc_svm.decision_function(features_scaled)[0]
-        score_lof = self.lof.decision_function(features_scaled)[0]
+    @staticmethod
+    def votes_and_reliability(score_iso, score_lof, score_svm):
+        """
+        Derives both the ensemble vote and the reliability from the decision scores,
+        so no separate predict() pass is needed.
+        """
+        # predict() == -1 exactly where these hold (libsvm maps a score of 0 to -1)
+        votes = (score_iso < 0).astype(np.int8) + (score_lof < 0) + (score_svm <= 0)
+        is_outlier = votes >= 2
 
         # Normalize components (rough heuristics for scikit-learn defaults)
         # IsoForest: usually -0.5 to 0.5. 0 is the threshold.
@@ -127,93 +324,702 @@ class AdvancedOutlierDetector:
         
         # Sigmoid-like normalization to 0-1 range
         def normalize(s):
-            return 1 / (1 + np.exp(-10 * s)) # Strong sigmoid around 0
+            # Strong sigmoid around 0: 1 / (1 + exp(-10 s)), written via tanh to avoid overflow
+            return 0.5 * (1 + np.tanh(5 * s))
 
-        rel_iso = normalize(score_iso)
-        rel_svm = normalize(score_svm)
-        rel_lof = normalize(score_lof)
+        reliability = (normalize(score_iso) + normalize(score_svm) + normalize(score_lof)) / 3
+        return is_outlier, reliability
 
-        reliability = (rel_iso + rel_svm + rel_lof) / 3
-        
-        return is_outlier, float(reliability)
+    def check_outliers(self, values, lats, longs):
+        """
+        Batch version of check_outlier.
+        Returns (is_outlier: bool array, reliability: float array in 0.0-1.0)
+        """
+        if not self.is_fitted:
+            self._initial_fit()
+
+        features = np.column_stack([
+            np.asarray(values, dtype=float),
+            np.asarray(lats, dtype=float),
+            np.asarray(longs, dtype=float)
+        ])
+        if self.grid is None:
+            return self.votes_and_reliability(*self.decision_scores(self.scaler.transform(features)))
+
+        # Grid lookup; only rows outside the grid bounds are scored by the models
+        scores, in_bounds = self.grid.lookup(features)
+        if not in_bounds.all():
+            outside = ~in_bounds
+            scores[outside] = np.column_stack(self.decision_scores(self.scaler.transform(features[outside])))
+        return self.votes_and_reliability(*scores.T)
 
-# Singleton instance
+    def check_outlier(self, value, lat, long):
+        """
+        Returns (is_outlier, reliability_score)
+        reliability_score: 0.0 to 1.0 (1.0 = highly reliable inlier)
+        """
+        is_outlier, reliability = self.check_outliers([value], [lat], [long])
+        return bool(is_outlier[0]), float(reliability[0])
+
+# Singleton instance. Never mutated after startup: retrains build a new detector and
+# swap it in by rebinding this name (an atomic operation), see swap_detector().
 detector = AdvancedOutlierDetector()
 
 import validation_service
 
-def validate_observation(value: float, lat: float=0.0, long: float=0.0, type_cat: str="air", details: dict=None, is_expert: bool=False):
+# --- Sharded per-category, per-region models ---
+# AQI, dB, pH and soil moisture live on different scales, so each (type, region cell) with
+# enough data gets its own small ensemble. Shards are loaded lazily from the registry and
+# kept in an LRU cache; sparse or untrained shards fall back to the global detector.
+SHARD_CELL_SIZE_DEG = float(os.getenv("ML_SHARD_CELL_SIZE_DEG", 10.0))
+SHARD_MIN_SAMPLES = int(os.getenv("ML_SHARD_MIN_SAMPLES", 200))
+SHARD_CACHE_SIZE = int(os.getenv("ML_SHARD_CACHE_SIZE", 64))
+
+def shard_key(type_cat: str, lat: float, long: float):
+    return (type_cat or "").lower(), cell_id(lat, long, SHARD_CELL_SIZE_DEG)
+
+def shard_model_name(type_cat: str, region_id: str) -> str:
+    # Registry names double as file names, so keep them filesystem-safe
+    safe_type = re.sub(r"[^a-z0-9]+", "-", type_cat.lower())
+    return f"shard_{safe_type}_{region_id.replace(':', '_')}"
+
+class ShardedDetectorRegistry:
+    def __init__(self, capacity: int = SHARD_CACHE_SIZE):
+        self.capacity = capacity
+        self._cache = OrderedDict() # model name -> detector, most recently used last
+        self._active = {} # model name -> active version, refreshed from the registry
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh_active(self):
+        now = time.time()
+        if now - self._last_refresh < REGISTRY_POLL_SECONDS:
+            return
+        self._last_refresh = now
+        try:
+            self._active = {
+                name: entry["active"] for name, entry in registry.list_models().items()
+                if name.startswith("shard_") and entry.get("active")
+            }
+        except Exception as e:
+            print(f"Error reading shard registry: {e}")
+            return
+        # Drop cached shards that were retrained elsewhere; they reload lazily
+        for name in [n for n, d in self._cache.items() if d.version != self._active.get(n)]:
+            self._cache.pop(name, None)
+
+    def get(self, type_cat: str, lat: float, long: float):
+        """
+        Returns the shard detector for this observation, or None if there is no trained shard.
+        """
+        name = shard_model_name(*shard_key(type_cat, lat, long))
+        with self._lock:
+            self._refresh_active()
+            if name in self._cache:
+                self._cache.move_to_end(name)
+                return self._cache[name]
+            version = self._active.get(name)
+        if version is None:
+            return None
+
+        shard = AdvancedOutlierDetector(load_persisted=False, cold_start=False, name=name)
+        if not shard.load(version):
+            return None
+        with self._lock:
+            self._cache[name] = shard
+            self._cache.move_to_end(name)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False) # Evict the coldest shard
+        return shard
+
+    def check_outlier(self, type_cat: str, value: float, lat: float, long: float):
+        """
+        Returns (is_outlier, reliability, model_name), falling back to the global detector.
+        """
+        model = self.get(type_cat, lat, long) or detector
+        is_outlier, reliability = model.check_outlier(value, lat, long)
+        return is_outlier, reliability, model.name
+
+    def invalidate(self, names=None):
+        with self._lock:
+            for name in (names if names is not None else list(self._cache)):
+                self._cache.pop(name, None)
+            self._last_refresh = 0.0
+
+    def stats(self) -> dict:
+        return {"cached": list(self._cache), "trained_shards": len(self._active), "capacity": self.capacity}
+
+def fit_shards(X, types, svm_mode=None) -> dict:
     """
-    Returns (is_valid, validation_report, needs_review)
+    Fits one detector per (type, region cell) with at least SHARD_MIN_SAMPLES rows.
+    Each shard is fitted and versioned independently. Returns {model name: version}.
+    """
+    X = np.asarray(X, dtype=float)
+    types = np.array([(t or "").lower() for t in types], dtype=object)
+    regions = cell_ids(X[:, 1], X[:, 2], SHARD_CELL_SIZE_DEG)
+    keys = np.array([f"{t}|{r}" for t, r in zip(types, regions)], dtype=object)
+
+    versions = {}
+    uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    order = np.argsort(inverse, kind="stable")
+    for key, rows in zip(uniq, np.split(order, np.cumsum(counts)[:-1])):
+        if len(rows) < SHARD_MIN_SAMPLES:
+            continue # Sparse shard: scored by the global model
+        type_cat, region_id = key.split("|", 1)
+        shard = AdvancedOutlierDetector(load_persisted=False, cold_start=False, svm_mode=svm_mode, name=shard_model_name(type_cat, region_id))
+        if shard.fit(X[rows]):
+            versions[shard.name] = shard.save(source="retrain")
+    return versions
+
+shards = ShardedDetectorRegistry()
+
+# --- Memory-bounded training-set collection ---
+# Retraining streams (type, value, lat, long) tuples from the DB in chunks (no ORM objects)
+# into a preallocated buffer and keeps a uniform reservoir sample of at most
+# ML_RESERVOIR_CAP rows per (type, region) stratum, so memory stays bounded however
+# large the observations table grows.
+RESERVOIR_CAP = int(os.getenv("ML_RESERVOIR_CAP", 20000))
+STREAM_BATCH_SIZE = int(os.getenv("ML_STREAM_BATCH_SIZE", 5000))
+
+class StratifiedReservoir:
+    def __init__(self, cap: int = RESERVOIR_CAP, seed: int = 42):
+        self.cap = cap
+        self.rng = np.random.default_rng(seed)
+        self.strata = {} # key -> [buffer (cap x 3), rows seen]
+
+    def add_batch(self, key, rows):
+        """
+        Algorithm R applied to a chunk of rows at once.
+        """
+        buffer, seen = self.strata.get(key, (None, 0))
+        if buffer is None:
+            buffer = np.empty((self.cap, rows.shape[1]), dtype=np.float64)
+
+        # Fill phase: while the reservoir has free slots, rows go straight in
+        n_fill = max(0, min(self.cap - seen, len(rows)))
+        buffer[seen:seen + n_fill] = rows[:n_fill]
+
+        # Replacement phase: row number i (1-based) replaces slot j ~ U[0, i) if j < cap.
+        # Fancy assignment keeps the last write for repeated slots, as sequential R would.
+        rest = rows[n_fill:]
+        if len(rest):
+            positions = np.arange(seen + n_fill + 1, seen + len(rows) + 1)
+            slots = self.rng.integers(0, positions)
+            keep = slots < self.cap
+            buffer[slots[keep]] = rest[keep]
+
+        self.strata[key] = [buffer, seen + len(rows)]
+
+    def sample(self):
+        """
+        Returns (X, types, rows_seen) with X holding every stratum's reservoir.
+        """
+        parts, types, seen_total = [], [], 0
+        for (type_cat, _region), (buffer, seen) in self.strata.items():
+            n = min(seen, self.cap)
+            parts.append(buffer[:n])
+            types.extend([type_cat] * n)
+            seen_total += seen
+        X = np.vstack(parts) if parts else np.empty((0, 3))
+        return X, types, seen_total
+
+def collect_training_sample(db, cap: int = RESERVOIR_CAP, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Streams valid observations and returns (X, types, rows_seen) from a stratified reservoir.
+    """
+    from sqlalchemy import select
+    import models
+
+    reservoir = StratifiedReservoir(cap)
+    values = np.empty((batch_size, 3), dtype=np.float64) # Reused for every chunk
+    types = np.empty(batch_size, dtype=object)
+
+    stmt = select(
+        models.Observation.type, models.Observation.value, models.Observation.lat, models.Observation.long
+    ).where(models.Observation.is_valid == True).execution_options(yield_per=batch_size)
+
+    for partition in db.execute(stmt).partitions():
+        n = 0
+        for type_cat, value, lat, long in partition:
+            if value is None or lat is None or long is None:
+                continue
+            values[n] = (value, lat, long)
+            types[n] = (type_cat or "").lower()
+            n += 1
+        if n == 0:
+            continue
+
+        regions = cell_ids(values[:n, 1], values[:n, 2], SHARD_CELL_SIZE_DEG)
+        keys = np.array([f"{t}|{r}" for t, r in zip(types[:n], regions)], dtype=object)
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        for i, key in enumerate(uniq):
+            type_cat, region_id = key.split("|", 1)
+            reservoir.add_batch((type_cat, region_id), values[:n][inverse == i])
+
+    return reservoir.sample()
+
+# --- Shadow evaluation ---
+# A candidate model version scores live traffic next to the serving models without affecting
+# any verdict. validate_observation only enqueues (value, lat, long) together with the primary
+# result; a background thread drains the queue, scores whole batches with check_outliers and
+# records disagreements, so the request path pays one non-blocking put.
+SHADOW_QUEUE_SIZE = int(os.getenv("ML_SHADOW_QUEUE_SIZE", 10000))
+SHADOW_LOG_SIZE = int(os.getenv("ML_SHADOW_LOG_SIZE", 1000))
+SHADOW_BATCH_SIZE = 256
+
+class ShadowEvaluator:
+    def __init__(self):
+        self.detector = None
+        self._queue = queue.Queue(maxsize=SHADOW_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.started_at = datetime.now().isoformat() if self.detector else None
+        self.dropped = 0 # Observations skipped because the queue was full
+        self.per_type = {} # type -> counters
+        # Compact log of disagreements: (timestamp, type, value, lat, long, primary_outlier, shadow_outlier, reliability delta)
+        # "primary" is the serving global detector: the candidate is a global model too, so the
+        # comparison is old vs new model, not shard vs global
+        self.log = deque(maxlen=SHADOW_LOG_SIZE)
+
+    def start(self, version: str) -> bool:
+        """
+        Loads `version` from the registry as the shadow model and resets the statistics.
+        """
+        candidate = AdvancedOutlierDetector(load_persisted=False, cold_start=False)
+        if not candidate.load(version):
+            return False
+        with self._lock:
+            self.detector = candidate
+            self._reset_stats()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ml-shadow", daemon=True)
+                self._thread.start()
+        return True
+
+    def stop(self):
+        with self._lock:
+            self.detector = None
+
+    def submit(self, type_cat: str, value: float, lat: float, long: float):
+        if self.detector is None:
+            return
+        try:
+            self._queue.put_nowait(((type_cat or "").lower(), value, lat, long))
+        except queue.Full:
+            self.dropped += 1 # Never block the request on the shadow path
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < SHADOW_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            candidate = self.detector
+            if candidate is None:
+                continue
+            try:
+                self._record(batch, candidate)
+            except Exception as e:
+                print(f"Shadow scoring error: {e}")
+
+    def _record(self, batch, candidate):
+        types, values, lats, longs = zip(*batch)
+        # Both global models score the same batch here, off the request path
+        primary_out, primary_rel = detector.check_outliers(values, lats, longs)
+        shadow_out, shadow_rel = candidate.check_outliers(values, lats, longs)
+        deltas = shadow_rel - primary_rel
+        now = datetime.now().isoformat()
+        with self._lock:
+            if candidate is not self.detector:
+                return # Shadow model changed while scoring; drop the stale batch
+            for i, type_cat in enumerate(types):
+                stats = self.per_type.setdefault(type_cat, {
+                    "scored": 0, "disagreements": 0, "shadow_stricter": 0, "shadow_looser": 0, "abs_delta_sum": 0.0
+                })
+                stats["scored"] += 1
+                stats["abs_delta_sum"] += abs(float(deltas[i]))
+                if bool(shadow_out[i]) != bool(primary_out[i]):
+                    stats["disagreements"] += 1
+                    stats["shadow_stricter" if shadow_out[i] else "shadow_looser"] += 1
+                    self.log.append((now, type_cat, values[i], lats[i], longs[i], bool(primary_out[i]), bool(shadow_out[i]), round(float(deltas[i]), 4)))
+
+    def summary(self, recent: int = 50) -> dict:
+        with self._lock:
+            per_type = {
+                type_cat: {
+                    "scored": s["scored"],
+                    "disagreement_rate": round(s["disagreements"] / s["scored"], 4),
+                    "shadow_stricter": s["shadow_stricter"],
+                    "shadow_looser": s["shadow_looser"],
+                    "mean_abs_reliability_delta": round(s["abs_delta_sum"] / s["scored"], 4)
+                }
+                for type_cat, s in self.per_type.items()
+            }
+            scored = sum(s["scored"] for s in self.per_type.values())
+            disagreements = sum(s["disagreements"] for s in self.per_type.values())
+            return {
+                "shadow_version": self.detector.version if self.detector else None,
+                "primary_version": detector.version,
+                "started_at": self.started_at,
+                "scored": scored,
+                "disagreement_rate": round(disagreements / scored, 4) if scored else None,
+                "pending": self._queue.qsize(),
+                "dropped": self.dropped,
+                "per_type": per_type,
+                "recent_disagreements": [
+                    dict(zip(("timestamp", "type", "value", "lat", "long", "primary_outlier", "shadow_outlier", "reliability_delta"), row))
+                    for row in list(self.log)[-recent:]
+                ]
+            }
+
+    def promote(self):
+        """
+        Activates the shadow version and serves it. Returns the promoted version or None.
+        """
+        candidate = self.detector
+        if candidate is None:
+            return None
+        registry.activate(MODEL_NAME, candidate.version)
+        swap_detector(candidate)
+        self.stop()
+        return candidate.version
+
+shadow = ShadowEvaluator()
+
+# --- Background retraining ---
+# Fitting runs in a separate process (spawned, so no fork-with-threads hazards) and writes a
+# new artifact version. The web process then loads that version into a fresh detector and
+# swaps it in, so scoring never sees a half-fitted model and never waits on a retrain.
+_retrain_executor = None
+_jobs_lock = threading.Lock() # Guards retrain_jobs and _retrain_executor
+_last_registry_check = 0.0
+retrain_jobs = {} # job_id -> status dict, in submission order
+RETRAIN_JOB_TTL_SECONDS = float(os.getenv("ML_RETRAIN_JOB_TTL_SECONDS", 24 * 3600)) # Finished jobs stay queryable this long
+RETRAIN_JOBS_MAX = int(os.getenv("ML_RETRAIN_JOBS_MAX", 100)) # And at most this many are kept
+FINISHED_JOB_STATUSES = ("completed", "failed", "skipped")
+_started_jobs = None # Job ids put by the worker process as it picks each job up
+_worker_started_jobs = None # The same queue, as seen from inside the worker
+
+def swap_detector(new_detector):
+    global detector
+    detector = new_detector
+
+def load_detector_version(version: str = None):
     """
-    report = {
-        "satellite_value": None,
-        "standards": {},
-        "ml_status": "Passed",
-        "trust_level": "Expert" if is_expert else "Standard"
+    Returns a new detector loaded from a persisted version (default: active), or None.
+    """
+    new_detector = AdvancedOutlierDetector(load_persisted=False, cold_start=False)
+    return new_detector if new_detector.load(version) else None
+
+def _maybe_reload_active():
+    # Other workers (or the retrain process) may have activated a newer version.
+    global _last_registry_check
+    now = time.time()
+    if now - _last_registry_check < REGISTRY_POLL_SECONDS:
+        return
+    _last_registry_check = now
+    try:
+        meta = registry.describe(MODEL_NAME)
+        if meta and meta["version"] != detector.version:
+            new_detector = load_detector_version(meta["version"])
+            if new_detector:
+                swap_detector(new_detector)
+    except Exception as e:
+        print(f"Error checking model registry: {e}")
+
+def _evict_finished_jobs(now: datetime = None):
+    # Caller holds _jobs_lock. Queued and running jobs are never evicted.
+    now = now or datetime.now()
+    finished = [job_id for job_id, job in retrain_jobs.items() if job["status"] in FINISHED_JOB_STATUSES]
+    excess = len(finished) - RETRAIN_JOBS_MAX
+    for i, job_id in enumerate(finished): # Oldest submissions first
+        expired = (now - datetime.fromisoformat(retrain_jobs[job_id]["finished_at"])).total_seconds() > RETRAIN_JOB_TTL_SECONDS
+        if i < excess or expired:
+            del retrain_jobs[job_id]
+
+def _init_retrain_worker(started_jobs):
+    global _worker_started_jobs
+    _worker_started_jobs = started_jobs
+
+def _fit_and_save(job_id=None, X=None, types=None, svm_mode=None, activate=True):
+    # Runs in the retrain worker process
+    if _worker_started_jobs is not None and job_id is not None:
+        _worker_started_jobs.put(job_id)
+    rows_seen = None
+    if X is None:
+        # Stream the training sample from the DB inside the worker, off the request path
+        from models import SessionLocal
+        db = SessionLocal()
+        try:
+            X, types, rows_seen = collect_training_sample(db)
+        finally:
+            db.close()
+    X = np.asarray(X, dtype=float)
+
+    new_detector = AdvancedOutlierDetector(load_persisted=False, cold_start=False, svm_mode=svm_mode)
+    if not new_detector.fit(X, types):
+        return None
+    return {
+        "version": new_detector.save(source="retrain", activate=activate),
+        # Shards are only retrained for versions that go live immediately
+        "shards": fit_shards(X, types, svm_mode) if types is not None and activate else {},
+        "n_samples": int(len(X)),
+        "rows_seen": rows_seen if rows_seen is not None else int(len(X))
     }
 
-    # 1. Range Check (Simplified Manual Validation)
-    if details:
-        is_range_valid, msg, std_report = validation_service.validator.validate_ranges(type_cat, details)
-        report["standards"] = std_report
-        # Experts still shouldn't post physically impossible values
-        if not is_range_valid:
-            return False, report, False
+def submit_retrain(X=None, types=None, shadow_only: bool = False) -> dict:
+    """
+    Queues a background retrain and returns its job record.
+    Without X, the worker streams a stratified reservoir sample of valid observations
+    from the DB; otherwise it trains on X (n_samples x [value, lat, long]).
+    With types (one category per row), per-(type, region) shards are retrained as well.
+    With shadow_only, the new version is not activated but evaluated in shadow mode.
+    """
+    global _retrain_executor, _started_jobs
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        if _retrain_executor is None:
+            context = multiprocessing.get_context("spawn")
+            if _started_jobs is None:
+                _started_jobs = context.SimpleQueue()
+                threading.Thread(target=_watch_started_jobs, name="ml-retrain-started", daemon=True).start()
+            _retrain_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=_init_retrain_worker, initargs=(_started_jobs,)
+            )
+        job = {
+            "job_id": job_id,
+            "status": "queued", # "running" once the worker picks it up
+            "n_samples": int(len(X)) if X is not None else None,
+            "rows_seen": None,
+            "submitted_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "version": None,
+            "shards": {},
+            "shadow_only": shadow_only,
+            "error": None
+        }
+        _evict_finished_jobs()
+        retrain_jobs[job_id] = job
+        executor = _retrain_executor
+        snapshot = dict(job)
+    future = executor.submit(
+        _fit_and_save,
+        job_id,
+        np.asarray(X, dtype=float) if X is not None else None,
+        list(types) if types is not None else None,
+        None,
+        not shadow_only
+    )
+    future.add_done_callback(lambda f: _on_retrain_done(job_id, f))
+    return snapshot
 
+def _watch_started_jobs():
+    while True:
+        _mark_running(_started_jobs.get())
 
-    # 2. Live External Check
-    is_live_valid, live_msg, ref_val, ext_meta = validation_service.validator.check_live_data(type_cat, lat, long, details or {"value": value})
-    report["satellite_value"] = ref_val
-    report["external_meta"] = ext_meta
-    if not is_live_valid:
-        # If live check fails (e.g. 5x diff from satellite), experts are flagged for review instead of auto-rejection
-        if is_expert:
-            is_justified, reason, event_type = validation_service.validator.news_validator.verify_trend_from_news(type_cat, lat, long, value)
-            if is_justified:
-                report["ml_status"] = f"Satellite Conflict justified by News: {event_type}"
-                report["news_justification"] = reason
-            else:
-                report["ml_status"] = "Live check conflict (Expert) - No News Support"
-            return True, report, True
+def _mark_running(job_id):
+    with _jobs_lock:
+        job = retrain_jobs.get(job_id)
+        if job is not None and job["status"] == "queued": # The done callback may have won the race
+            job["status"] = "running"
+
+def _on_retrain_done(job_id, future):
+    # Runs on the executor's callback thread; the model swap happens outside the lock,
+    # the job record is only updated under it
+    with _jobs_lock:
+        shadow_only = retrain_jobs[job_id]["shadow_only"]
+    update = {}
+    try:
+        result = future.result()
+        if result is None:
+            update = {"status": "skipped", "error": "Not enough data to retrain"}
         else:
+            if shadow_only:
+                if not shadow.start(result["version"]):
+                    raise RuntimeError(f"Could not load retrained version {result['version']}")
+            else:
+                new_detector = load_detector_version(result["version"])
+                if new_detector is None:
+                    raise RuntimeError(f"Could not load retrained version {result['version']}")
+                swap_detector(new_detector)
+                shards.invalidate(list(result["shards"]))
+            update = {
+                "status": "completed",
+                "version": result["version"],
+                "shards": result["shards"],
+                "n_samples": result["n_samples"],
+                "rows_seen": result["rows_seen"]
+            }
+    except Exception as e:
+        print(f"Retrain job {job_id} failed: {e}")
+        update = {"status": "failed", "error": str(e)}
+        if isinstance(e, BrokenProcessPool):
+            # The worker died (e.g. OOM); start a fresh pool for the next job
+            global _retrain_executor
+            with _jobs_lock:
+                _retrain_executor = None
+    update["finished_at"] = datetime.now().isoformat()
+    with _jobs_lock:
+        retrain_jobs[job_id].update(update)
+        _evict_finished_jobs()
+
+def get_retrain_job(job_id: str):
+    with _jobs_lock:
+        job = retrain_jobs.get(job_id)
+        return dict(job) if job else None
+
+# Validation runs as a pipeline of stages, cheapest first by default, so a standard user's
+# reading that fails the local range check, or the ML check where our own recent readings give
+# a baseline, never pays for network or LLM calls.
+# Each stage records its time in validation_report["stage_timings_ms"]. VALIDATION_STAGE_ORDER
+# (comma-separated stage names) overrides the cost-based order.
+# Cost hints are rough relative costs: in-process checks ~1-10, one HTTP round trip ~1000, LLM ~5000.
+
+class ValidationStage:
+    def __init__(self, name: str, cost: int, run, when=None):
+        self.name = name
+        self.cost = cost
+        self.run = run # run(ctx) -> True if the stage passed
+        self.when = when # Optional when(ctx) -> bool; the stage is skipped if False
+
+class ValidationContext:
+    def __init__(self, value, lat, long, type_cat, details, is_expert):
+        self.value = value
+        self.lat = lat
+        self.long = long
+        self.type_cat = type_cat
+        self.details = details
+        self.is_expert = is_expert
+        self.trust_level = "Expert" if is_expert else "Standard"
+        self.report = {
+            "satellite_value": None,
+            "standards": {},
+            "ml_status": "Passed",
+            "trust_level": self.trust_level
+        }
+        self.ref_val = None
+        self.is_outlier = False
+        self.live_conflict = False
+        self.news = None # (is_justified, reason, event_type) once the news stage ran
+
+def _stage_range(ctx):
+    if not ctx.details:
+        return True
+    is_range_valid, msg, std_report = validation_service.validator.validate_ranges(ctx.type_cat, ctx.details)
+    ctx.report["standards"] = std_report
+    return is_range_valid
+
+def _stage_ml(ctx):
+    _maybe_reload_active()
+    is_outlier, reliability, model_name = shards.check_outlier(ctx.type_cat, ctx.value, ctx.lat, ctx.long)
+    monitor.observe(ctx.type_cat, ctx.value, ctx.lat, ctx.long)
+    shadow.submit(ctx.type_cat, ctx.value, ctx.lat, ctx.long)
+    ctx.is_outlier = is_outlier
+    ctx.report["reliability_score"] = round(reliability * 100, 2)
+    ctx.report["ml_model"] = model_name
+    if is_outlier:
+        ctx.report["ml_status"] = f"Outlier Detected (Reliability: {ctx.report['reliability_score']}%)"
+    return not is_outlier
+
+def _stage_live(ctx):
+    is_live_valid, live_msg, ref_val, ext_meta = validation_service.validator.check_live_data(
+        ctx.type_cat, ctx.lat, ctx.long, ctx.details or {"value": ctx.value}, value=ctx.value
+    )
+    ctx.ref_val = ref_val
+    ctx.report["satellite_value"] = ref_val
+    ctx.report["external_meta"] = ext_meta
+    ctx.live_conflict = not is_live_valid
+    return is_live_valid
+
+def _stage_news(ctx):
+    # Looks for an event (fire, leak, heatwave) that explains an expert's conflicting reading
+    ctx.news = validation_service.validator.news_validator.verify_trend_from_news(ctx.type_cat, ctx.lat, ctx.long, ctx.value)
+    return ctx.news[0]
+
+VALIDATION_STAGES = [
+    ValidationStage("range", cost=1, run=_stage_range),
+    ValidationStage("ml", cost=10, run=_stage_ml),
+    ValidationStage("live", cost=1000, run=_stage_live),
+    ValidationStage("news", cost=5000, run=_stage_news, when=lambda ctx: ctx.is_expert and (ctx.is_outlier or ctx.live_conflict))
+]
+
+def _has_local_baseline(ctx) -> bool:
+    # With dense local coverage the live stage answers from our own readings, so it yields a
+    # baseline or a rejection. Without it, a standard user's ML outlier with no external
+    # baseline goes to human review ("Unverified Source"), so the live stage has to run.
+    local = validation_service.validator.local_validator
+    return len(local.neighbors(ctx.type_cat, ctx.lat, ctx.long)) >= local.min_neighbors
+
+# Per trust level, the stages whose failure rejects the observation on the spot, each with an
+# optional condition(ctx) that must also hold.
+# Experts are only stopped by physically impossible values; their conflicts go to news and review.
+SHORT_CIRCUIT_STAGES = {
+    "Standard": {"range": None, "ml": _has_local_baseline, "live": None},
+    "Expert": {"range": None}
+}
+
+def validation_stage_order():
+    """
+    Stages in execution order: VALIDATION_STAGE_ORDER if set, else by cost hint.
+    The news stage only runs once an earlier stage found a conflict, so it belongs last.
+    """
+    by_name = {stage.name: stage for stage in VALIDATION_STAGES}
+    order = os.getenv("VALIDATION_STAGE_ORDER")
+    if order:
+        return [by_name[name.strip()] for name in order.split(",") if name.strip() in by_name]
+    return sorted(VALIDATION_STAGES, key=lambda stage: stage.cost)
+
+def validate_observation(value: float, lat: float=0.0, long: float=0.0, type_cat: str="air", details: dict=None, is_expert: bool=False):
+    """
+    Returns (is_valid, validation_report, needs_review)
+    """
+    ctx = ValidationContext(value, lat, long, type_cat, details, is_expert)
+    report = ctx.report
+    timings = report["stage_timings_ms"] = {}
+    short_circuit = SHORT_CIRCUIT_STAGES[ctx.trust_level]
+
+    for stage in validation_stage_order():
+        if stage.when is not None and not stage.when(ctx):
+            continue
+        started = time.perf_counter()
+        passed = stage.run(ctx)
+        elapsed = time.perf_counter() - started
+        timings[stage.name] = round(elapsed * 1000, 3)
+        metrics.VALIDATION_STAGE.labels(stage.name).observe(elapsed)
+        if not passed and stage.name in short_circuit and (short_circuit[stage.name] is None or short_circuit[stage.name](ctx)):
+            report["rejected_by"] = stage.name
+            metrics.VALIDATION_REJECTIONS.labels(stage.name).inc()
             return False, report, False
 
-    # 3. ML Check
-    is_outlier, reliability = detector.check_outlier(value, lat, long)
-    report["reliability_score"] = round(reliability * 100, 2)
-    
-    # 4. Hybrid Trust Logic
+    # Hybrid Trust Logic
     needs_review = False
-    is_valid = not is_outlier
+    is_valid = not ctx.is_outlier and not ctx.live_conflict
 
     if is_expert:
-        # We trust experts more: even if ML says outlier, we check news for trends
-        if is_outlier:
-            is_justified, reason, event_type = validation_service.validator.news_validator.verify_trend_from_news(type_cat, lat, long, value)
-            
+        # We trust experts more: conflicts with satellite data or the ML model are checked against news
+        is_justified, reason, event_type = ctx.news or (False, None, None)
+        if ctx.live_conflict or ctx.is_outlier:
+            is_valid = True
+            needs_review = True # Still flag for review, with news justification if any
             if is_justified:
-                is_valid = True
-                needs_review = True # Still flag for review but with news justification
-                report["ml_status"] = f"Verified Trend: {event_type}"
                 report["news_justification"] = reason
-            else:
-                is_valid = True
-                needs_review = True
-                report["ml_status"] = f"Potential New Trend (Expert Outlier - Reliability: {report['reliability_score']}%)"
-        
+        if ctx.live_conflict:
+            report["ml_status"] = f"Satellite Conflict justified by News: {event_type}" if is_justified else "Live check conflict (Expert) - No News Support"
+        elif ctx.is_outlier:
+            report["ml_status"] = f"Verified Trend: {event_type}" if is_justified else f"Potential New Trend (Expert Outlier - Reliability: {report['reliability_score']}%)"
+
         # If no satellite data, expert data is considered "Valid" but flagged for meta-verification
-        if ref_val is None:
+        if ctx.ref_val is None and not ctx.live_conflict:
             needs_review = True
             report["hitl_reason"] = "Expert Discovery: Verifying new region patterns"
     else:
-        # Standard user logic: anomalies are rejected or flagged heavily
-        if is_outlier:
-            report["ml_status"] = f"Outlier Detected (Reliability: {report['reliability_score']}%)"
-            is_valid = False
-            # We still might want to review it if it's "close" but for MVP we reject
-        
-        if ref_val is None:
+        # Standard user logic: anomalies are rejected; unverifiable readings are flagged, ML outliers included
+        if ctx.ref_val is None:
             needs_review = True
             report["hitl_reason"] = "Unverified Source: No external baseline for this region"
 
@@ -224,6 +1030,7 @@ def retrain_models(observations):
     observations: List of dicts or objects with value, lat, long
     """
     data = []
+    types = []
     for obs in observations:
         # Only train on valid data to learn "normality"
         # Or train on all and specify contamination? 
@@ -231,6 +1038,11 @@ def retrain_models(observations):
         # But IsolationForest works with mixed data.
         # For this MVP, let's assume we train on 'valid' labeled data.
         data.append([obs.value, obs.lat, obs.long])
+        types.append(getattr(obs, "type", None))
     
-    if data:
-        detector.fit(np.array(data))
+    # Synchronous variant of submit_retrain: fit a fresh detector, then swap it in
+    new_detector = AdvancedOutlierDetector(load_persisted=False, cold_start=False)
+    if data and new_detector.fit(np.array(data), types):
+        new_detector.save(source="retrain")
+        swap_detector(new_detector)
+        shards.invalidate(list(fit_shards(np.array(data), types)))
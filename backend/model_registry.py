@@ -0,0 +1,165 @@
+import os
+import glob
+import json
+import time
+import hashlib
+import threading
+import joblib
+import numpy as np
+from datetime import datetime
+from contextlib import contextmanager
+
+# Versioned on-disk store for fitted models.
+# Artifacts are plain (uncompressed) joblib files so they can be loaded with mmap_mode="r":
+# the large NumPy arrays inside the fitted estimators are then backed by the OS page cache
+# and shared by every worker process instead of being copied into each one.
+# registry.json records, per model name, every version with its training-set hash,
+# sample count and fit time, plus which version is active.
+
+ARTIFACT_DIR = os.getenv(
+    "MODEL_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts")
+)
+MAX_VERSIONS_KEPT = int(os.getenv("MODEL_MAX_VERSIONS", 5))
+
+def training_hash(X) -> str:
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    h = hashlib.sha256(str(X.shape).encode())
+    h.update(X.tobytes())
+    return h.hexdigest()
+
+def file_hash(path: str) -> str:
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, artifact_dir: str = ARTIFACT_DIR):
+        self.artifact_dir = artifact_dir
+        self.registry_path = os.path.join(artifact_dir, "registry.json")
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.registry_path):
+            return {"models": {}}
+        with open(self.registry_path, "r") as f:
+            return json.load(f)
+
+    def _write(self, data: dict):
+        tmp = f"{self.registry_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.registry_path)
+
+    @contextmanager
+    def exclusive(self, name: str, timeout: float = 300):
+        """
+        Cross-process lock so that only one worker trains a missing model at startup;
+        the others wait and then load the artifact it produced.
+        """
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        lock_path = os.path.join(self.artifact_dir, f"{name}.lock")
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > timeout:
+                        os.remove(lock_path) # Stale lock from a crashed worker
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+    def save(self, name: str, payload: dict, meta: dict, activate: bool = True) -> str:
+        """
+        Writes a new immutable version of `name` and (by default) makes it active.
+        meta should include training_hash, n_samples and fit_seconds.
+        """
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        version = f"{name}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{(meta.get('training_hash') or '')[:8]}"
+        path = os.path.join(self.artifact_dir, f"{version}.joblib")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(payload, tmp) # Uncompressed on purpose: compressed files cannot be memory-mapped
+        os.replace(tmp, path)
+
+        with self._lock, self.exclusive("registry"):
+            data = self._read()
+            entry = data["models"].setdefault(name, {"active": None, "versions": []})
+            entry["versions"].append({
+                **meta,
+                "version": version,
+                "file": os.path.basename(path),
+                "created_at": datetime.now().isoformat(),
+            })
+            if activate:
+                entry["active"] = version
+            self._prune(entry)
+            self._write(data)
+        return version
+
+    def _prune(self, entry: dict):
+        while len(entry["versions"]) > MAX_VERSIONS_KEPT:
+            old = next((v for v in entry["versions"] if v["version"] != entry["active"]), None)
+            if old is None:
+                break
+            entry["versions"].remove(old)
+            # The artifact plus any derived files (e.g. <version>.grid.npy)
+            for path in glob.glob(self.path_prefix(old["version"]) + ".*"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def path_prefix(self, version: str) -> str:
+        """
+        Base path for files derived from a version (the artifact is <prefix>.joblib).
+        """
+        return os.path.join(self.artifact_dir, version)
+
+    def activate(self, name: str, version: str):
+        with self._lock, self.exclusive("registry"):
+            data = self._read()
+            entry = data["models"].get(name)
+            if not entry or not any(v["version"] == version for v in entry["versions"]):
+                raise KeyError(f"Unknown model version {version} for {name}")
+            entry["active"] = version
+            self._write(data)
+
+    def describe(self, name: str, version: str = None):
+        entry = self._read()["models"].get(name)
+        if not entry:
+            return None
+        version = version or entry["active"]
+        return next((v for v in entry["versions"] if v["version"] == version), None)
+
+    def load(self, name: str, version: str = None):
+        """
+        Returns (payload, meta) for the requested (default: active) version, or (None, None).
+        """
+        meta = self.describe(name, version)
+        if not meta:
+            return None, None
+        path = os.path.join(self.artifact_dir, meta["file"])
+        if not os.path.exists(path):
+            return None, None
+        return joblib.load(path, mmap_mode="r"), meta
+
+    def list_models(self) -> dict:
+        return self._read()["models"]
+
+registry = ModelRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, JSON, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, JSON, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -17,6 +17,9 @@ Base = declarative_base()
 
 class Observation(Base):
     __tablename__ = "observations"
+    __table_args__ = (
+        Index("ix_observations_type_timestamp", "type", "timestamp"), # Time-range reads per type (series, forecasts)
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(String, index=True) # air, water, bio
@@ -80,5 +83,68 @@ class Feedback(Base):
     timestamp = Column(DateTime, default=datetime.now)
     status = Column(String, default="unread") # unread, read, addressed
 
+class NewsArticle(Base):
+    __tablename__ = "news_articles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String, unique=True, index=True) # Stable hash of the article URL (or title)
+    title = Column(String)
+    description = Column(Text, nullable=True)
+    url = Column(String, nullable=True)
+    source = Column(String) # Publisher name
+    feed = Column(String, index=True) # Feed the article was ingested from
+    category = Column(String, index=True) # air, water, noise, biodiversity...
+    location = Column(String, nullable=True) # Geo tag (place name)
+    lat = Column(Float, nullable=True)
+    long = Column(Float, nullable=True)
+    published_at = Column(DateTime, index=True)
+    ingested_at = Column(DateTime, default=datetime.now)
+    impact_score = Column(Float, nullable=True)
+    impact_label = Column(String, nullable=True)
+
+    # Near-duplicate detection
+    simhash = Column(String(16), index=True) # 64-bit SimHash as hex
+    syndicated_count = Column(Integer, default=0) # Copies of this story dropped as near-duplicates
+
+class NewsFeedCursor(Base):
+    __tablename__ = "news_feed_cursors"
+
+    feed = Column(String, primary_key=True)
+    last_published_at = Column(DateTime, nullable=True) # High-water mark for incremental pulls
+    etag = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.now)
+
+class ForecastSnapshot(Base):
+    __tablename__ = "forecast_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String, index=True)
+    region = Column(String, index=True) # "global" or a geo cell id (see geo_cells.py)
+    generated_at = Column(DateTime, default=datetime.now, index=True)
+    start_time = Column(DateTime) # Hour of the first forecast value
+    baseline = Column(Float) # Mean of the last 24 hourly values
+    history = Column(JSON) # Last 24 hourly means, oldest first (null = no data that hour)
+    values = Column(JSON) # Hourly point forecasts
+    sigma = Column(Float) # Std. dev. of one-step-ahead fit errors
+    model = Column(JSON) # Method and fitted parameters
+    n_observations = Column(Integer)
+
+class RollupColumns:
+    # Per (type, geo cell, time bucket) aggregates of valid observations, see rollups.py
+    type = Column(String, primary_key=True) # Lowercased
+    cell = Column(String, primary_key=True) # Geo cell id (see geo_cells.py)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+    count = Column(Integer, default=0)
+    sum = Column(Float, default=0.0)
+    sum_sq = Column(Float, default=0.0)
+    min = Column(Float, nullable=True) # Not lowered/raised when an observation is invalidated; exact after a rebuild
+    max = Column(Float, nullable=True)
+
+class ObservationRollupHourly(RollupColumns, Base):
+    __tablename__ = "observation_rollups_hourly"
+
+class ObservationRollupDaily(RollupColumns, Base):
+    __tablename__ = "observation_rollups_daily"
+
 def init_db():
     Base.metadata.create_all(bind=engine)
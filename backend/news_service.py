@@ -147,11 +147,55 @@ class NewsService:
             }
         ]
 
+    def _stored_articles(self, category: str = None, limit: int = 50, near=None, radius_deg: float = 5.0) -> List[Dict]:
+        """
+        Articles persisted by the ingestion pipeline (news_ingestion.py), in the same
+        shape as the mock articles. Empty if nothing has been ingested yet.
+        With near=(lat, long), only articles tagged within radius_deg of it, or untagged
+        (national/general news), are returned; the geofence is applied before the limit.
+        """
+        from sqlalchemy import or_, and_
+        from models import SessionLocal, NewsArticle
+        db = SessionLocal()
+        try:
+            query = db.query(NewsArticle)
+            if category:
+                query = query.filter(NewsArticle.category == category)
+            if near is not None:
+                lat, long = near
+                query = query.filter(or_(
+                    NewsArticle.lat.is_(None),
+                    and_(
+                        NewsArticle.lat.between(lat - radius_deg, lat + radius_deg),
+                        NewsArticle.long.between(long - radius_deg, long + radius_deg)
+                    )
+                ))
+            rows = query.order_by(NewsArticle.published_at.desc()).limit(limit).all()
+            return [{
+                "id": a.id,
+                "title": a.title,
+                "description": a.description,
+                "category": a.category,
+                "location": a.location or "National",
+                "lat": a.lat,
+                "long": a.long,
+                "timestamp": a.published_at.isoformat() + "Z",
+                "url": a.url,
+                "impact_score": a.impact_score,
+                "impact_label": a.impact_label or "NEWS UPDATE",
+                "source": a.source
+            } for a in rows]
+        except Exception as e:
+            print(f"Error reading stored news: {e}")
+            return []
+        finally:
+            db.close()
+
     def get_latest_news(self, category: str = None) -> List[Dict]:
         """
         Returns latest environmental news.
         """
-        articles = self.mock_articles
+        articles = self._stored_articles() or self.mock_articles
         if category and category.lower() != "all":
             # Comprehensive mapping for all frontend filter IDs
             mapping = {
@@ -178,8 +222,12 @@ class NewsService:
         Finds news articles related to a specific location and category.
         Used for trend validation.
         """
-        # In a real app, this would use semantic search or geo-fencing
-        # For MVP, we match by category and simple location keyword check
+        # Geo-fence on tagged articles (~5 degrees); untagged ones are national/general news
+        stored = self._stored_articles(category, near=(lat, long))
+        if stored or self._stored_articles(category, limit=1):
+            return stored
+
+        # No ingested news yet: match the mock set by category
         relevant = []
         for article in self.mock_articles:
             if article["category"] == category:
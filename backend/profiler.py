@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import secrets
+import threading
+from collections import Counter, OrderedDict
+
+# On-demand statistical profiler for live workers.
+# A sampler thread reads every other thread's Python stack (sys._current_frames) at a fixed
+# interval and counts identical stacks. The result is returned in the collapsed-stack format
+# ("frame;frame;frame count" per line) read by flamegraph.pl, speedscope and inferno.
+# Nothing runs unless a profile is requested: POST /api/admin/profile samples the worker for a
+# time box, and, when PROFILER_REQUEST_HEADER_ENABLED=1, a request carrying "X-Profile: 1" and
+# the admin token is profiled on its own. Without that flag the request middleware is not even
+# installed. Both require ADMIN_TOKEN to be set; without it profiling is disabled.
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+DEFAULT_INTERVAL_SECONDS = 0.005
+MIN_INTERVAL_SECONDS = 0.001
+REQUEST_PROFILING = os.getenv("PROFILER_REQUEST_HEADER_ENABLED", "0") == "1"
+MAX_STORED_PROFILES = 50
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def admin_token_valid(token) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def _frame_label(code) -> str:
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+def _is_app_code(code) -> bool:
+    return code.co_filename.startswith(APP_DIR) and "site-packages" not in code.co_filename
+
+def _runs_app_code(codes) -> bool:
+    # Request threads executing our code; skips idle pool threads, the event loop at rest
+    # and the thread waiting for this very profile
+    return any(_is_app_code(c) for c in codes) and not any(c.co_filename == __file__ for c in codes)
+
+class StackSampler:
+    """
+    Counts the Python stacks of all other threads, sampled every `interval` seconds.
+    """
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval = max(interval, MIN_INTERVAL_SECONDS)
+        self.stacks = Counter() # (thread name, code objects root -> leaf) -> samples
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            self.stacks[(names.get(ident, str(ident)), tuple(codes))] += 1
+        self.n_samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self, keep=_runs_app_code) -> str:
+        """
+        Collapsed stacks of the samples whose code objects pass keep(codes), heaviest first.
+        The thread name is the root frame.
+        """
+        lines = Counter()
+        for (thread_name, codes), count in self.stacks.items():
+            if keep(codes):
+                lines[";".join([thread_name.replace(" ", "_")] + [_frame_label(c) for c in codes])] += count
+        return "".join(f"{stack} {count}\n" for stack, count in lines.most_common())
+
+class Profiler:
+    def __init__(self):
+        self._busy = threading.Lock() # One worker-wide profile at a time
+        self._request_profiles = OrderedDict() # profile id -> collapsed stacks
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = DEFAULT_INTERVAL_SECONDS) -> str:
+        """
+        Samples the worker for `seconds` (blocking) and returns the collapsed stacks.
+        Raises ValueError for a bad duration, RuntimeError if a profile is already running.
+        """
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be in (0, {MAX_SECONDS:g}]")
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("A profile is already running in this worker")
+        try:
+            sampler = StackSampler(interval)
+            sampler.start()
+            time.sleep(seconds)
+            sampler.stop()
+            return sampler.collapsed()
+        finally:
+            self._busy.release()
+
+    def store_request_profile(self, profile_id: str, collapsed: str):
+        with self._lock:
+            self._request_profiles[profile_id] = collapsed
+            while len(self._request_profiles) > MAX_STORED_PROFILES:
+                self._request_profiles.popitem(last=False)
+
+    def get_request_profile(self, profile_id: str):
+        with self._lock:
+            return self._request_profiles.get(profile_id)
+
+profiler = Profiler()
+
+class RequestProfilerMiddleware:
+    """
+    Profiles single requests sent with "X-Profile: 1" and a valid "X-Admin-Token". Only the
+    stacks running the matched endpoint are kept; the profile is stored under the id returned
+    in the X-Profile-Id response header (GET /api/admin/profile/requests/{id}).
+    Installed only when PROFILER_REQUEST_HEADER_ENABLED=1.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") != b"1" or not admin_token_valid(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler()
+        profile_id = uuid.uuid4().hex[:16]
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # stop() joins the sampler thread, which can be mid-sample; keep that off the event loop
+            await asyncio.to_thread(sampler.stop)
+            endpoint_code = getattr(scope.get("endpoint"), "__code__", None)
+            keep = (lambda codes: endpoint_code in codes) if endpoint_code else _runs_app_code
+            profiler.store_request_profile(profile_id, sampler.collapsed(keep))
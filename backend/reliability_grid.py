@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import numpy as np
+
+# Precomputed lookup grid of the ensemble's decision surface.
+# For a fixed model version, the three decision scores over (value, lat, long) never change,
+# so they can be evaluated once on a regular grid and stored as a float32 .npy file.
+# Scoring then memory-maps that file and does a trilinear interpolation: an array
+# index plus a few multiply-adds instead of three sklearn model evaluations.
+# Points outside the grid bounds are still scored by the models.
+# Only the global detector gets a grid; per-region shards are always scored exactly.
+
+GRID_ENABLED = os.getenv("ML_LOOKUP_GRID", "0") == "1"
+DEFAULT_RESOLUTION = tuple(int(n) for n in os.getenv("ML_LOOKUP_GRID_RESOLUTION", "64,60,120").split(","))
+BUILD_BATCH_SIZE = 50000
+
+def grid_bounds(scaler, n_std: float = 4.0):
+    """
+    Grid extent per feature: the training mean +/- n_std standard deviations,
+    clipped to physically meaningful ranges.
+    """
+    low = scaler.mean_ - n_std * scaler.scale_
+    high = scaler.mean_ + n_std * scaler.scale_
+    low = np.maximum(low, [0.0, -90.0, -180.0])
+    high = np.minimum(high, [np.inf, 90.0, 180.0])
+    return low, high
+
+class ReliabilityGrid:
+    def __init__(self, scores, low, high):
+        self.scores = scores # (n_value, n_lat, n_long, 3) float32: iso, lof, svm decision scores
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.shape = np.array(scores.shape[:3])
+        self.step = (self.high - self.low) / (self.shape - 1)
+
+    @classmethod
+    def build(cls, detector, resolution=DEFAULT_RESOLUTION):
+        low, high = grid_bounds(detector.scaler)
+        axes = [np.linspace(l, h, n) for l, h, n in zip(low, high, resolution)]
+        nodes = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+
+        scores = np.empty((len(nodes), 3), dtype=np.float32)
+        for start in range(0, len(nodes), BUILD_BATCH_SIZE):
+            batch = detector.scaler.transform(nodes[start:start + BUILD_BATCH_SIZE])
+            scores[start:start + BUILD_BATCH_SIZE] = np.column_stack(detector.decision_scores(batch))
+        return cls(scores.reshape(*resolution, 3), low, high)
+
+    def save(self, path_prefix: str):
+        # Both files are written to temp files and renamed, so a concurrent load() never reads
+        # half a file; the bounds go first, and load() rejects a pair whose shapes disagree
+        tmp = f"{path_prefix}.{os.getpid()}.tmp.json"
+        with open(tmp, "w") as f:
+            json.dump({"low": self.low.tolist(), "high": self.high.tolist(), "shape": self.shape.tolist()}, f)
+        os.replace(tmp, f"{path_prefix}.grid.json")
+        tmp = f"{path_prefix}.{os.getpid()}.tmp.npy"
+        np.save(tmp, self.scores)
+        os.replace(tmp, f"{path_prefix}.grid.npy")
+
+    @classmethod
+    def load(cls, path_prefix: str):
+        """
+        Memory-maps a saved grid, or returns None if this version has no grid.
+        """
+        if not (os.path.exists(f"{path_prefix}.grid.npy") and os.path.exists(f"{path_prefix}.grid.json")):
+            return None
+        with open(f"{path_prefix}.grid.json", "r") as f:
+            meta = json.load(f)
+        scores = np.load(f"{path_prefix}.grid.npy", mmap_mode="r")
+        if list(scores.shape[:3]) != meta["shape"]:
+            return None # Caught between the two renames of a save(); the models score instead
+        return cls(scores, meta["low"], meta["high"])
+
+    def lookup(self, features):
+        """
+        Trilinear interpolation of the decision scores.
+        Returns (scores (n x 3), in_bounds mask); rows outside the grid get NaN scores.
+        """
+        features = np.asarray(features, dtype=float)
+        in_bounds = np.all((features >= self.low) & (features <= self.high), axis=1)
+        scores = np.full((len(features), 3), np.nan)
+        if not in_bounds.any():
+            return scores, in_bounds
+
+        pos = (features[in_bounds] - self.low) / self.step
+        base = np.minimum(np.floor(pos).astype(np.int64), self.shape - 2)
+        frac = pos - base
+
+        result = np.zeros((len(pos), 3))
+        for corner in range(8):
+            offset = np.array([(corner >> 2) & 1, (corner >> 1) & 1, corner & 1])
+            weight = np.prod(np.where(offset == 1, frac, 1 - frac), axis=1)
+            idx = base + offset
+            result += weight[:, None] * self.scores[idx[:, 0], idx[:, 1], idx[:, 2]]
+        scores[in_bounds] = result
+        return scores, in_bounds
+
+def accuracy_report(detector, X_eval, resolutions):
+    """
+    Compares grid lookups against exact model scoring at several resolutions.
+    Returns one dict per resolution with size, build time, vote agreement,
+    reliability error and lookup cost.
+    """
+    X_eval = np.asarray(X_eval, dtype=float)
+    exact_out, exact_rel = detector.votes_and_reliability(*detector.decision_scores(detector.scaler.transform(X_eval)))
+
+    report = []
+    for resolution in resolutions:
+        start = time.perf_counter()
+        grid = ReliabilityGrid.build(detector, resolution)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores, in_bounds = grid.lookup(X_eval)
+        lookup_seconds = time.perf_counter() - start
+        grid_out, grid_rel = detector.votes_and_reliability(*scores[in_bounds].T)
+
+        report.append({
+            "resolution": list(resolution),
+            "nodes": int(np.prod(resolution)),
+            "size_mb": round(grid.scores.nbytes / 1e6, 2),
+            "build_seconds": round(build_seconds, 2),
+            "coverage": round(float(in_bounds.mean()), 4),
+            "vote_agreement": round(float(np.mean(grid_out == exact_out[in_bounds])), 4),
+            "reliability_mae": round(float(np.mean(np.abs(grid_rel - exact_rel[in_bounds]))), 4),
+            "lookup_us_per_row": round(lookup_seconds / len(X_eval) * 1e6, 3),
+        })
+    return report
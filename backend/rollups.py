@@ -0,0 +1,185 @@
+import os
+import numpy as np
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import attributes
+from geo_cells import CELL_SIZE_DEG, cell_id, cell_ids
+import models
+
+# Hourly and daily rollups of valid observations per (type, geo cell):
+# count, sum, sum of squares, min and max. Analytics reads (forecast series and baselines,
+# trends, aggregate exports) scan these thousands of rows instead of the raw table.
+# They are kept up to date by an after_flush hook on the session factory, so every write
+# path (API, IoT updates, scraper pipeline, manual validation) updates them in the same
+# transaction. rebuild() recomputes them from the observations table in one streaming pass.
+
+ROLLUP_CELL_SIZE_DEG = float(os.getenv("ROLLUP_CELL_SIZE_DEG", CELL_SIZE_DEG))
+REBUILD_BATCH_SIZE = 10000
+UPSERT_BATCH_SIZE = 1000 # Rows per statement, well under SQLite's bound-parameter limit
+TABLES = {"hourly": models.ObservationRollupHourly, "daily": models.ObservationRollupDaily}
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hourly":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _add(deltas: dict, type_cat, value, lat, long, ts, sign: int):
+    if value is None or lat is None or long is None or ts is None:
+        return
+    cell = cell_id(lat, long, ROLLUP_CELL_SIZE_DEG)
+    for granularity in TABLES:
+        key = (granularity, (type_cat or "").lower(), cell, bucket_start(ts, granularity))
+        agg = deltas.setdefault(key, [0, 0.0, 0.0, None, None])
+        agg[0] += sign
+        agg[1] += sign * value
+        agg[2] += sign * value * value
+        if sign > 0: # Removals cannot shrink min/max without a rescan
+            agg[3] = value if agg[3] is None else min(agg[3], value)
+            agg[4] = value if agg[4] is None else max(agg[4], value)
+
+def _state(obj, before: bool):
+    # (is_valid, type, value, lat, long, timestamp) before or after the pending flush
+    state = []
+    for attr in ("is_valid", "type", "value", "lat", "long", "timestamp"):
+        hist = attributes.get_history(obj, attr)
+        if before and hist.deleted:
+            state.append(hist.deleted[0])
+        else:
+            state.append(getattr(obj, attr))
+    return state
+
+def _after_flush(session, flush_context):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, models.Observation) and obj.is_valid:
+            _add(deltas, obj.type, obj.value, obj.lat, obj.long, obj.timestamp, +1)
+    for obj in session.dirty:
+        if not isinstance(obj, models.Observation) or not session.is_modified(obj):
+            continue
+        old, new = _state(obj, before=True), _state(obj, before=False)
+        if old == new:
+            continue
+        if old[0]:
+            _add(deltas, *old[1:], -1)
+        if new[0]:
+            _add(deltas, *new[1:], +1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Observation) and obj.is_valid:
+            _add(deltas, obj.type, obj.value, obj.lat, obj.long, obj.timestamp, -1)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def apply_deltas(conn, deltas: dict):
+    """
+    Merges {(granularity, type, cell, bucket_start): [count, sum, sum_sq, min, max]} into the
+    rollup tables with batched INSERT ... ON CONFLICT DO UPDATE statements.
+    """
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        least, greatest = func.least, func.greatest
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        least, greatest = func.min, func.max # SQLite's multi-argument min()/max() are scalar
+
+    for granularity, table in TABLES.items():
+        rows = [
+            {"type": t, "cell": c, "bucket_start": b, "count": a[0], "sum": a[1], "sum_sq": a[2], "min": a[3], "max": a[4]}
+            for (g, t, c, b), a in deltas.items() if g == granularity
+        ]
+        cols = table.__table__.c
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            stmt = insert(table.__table__).values(rows[i:i + UPSERT_BATCH_SIZE])
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cols["type"], cols["cell"], cols["bucket_start"]],
+                set_={
+                    "count": cols["count"] + excluded["count"],
+                    "sum": cols["sum"] + excluded["sum"],
+                    "sum_sq": cols["sum_sq"] + excluded["sum_sq"],
+                    "min": least(func.coalesce(cols["min"], excluded["min"]), func.coalesce(excluded["min"], cols["min"])),
+                    "max": greatest(func.coalesce(cols["max"], excluded["max"]), func.coalesce(excluded["max"], cols["max"]))
+                }
+            )
+            conn.execute(stmt)
+
+def install(session_factory):
+    """
+    Keeps the rollups in sync for every session created by session_factory.
+    """
+    if not event.contains(session_factory, "after_flush", _after_flush):
+        event.listen(session_factory, "after_flush", _after_flush)
+
+def rebuild(db, batch_size: int = REBUILD_BATCH_SIZE) -> dict:
+    """
+    Recomputes both rollup tables from the valid observations in one streaming pass.
+    Each chunk is aggregated in NumPy and merged with apply_deltas.
+    """
+    for table in TABLES.values():
+        db.query(table).delete()
+
+    stmt = select(
+        models.Observation.type, models.Observation.value, models.Observation.lat,
+        models.Observation.long, models.Observation.timestamp
+    ).where(models.Observation.is_valid == True).execution_options(yield_per=batch_size)
+
+    conn = db.connection()
+    rows_seen = 0
+    for partition in db.execute(stmt).partitions():
+        rows = [r for r in partition if None not in r]
+        if not rows:
+            continue
+        rows_seen += len(rows)
+        types, values, lats, longs, stamps = zip(*rows)
+        values = np.asarray(values, dtype=float)
+        cells = cell_ids(lats, longs, ROLLUP_CELL_SIZE_DEG)
+        deltas = {}
+        for granularity in TABLES:
+            keys = np.array([
+                f"{(t or '').lower()}|{c}|{bucket_start(ts, granularity).isoformat()}"
+                for t, c, ts in zip(types, cells, stamps)
+            ], dtype=object)
+            uniq, inverse = np.unique(keys, return_inverse=True)
+            inverse = inverse.ravel()
+            counts = np.bincount(inverse)
+            sums = np.bincount(inverse, weights=values)
+            sum_sq = np.bincount(inverse, weights=values * values)
+            mins = np.full(len(uniq), np.inf)
+            maxs = np.full(len(uniq), -np.inf)
+            np.minimum.at(mins, inverse, values)
+            np.maximum.at(maxs, inverse, values)
+            for i, key in enumerate(uniq):
+                type_cat, cell, bucket = key.split("|")
+                deltas[(granularity, type_cat, cell, datetime.fromisoformat(bucket))] = [
+                    int(counts[i]), float(sums[i]), float(sum_sq[i]), float(mins[i]), float(maxs[i])
+                ]
+        apply_deltas(conn, deltas)
+    db.commit()
+    return {"observations": rows_seen, **{g: db.query(t).count() for g, t in TABLES.items()}}
+
+def ensure_built(db):
+    # One-time backfill for databases that predate the rollup tables
+    if db.query(models.ObservationRollupHourly.type).first() is None and \
+            db.query(models.Observation.id).filter(models.Observation.is_valid == True).first() is not None:
+        print("Building observation rollups...")
+        print(f"Rollups built: {rebuild(db)}")
+
+def totals(db, type_cat: str, since: datetime = None, until: datetime = None, granularity: str = "hourly"):
+    """
+    (count, mean, std, min, max) of valid observations of a type over a time range,
+    computed from the rollups. Buckets are included by their start time.
+    """
+    table = TABLES[granularity]
+    stmt = select(func.sum(table.count), func.sum(table.sum), func.sum(table.sum_sq), func.min(table.min), func.max(table.max)).where(
+        table.type == (type_cat or "").lower()
+    )
+    if since is not None:
+        stmt = stmt.where(table.bucket_start >= bucket_start(since, granularity))
+    if until is not None:
+        stmt = stmt.where(table.bucket_start < until)
+    count, total, total_sq, lo, hi = db.execute(stmt).one()
+    if not count:
+        return 0, None, None, None, None
+    mean = total / count
+    std = float(np.sqrt(max(total_sq / count - mean * mean, 0.0)))
+    return int(count), mean, std, lo, hi
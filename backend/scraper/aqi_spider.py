@@ -1,5 +1,6 @@
 import scrapy
 import re
+from datetime import datetime
 
 class AQISpider(scrapy.Spider):
     name = "aqi"
@@ -88,11 +89,23 @@ class AQISpider(scrapy.Spider):
             }
             lat, long = coords.get(city, (0.0, 0.0))
 
+        # Station's own measurement time (unix seconds), so a rerun over an unchanged page is
+        # recognised as the same reading however much later it runs
+        measured_at = None
+        utime = response.css("#aqiwgtutime::attr(val)").get()
+        if not utime:
+            time_match = re.search(r'["\']time["\']\s*:\s*\{[^}]*["\']v["\']\s*:\s*(\d+)', response.text)
+            utime = time_match.group(1) if time_match else None
+        if utime and utime.isdigit():
+            measured_at = datetime.fromtimestamp(int(utime))
+
         if value > 0:
             yield {
                 "type": "air",
                 "value": value,
                 "lat": lat,
                 "long": long,
-                "source": "scraper_aqicn"
+                "source": "scraper_aqicn",
+                "station": city,
+                "measured_at": measured_at
             }
@@ -1,31 +1,63 @@
 import sys
 import os
+import time
 
 # Add parent directory to path to import backend models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import SessionLocal, Observation
+import rollups
+import metrics
+from dedup_index import dedup_index, DEDUP_MODE
 # We need to install the dependencies in the environment running this spider
 
 class SaveToPostgresPipeline:
     def open_spider(self, spider):
+        rollups.install(SessionLocal) # Keep the hourly/daily rollups in sync with scraped rows
         self.db = SessionLocal()
+        dedup_index.rebuild(self.db)
 
     def process_item(self, item, spider):
+        # Skip readings already stored by a previous run: same source and station, and the same
+        # measurement time when the page gives one (ingest time otherwise)
+        measured_at = item.get("measured_at")
+        station = item.get("station")
+        duplicate_of = None
+        if DEDUP_MODE != "off":
+            duplicate_of = dedup_index.find(item["type"], item["value"], item["lat"], item["long"], measured_at, item["source"], station)
+        if duplicate_of is not None and DEDUP_MODE == "merge":
+            metrics.SCRAPER_ITEMS.labels(spider.name, "duplicate_skipped").inc()
+            return item
+
         # Create Observation
-        # Check if already exists? For now just append as new reading
         obs = Observation(
             type=item["type"],
             value=item["value"],
             lat=item["lat"],
             long=item["long"],
-            is_valid=True, # Trusted source
+            is_valid=duplicate_of is None, # Trusted source
             source=item["source"],
+            details={"station": station} if station else None,
             outlier_score=0.0
         )
+        if measured_at is not None:
+            obs.timestamp = measured_at
+        if duplicate_of is not None:
+            obs.validation_status = "duplicate"
+            obs.validation_report = {"duplicate_of": duplicate_of}
         self.db.add(obs)
-        self.db.commit()
+        with metrics.SCRAPER_DB_COMMIT.labels(spider.name).time():
+            self.db.commit()
+        metrics.SCRAPER_ITEMS.labels(spider.name, "stored" if duplicate_of is None else "duplicate").inc()
+        if duplicate_of is None:
+            dedup_index.add(obs.type, obs.value, obs.lat, obs.long, obs.timestamp, obs.id, obs.source, station)
         return item
 
     def close_spider(self, spider):
         self.db.close()
+        # Picked up by the API's /metrics (see metrics.SCRAPER_METRICS_FILE)
+        metrics.SCRAPER_LAST_RUN.labels(spider.name).set(time.time())
+        try:
+            metrics.SCRAPER_REGISTRY.write_textfile(metrics.SCRAPER_METRICS_FILE)
+        except OSError as e:
+            print(f"Could not write scraper metrics: {e}")
@@ -0,0 +1,154 @@
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import models
+from geo_cells import parse_cell_id
+
+# Chart-ready time series for the Recharts views.
+# Observations are streamed from the DB in chunks and reduced on the fly into time buckets
+# that keep each bucket's min and max point, so memory stays O(points) however long the
+# range is. The candidates are then downsampled with Largest-Triangle-Three-Buckets (LTTB),
+# which keeps the visual shape (peaks, dips) far better than averaging, or returned as
+# min/max pairs per bucket.
+
+DEFAULT_POINTS = 500
+MAX_POINTS = int(os.getenv("SERIES_MAX_POINTS", 5000))
+DEFAULT_RANGE_DAYS = 7
+CANDIDATES_PER_POINT = 4 # Streaming buckets per output point fed into LTTB
+STREAM_BATCH_SIZE = 10000
+
+def lttb(x, y, n_out: int):
+    """
+    Largest-Triangle-Three-Buckets downsampling. x must be sorted.
+    Returns the indices of the selected points (always including the first and last).
+    """
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Average of the next bucket (the last point for the final bucket)
+        if i < n_out - 3:
+            next_start, next_end = end, int((i + 2) * every) + 1
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+class StreamingBucketReducer:
+    """
+    Keeps the min and max point of each of n_buckets equal time buckets over [t0, t1).
+    """
+    def __init__(self, t0: float, t1: float, n_buckets: int):
+        self.t0 = t0
+        self.width = max(t1 - t0, 1e-9) / n_buckets
+        self.n_buckets = n_buckets
+        self.count = np.zeros(n_buckets, dtype=np.int64)
+        self.min_v = np.full(n_buckets, np.inf)
+        self.min_t = np.zeros(n_buckets)
+        self.max_v = np.full(n_buckets, -np.inf)
+        self.max_t = np.zeros(n_buckets)
+
+    def add(self, t, v):
+        b = np.clip(((t - self.t0) / self.width).astype(np.int64), 0, self.n_buckets - 1)
+        np.add.at(self.count, b, 1)
+        # Chunk-local min/max per bucket: sort by (bucket, value), take the ends of each run
+        order = np.lexsort((v, b))
+        b_sorted = b[order]
+        starts = np.flatnonzero(np.r_[True, b_sorted[1:] != b_sorted[:-1]])
+        ends = np.r_[starts[1:], len(order)] - 1
+        buckets = b_sorted[starts]
+        lo, hi = order[starts], order[ends]
+
+        better = v[lo] < self.min_v[buckets]
+        self.min_v[buckets[better]] = v[lo][better]
+        self.min_t[buckets[better]] = t[lo][better]
+        better = v[hi] > self.max_v[buckets]
+        self.max_v[buckets[better]] = v[hi][better]
+        self.max_t[buckets[better]] = t[hi][better]
+
+    def points(self):
+        """
+        Time-sorted (t, v) arrays with the min and max point of every non-empty bucket.
+        """
+        filled = self.count > 0
+        t = np.concatenate([self.min_t[filled], self.max_t[filled]])
+        v = np.concatenate([self.min_v[filled], self.max_v[filled]])
+        order = np.lexsort((v, t))
+        t, v = t[order], v[order]
+        keep = np.r_[True, (t[1:] != t[:-1]) | (v[1:] != v[:-1])] # Same point as min and max
+        return t[keep], v[keep]
+
+class SeriesService:
+    def get_series(self, db: Session, type_cat: str, region: str = None, start: datetime = None, end: datetime = None,
+                   points: int = DEFAULT_POINTS, method: str = "lttb"):
+        """
+        Downsampled (time, value) series of valid observations of a type, optionally
+        restricted to a geo cell (region id from geo_cells.py). Raises ValueError on bad input.
+        """
+        if method not in ("lttb", "minmax"):
+            raise ValueError("method must be 'lttb' or 'minmax'")
+        points = max(3, min(int(points), MAX_POINTS))
+        # Timestamps are stored as naive local time
+        start, end = [ts.astimezone().replace(tzinfo=None) if ts and ts.tzinfo else ts for ts in (start, end)]
+        end = end or datetime.now()
+        start = start or end - timedelta(days=DEFAULT_RANGE_DAYS)
+        if start >= end:
+            raise ValueError("'from' must be before 'to'")
+
+        conditions = [
+            models.Observation.type == type_cat,
+            models.Observation.is_valid == True,
+            models.Observation.timestamp >= start,
+            models.Observation.timestamp < end,
+            models.Observation.value.isnot(None)
+        ]
+        if region and region != "global":
+            size, row, col = parse_cell_id(region)
+            lat0, long0 = row * size - 90.0, col * size - 180.0
+            conditions += [
+                models.Observation.lat >= lat0, models.Observation.lat < lat0 + size,
+                models.Observation.long >= long0, models.Observation.long < long0 + size
+            ]
+
+        n_buckets = points // 2 if method == "minmax" else points * CANDIDATES_PER_POINT
+        reducer = StreamingBucketReducer(start.timestamp(), end.timestamp(), n_buckets)
+        stmt = select(models.Observation.timestamp, models.Observation.value).where(*conditions).execution_options(yield_per=STREAM_BATCH_SIZE)
+        raw_points = 0
+        for partition in db.execute(stmt).partitions():
+            t = np.fromiter((ts.timestamp() for ts, _ in partition), dtype=float, count=len(partition))
+            v = np.fromiter((value for _, value in partition), dtype=float, count=len(partition))
+            reducer.add(t, v)
+            raw_points += len(partition)
+
+        t, v = reducer.points()
+        if method == "lttb":
+            idx = lttb(t, v, points)
+            t, v = t[idx], v[idx]
+
+        return {
+            "type": type_cat,
+            "region": region or "global",
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "method": method,
+            "raw_points": raw_points,
+            "points": [{"time": datetime.fromtimestamp(ts).isoformat(), "value": round(float(val), 4)} for ts, val in zip(t, v)]
+        }
+
+series_service = SeriesService()
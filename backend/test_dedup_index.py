@@ -0,0 +1,116 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+
+import main
+import models
+from dedup_index import DuplicateIndex, origin_of
+
+# Near-duplicate detection at ingest (dedup_index.py and POST /api/observe): only readings from
+# the same sender match, neighbours across cell and time-bucket edges are found, and the
+# merge / flag / off modes behave as documented. Validation and geocoding are replaced by
+# counting fakes, so no external call is made.
+
+T0 = datetime(2026, 3, 1, 12, 0, 0)
+
+def test_same_sender_matches():
+    index = DuplicateIndex(cell_size=0.005, window=600, tolerance=0.02)
+    index.add("air", 100.0, 28.6100, 77.2100, T0, 1, "manual", "client-a")
+    assert index.find("Air", 101.0, 28.6101, 77.2101, T0 + timedelta(seconds=30), "manual", "client-a") == 1
+    assert index.find("air", 103.0, 28.6100, 77.2100, T0, "manual", "client-a") is None # Beyond 2%
+    assert index.find("air", 100.0, 28.6100, 77.2100, T0 + timedelta(seconds=601), "manual", "client-a") is None
+    assert index.find("water", 100.0, 28.6100, 77.2100, T0, "manual", "client-a") is None
+
+def test_different_sender_never_matches():
+    index = DuplicateIndex()
+    index.add("air", 100.0, 28.61, 77.21, T0, 1, "manual", "client-a")
+    assert index.find("air", 100.0, 28.61, 77.21, T0, "manual", "client-b") is None
+    assert index.find("air", 100.0, 28.61, 77.21, T0, "scraper_aqicn", "client-a") is None
+    # Without a sender id a reading is neither matched nor indexed
+    assert index.find("air", 100.0, 28.61, 77.21, T0, "manual", None) is None
+    index.add("air", 50.0, 28.61, 77.21, T0, 2, "manual", None)
+    assert index.stats()["entries"] == 1
+
+def test_origin_of():
+    assert origin_of({"device_id": 7, "aqi": 40}) == "7"
+    assert origin_of({"station": "delhi"}) == "delhi"
+    assert origin_of({"client_id": "abc"}) == "abc"
+    assert origin_of({"aqi": 40}) is None and origin_of(None) is None
+
+@pytest.mark.parametrize("dt_seconds", [-1, 1]) # Either side of a time-bucket boundary
+@pytest.mark.parametrize("d_lat", [-0.0001, 0.0001]) # Either side of a cell boundary
+def test_bucket_edge_neighbours(dt_seconds, d_lat):
+    index = DuplicateIndex(cell_size=0.005, window=600)
+    bucket_edge = datetime.fromtimestamp((int(T0.timestamp()) // 600 + 1) * 600)
+    cell_edge_lat = 28.610 - (28.610 + 90.0) % 0.005 + 0.005 # A multiple of the cell size
+    index.add("air", 80.0, cell_edge_lat - d_lat, 77.21, bucket_edge - timedelta(seconds=dt_seconds), 1, "iot", "s1")
+    assert index.find("air", 80.0, cell_edge_lat + d_lat, 77.21, bucket_edge + timedelta(seconds=dt_seconds), "iot", "s1") == 1
+
+class _FakeValidation:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value, lat, long, type_cat="air", details=None, is_expert=False):
+        self.calls += 1
+        return True, {"reliability_score": 91.0, "ml_status": "Passed"}, False
+
+@pytest.fixture
+def api(monkeypatch):
+    validation = _FakeValidation()
+    monkeypatch.setattr(main.ml_service, "validate_observation", validation)
+    monkeypatch.setattr(main.geocoder, "get_location_name", lambda lat, long: "Testville")
+    monkeypatch.setattr(main, "dedup_index", DuplicateIndex())
+    with models.SessionLocal() as db:
+        db.query(models.Observation).delete()
+        db.commit()
+    return TestClient(main.app), validation
+
+def _post(client, value=120.0, client_id="browser-1"):
+    details = {"aqi": value}
+    if client_id:
+        details["client_id"] = client_id
+    response = client.post("/api/observe", json={"type": "air", "value": value, "lat": 28.61, "long": 77.21, "details": details})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _row_count():
+    with models.SessionLocal() as db:
+        return db.query(models.Observation).count()
+
+def test_flag_mode_stores_duplicate_without_revalidating(api, monkeypatch):
+    client, validation = api
+    monkeypatch.setattr(main, "DEDUP_MODE", "flag")
+    first = _post(client)
+    second = _post(client, 121.0)
+    third = _post(client, 120.5)
+    assert validation.calls == 1 # Duplicates copy the original's verdict
+    assert first["validation_status"] == "auto" and first["is_valid"]
+    for dup in (second, third):
+        assert dup["validation_status"] == "duplicate" and not dup["is_valid"]
+        assert dup["validation_report"]["duplicate_of"] == first["id"] # Flagged rows never become originals
+        assert dup["validation_report"]["original_status"] == "auto"
+        assert dup["outlier_score"] == first["outlier_score"]
+    assert _row_count() == 3
+
+def test_merge_mode_returns_original(api, monkeypatch):
+    client, validation = api
+    monkeypatch.setattr(main, "DEDUP_MODE", "merge")
+    first = _post(client)
+    second = _post(client, 121.0)
+    assert second["id"] == first["id"] and validation.calls == 1 and _row_count() == 1
+
+def test_off_mode_keeps_everything(api, monkeypatch):
+    client, validation = api
+    monkeypatch.setattr(main, "DEDUP_MODE", "off")
+    first, second = _post(client), _post(client)
+    assert first["id"] != second["id"] and validation.calls == 2
+    assert second["validation_status"] == "auto"
+
+def test_reports_from_different_people_are_kept(api, monkeypatch):
+    client, validation = api
+    monkeypatch.setattr(main, "DEDUP_MODE", "merge")
+    a = _post(client, 120.0, "browser-1")
+    b = _post(client, 121.0, "browser-2")
+    c, d = _post(client, 120.0, None), _post(client, 120.0, None) # No client id: never deduplicated
+    assert len({a["id"], b["id"], c["id"], d["id"]}) == 4 and validation.calls == 4
+    assert all(r["validation_status"] == "auto" for r in (a, b, c, d))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+
+from validation_service import LocalNeighborhoodValidator
+
+# Local consistency check (validation_service.LocalNeighborhoodValidator): below the
+# minimum neighbour count the check defers to external sources; above it, a reading is
+# judged by its robust z-score against the median and MAD of nearby recent readings.
+
+LAT, LONG = 28.61, 77.21
+
+def _validator(values, min_neighbors=8, max_z=6.0, spread_km=3.0, type_cat="air", timestamp=None):
+    validator = LocalNeighborhoodValidator()
+    validator.min_neighbors, validator.max_z = min_neighbors, max_z
+    rng = np.random.default_rng(0)
+    for value in values:
+        # Scattered within a few km, across cell boundaries
+        d_lat, d_long = rng.uniform(-1, 1, 2) * spread_km / 111.0
+        validator.add(type_cat, value, LAT + d_lat, LONG + d_long, timestamp)
+    return validator
+
+@pytest.mark.parametrize("n_neighbors,covered", [(0, False), (7, False), (8, True), (30, True)])
+def test_minimum_neighbours(n_neighbors, covered):
+    result = _validator([100.0] * n_neighbors).check("air", LAT, LONG, 100.0)
+    assert result[0] is covered
+    if not covered: # Deferred: never a rejection, no reference
+        assert result[1:4] == (True, "Insufficient local coverage", None)
+        assert result[4] == {"local_neighbors": n_neighbors}
+
+def test_only_near_recent_same_type_readings_count():
+    validator = _validator([100.0] * 6)
+    validator.add("Air", 100.0, LAT + 0.01, LONG) # Type is case-insensitive
+    validator.add("water", 100.0, LAT, LONG)
+    validator.add("air", 100.0, LAT + 0.2, LONG) # ~22 km away
+    validator.add("air", 100.0, LAT, LONG, datetime.now() - timedelta(hours=7)) # Outside the 6 h window
+    assert len(validator.neighbors("air", LAT, LONG)) == 7
+    assert not validator.check("air", LAT, LONG, 100.0)[0]
+    validator.add("air", 100.0, LAT, LONG + 0.05) # ~5 km east
+    assert validator.check("air", LAT, LONG, 100.0)[0]
+
+VALUES = [90.0, 95.0, 98.0, 100.0, 100.0, 102.0, 105.0, 110.0, 400.0] # One bad neighbour
+
+def _robust_z(values, value, min_spread=0.05):
+    values = np.asarray(values)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    return abs(value - median) / max(1.4826 * mad, min_spread * abs(median), 1e-6), median, mad
+
+@pytest.mark.parametrize("value", [100.0, 130.0, 160.0, 200.0, 20.0])
+def test_median_mad_decision(value):
+    covered, is_valid, msg, ref, meta = _validator(VALUES).check("air", LAT, LONG, value)
+    z, median, mad = _robust_z(VALUES, value)
+    assert covered and ref == median == 100.0 # The 400 does not move the reference
+    assert meta["local_median"] == 100.0 and meta["local_mad"] == round(mad, 2) and meta["local_z"] == round(z, 2)
+    assert is_valid == (z <= 6.0)
+    assert msg.startswith("Consistent with" if is_valid else "Local Consistency Conflict")
+
+def test_min_spread_for_uniform_neighbourhoods():
+    # MAD is 0: the 5 % floor keeps small changes from being rejected
+    validator = _validator([100.0] * 10)
+    assert validator.check("air", LAT, LONG, 125.0)[1] # z = 25 / 5 = 5
+    assert not validator.check("air", LAT, LONG, 131.0)[1] # z = 6.2
+    assert validator.check("air", LAT, LONG, 131.0)[4]["local_mad"] == 0.0
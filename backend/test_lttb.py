@@ -0,0 +1,37 @@
+import numpy as np
+from series_service import lttb
+
+# LTTB downsampling behind /api/v1/series: exact output length, first and last point kept,
+# increasing indices, pass-through when nothing needs dropping, and peaks survive.
+
+def test_output_length_and_endpoints():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 1000, 5000))
+    y = rng.normal(0, 1, 5000)
+    for n_out in (3, 4, 10, 99, 500, 4999):
+        idx = lttb(x, y, n_out)
+        assert len(idx) == n_out, n_out
+        assert idx[0] == 0 and idx[-1] == len(x) - 1, n_out
+        assert np.all(np.diff(idx) > 0), n_out # One point per bucket, in order
+
+def test_pass_through():
+    x = np.arange(10, dtype=float)
+    y = x ** 2
+    for n_out in (10, 11, 1000):
+        assert list(lttb(x, y, n_out)) == list(range(10))
+    assert list(lttb(x[:2], y[:2], 1)) == [0, 1] # Too short to reduce
+    assert list(lttb(x, y, 2)) == [0, 9]
+    assert len(lttb(np.array([]), np.array([]), 5)) == 0
+
+def test_keeps_spikes():
+    x = np.arange(10000, dtype=float)
+    y = np.zeros(10000)
+    y[[1234, 5678, 8001]] = [50.0, -40.0, 75.0]
+    idx = lttb(x, y, 100)
+    assert {1234, 5678, 8001} <= set(idx.tolist())
+
+if __name__ == "__main__":
+    test_output_length_and_endpoints()
+    test_pass_through()
+    test_keeps_spikes()
+    print("LTTB: length, endpoints and pass-through OK")
@@ -0,0 +1,70 @@
+import numpy as np
+import metrics
+from ml_service import AdvancedOutlierDetector
+from ml_monitoring import RollingFeatureStats, ScoringMonitor, feature_snapshot, psi, MIN_DRIFT_SAMPLES
+
+# Drift monitoring (ml_monitoring.py): the Welford add/remove updates of the sliding window
+# agree with numpy over the same rows, and PSI matches the textbook formula on the window.
+# Scoring latency goes to metrics.ML_SCORING, one series per ensemble member.
+
+def _rows(rng, n, shift=0.0):
+    return np.column_stack([rng.lognormal(4, 0.5, n) + shift, rng.uniform(8, 37, n), rng.uniform(68, 97, n)])
+
+def test_welford_matches_numpy_on_sliding_window():
+    rng = np.random.default_rng(0)
+    rows = _rows(rng, 3000)
+    stats = RollingFeatureStats(window=250)
+    for i, row in enumerate(rows):
+        stats.add(row)
+        if i % 97 == 0 or i == len(rows) - 1:
+            window = rows[max(0, i - 249):i + 1]
+            assert np.allclose(stats.mean, window.mean(axis=0), rtol=1e-9), i
+            if len(window) > 1:
+                var = stats.m2 / (len(window) - 1)
+                assert np.allclose(var, window.var(axis=0, ddof=1), rtol=1e-6), i
+    assert stats.seen == 3000 and len(stats.rows) == 250
+
+def test_psi_against_numpy():
+    rng = np.random.default_rng(1)
+    train = _rows(rng, 5000)
+    snapshot = feature_snapshot(train)
+    stats = RollingFeatureStats(window=1000)
+    for row in _rows(rng, 1500, shift=40.0): # Only the value feature moves
+        stats.add(row)
+
+    window = np.array(stats.rows)
+    drift = stats.drift(snapshot)
+    for i, name in enumerate(("value", "lat", "long")):
+        edges = np.quantile(train[:, i], np.linspace(0, 1, 11)[1:-1])
+        expected = np.histogram(train[:, i], bins=np.concatenate([[-np.inf], edges, [np.inf]]))[0] / len(train)
+        actual = np.histogram(window[:, i], bins=np.concatenate([[-np.inf], edges, [np.inf]]))[0] / len(window)
+        expected, actual = np.clip(expected, 1e-4, None), np.clip(actual, 1e-4, None)
+        reference = np.sum((actual - expected) * np.log(actual / expected))
+        assert abs(drift["psi"][name] - reference) < 1e-3, name
+    assert drift["psi"]["value"] > 0.25 > max(drift["psi"]["lat"], drift["psi"]["long"])
+    assert drift["status"] == "significant" and drift["retrain_recommended"]
+    assert psi([0.5, 0.5], [0.5, 0.5]) == 0.0
+
+def test_monitor_report_baselines():
+    rng = np.random.default_rng(2)
+    monitor = ScoringMonitor(window=500)
+    meta = {"version": "v1", "feature_snapshot": {"*": feature_snapshot(_rows(rng, 2000))}}
+    for value, lat, long in _rows(rng, MIN_DRIFT_SAMPLES - 1):
+        monitor.observe("Air", value, lat, long)
+    report = monitor.report(meta)
+    assert report["model_version"] == "v1"
+    assert report["drift"]["air"]["status"] == "insufficient_data"
+    monitor.observe("air", 50.0, 20.0, 80.0)
+    report = monitor.report(meta)
+    assert report["drift"]["air"]["status"] == "stable" and report["drift"]["air"]["baseline"] == "*"
+    assert monitor.report({})["drift"]["air"] == {"status": "no_training_snapshot"}
+
+def test_scoring_latency_per_member():
+    rng = np.random.default_rng(3)
+    detector = AdvancedOutlierDetector(load_persisted=False, cold_start=False, name="test_member_timing")
+    detector.fit(_rows(rng, 300))
+    detector.check_outlier(60.0, 20.0, 80.0)
+    detector.check_outliers([60.0, 900.0], [20.0, 20.0], [80.0, 80.0])
+    for member in ("isolation_forest", "lof", "one_class_svm"):
+        counts, total = metrics.ML_SCORING.labels("test_member_timing", member).snapshot()
+        assert sum(counts) == 2 and total > 0, member
@@ -0,0 +1,101 @@
+import os
+import json
+import pytest
+import numpy as np
+
+import model_registry
+import ml_service as m
+from model_registry import ModelRegistry, training_hash
+
+# Versioned model store (model_registry.py): save, activate, prune and memory-mapped load,
+# and the cold-start path in ml_service: the cached training set and the cold-start model are
+# both regenerated once training_data.json changes. Everything lives in a per-test directory.
+
+def _meta(X):
+    return {"training_hash": training_hash(X), "n_samples": len(X), "fit_seconds": 0.1}
+
+def test_save_activate_load(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    X1, X2 = np.zeros((5, 3)), np.ones((5, 3))
+    v1 = registry.save("m", {"weights": np.arange(1000.0)}, _meta(X1))
+    v2 = registry.save("m", {"weights": np.arange(1000.0) * 2}, _meta(X2), activate=False)
+    assert v1 != v2 and v1.startswith("m-") and v1.endswith(training_hash(X1)[:8])
+    assert registry.describe("m")["version"] == v1 # Not activated
+
+    payload, meta = registry.load("m")
+    assert meta["version"] == v1 and meta["n_samples"] == 5
+    assert isinstance(payload["weights"], np.memmap) and payload["weights"][999] == 999.0
+    assert registry.load("m", v2)[0]["weights"][999] == 1998.0
+
+    registry.activate("m", v2)
+    assert registry.describe("m")["version"] == v2
+    assert json.load(open(tmp_path / "registry.json"))["models"]["m"]["active"] == v2
+    with pytest.raises(KeyError):
+        registry.activate("m", "m-unknown")
+    assert registry.load("other") == (None, None)
+
+    os.remove(tmp_path / f"{v2}.joblib") # Listed but missing on disk
+    assert registry.load("m") == (None, None)
+
+def test_prune_keeps_the_active_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "MAX_VERSIONS_KEPT", 3)
+    registry = ModelRegistry(str(tmp_path))
+    active = registry.save("m", {"x": 0}, _meta(np.zeros((1, 3))))
+    open(registry.path_prefix(active) + ".grid.npy", "wb").close()
+    first = registry.save("m", {"x": 1}, _meta(np.ones((1, 3))), activate=False)
+    open(registry.path_prefix(first) + ".grid.npy", "wb").close()
+    for i in range(2, 5):
+        registry.save("m", {"x": i}, _meta(np.full((1, 3), i)), activate=False)
+
+    kept = [v["version"] for v in registry.list_models()["m"]["versions"]]
+    assert len(kept) == 3 and kept[0] == active # The oldest, but active
+    assert first not in kept
+    assert not any(p.name.startswith(first) for p in tmp_path.iterdir()) # Derived files go too
+    assert os.path.exists(registry.path_prefix(active) + ".grid.npy")
+    assert sorted(p.name for p in tmp_path.glob("*.joblib")) == sorted(f"{v}.joblib" for v in kept)
+
+def _write_training_data(path, value):
+    with open(path, "w") as f:
+        json.dump([{"value": value, "lat": 13.08, "long": 80.27}, {"value": value * 2, "lat": 28.61, "long": 77.21}], f)
+
+def test_cold_start_cache_follows_training_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "registry", ModelRegistry(str(tmp_path)))
+    data = tmp_path / "training_data.json"
+    _write_training_data(data, 50)
+    X = m.cold_start_training_set(str(data), max_rows=4000)
+    caches = list(tmp_path.glob("cold_start_*.npy"))
+    assert len(caches) == 1 and len(X) == 2 * m.N_PER_REGION + 2 * m.N_PER_CLUSTER # Regions plus one cluster per city
+    assert caches[0].name.startswith(f"cold_start_{model_registry.file_hash(str(data))[:16]}_")
+
+    # Unchanged file: served from the cache, the JSON is not parsed again
+    def fail(path):
+        raise AssertionError("cache not used")
+    monkeypatch.setattr(m, "_real_training_points", fail)
+    assert np.array_equal(m.cold_start_training_set(str(data), max_rows=4000), X)
+
+    monkeypatch.undo()
+    monkeypatch.setattr(m, "registry", ModelRegistry(str(tmp_path)))
+    _write_training_data(data, 90)
+    X_new = m.cold_start_training_set(str(data), max_rows=4000)
+    assert not np.array_equal(X_new, X)
+    assert [p.name for p in tmp_path.glob("cold_start_*.npy")] != [caches[0].name] # Old cache replaced
+    assert len(list(tmp_path.glob("cold_start_*.npy"))) == 1
+
+def test_stale_cold_start_model_is_retrained(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "registry", ModelRegistry(str(tmp_path)))
+    data = tmp_path / "training_data.json"
+    _write_training_data(data, 50)
+    monkeypatch.setattr(m, "TRAINING_DATA_PATH", str(data))
+    monkeypatch.setattr(m, "cold_start_training_set", lambda: np.random.default_rng(0).uniform(0, 100, (200, 3)))
+
+    first = m.AdvancedOutlierDetector(name="test_cold_start")
+    assert m.registry.describe("test_cold_start")["source"] == "cold_start"
+    assert m.AdvancedOutlierDetector(name="test_cold_start").version == first.version # Loaded, not refitted
+
+    _write_training_data(data, 90)
+    fresh = m.AdvancedOutlierDetector(load_persisted=False, cold_start=False, name="test_cold_start")
+    assert not fresh.load() # Stale once the JSON changed
+    assert fresh.load(first.version) # An explicitly requested version still loads
+    second = m.AdvancedOutlierDetector(name="test_cold_start")
+    assert second.version != first.version
+    assert m.registry.describe("test_cold_start")["training_data_hash"] == model_registry.file_hash(str(data))
@@ -0,0 +1,150 @@
+import pytest
+from datetime import datetime, timedelta
+
+import models
+from news_service import news_service
+from news_ingestion import (
+    simhash, hamming_distance, SimHashIndex, NewsIngestionPipeline, FixtureNewsSource,
+    tag_category, tag_location, NEAR_DUPLICATE_DISTANCE, SIMHASH_BITS
+)
+
+# News ingestion (news_ingestion.py) against the throwaway test database, fed by
+# FixtureNewsSource: SimHash near-duplicates, the banded index, the per-feed cursor,
+# category/location tagging, and the geofenced lookup used for news corroboration.
+
+STORY = (
+    "Thick smog blanketed New Delhi on Monday as the air quality index crossed 400, with "
+    "stubble burning in neighbouring states and low wind speeds trapping particulate matter. "
+    "Schools were asked to move classes online and construction work was halted across the "
+    "capital while authorities sprayed water on main roads to settle dust."
+)
+
+def _article(title, hours_ago, description="", url=None, **extra):
+    return {
+        "title": title,
+        "description": description,
+        "url": url or f"https://example.org/{abs(hash(title))}",
+        "source": "TEST WIRE",
+        "published_at": (datetime(2026, 3, 1, 12) - timedelta(hours=hours_ago)).isoformat(),
+        **extra
+    }
+
+@pytest.fixture
+def db():
+    models.Base.metadata.create_all(bind=models.engine)
+    session = models.SessionLocal()
+    session.query(models.NewsArticle).delete()
+    session.query(models.NewsFeedCursor).delete()
+    session.commit()
+    yield session
+    session.close()
+
+def test_simhash_near_duplicates():
+    assert simhash(STORY) == simhash(STORY.upper() + "  ") # Case and whitespace do not matter
+    assert simhash(STORY) == simhash(STORY.replace(",", " ;")) # So does punctuation
+    credited = STORY + " (PTI)" # Syndicated copy with the agency credit appended
+    assert hamming_distance(simhash(STORY), simhash(credited)) <= NEAR_DUPLICATE_DISTANCE
+    edited = STORY.replace("Monday", "Tuesday")
+    unrelated = "Ecologists recorded three orchid species in the Western Ghats during the census."
+    assert hamming_distance(simhash(STORY), simhash(edited)) < 16 < hamming_distance(simhash(STORY), simhash(unrelated))
+    assert simhash("") == 0
+
+def test_simhash_index_lookup():
+    index = SimHashIndex()
+    base = simhash(STORY)
+    index.add(base, 1)
+    assert index.find_near(base) == 1
+    # Three flipped bits, one in each of three bands: still found through the fourth band
+    band_bits = SIMHASH_BITS // index.bands
+    near = base ^ (1 << 0) ^ (1 << band_bits) ^ (1 << 2 * band_bits)
+    assert index.find_near(near) == 1
+    assert index.find_near(near ^ (1 << 3 * band_bits)) is None # Four bits away
+    assert index.find_near(simhash("unrelated story about rainfall in Kochi")) is None
+
+def test_category_and_location_tagging():
+    assert tag_category("AQI crosses 400 as smog and haze return") == "air"
+    assert tag_category("Sewage contamination found in the river") == "water"
+    assert tag_category("Council meeting postponed", default="general") == "general"
+    assert tag_location("Smog returns to New Delhi") == ("New Delhi", 28.61, 77.21) # Longest name wins
+    assert tag_location("Flooding in Chennai suburbs")[0] == "Chennai"
+    assert tag_location("No place named here") == (None, None, None)
+
+def test_cursor_incremental_fetch_and_tagging(db):
+    articles = [
+        _article("Smog chokes New Delhi as AQI crosses 400", 5, STORY),
+        _article("Sewage contamination in the Ganga near Patna", 4, "Untreated sewage flows into the river."),
+        _article("Leopard sighted in Western Ghats forest corridor", 3, "Wildlife officials track the habitat."),
+    ]
+    source = FixtureNewsSource(articles=articles)
+    pipeline = NewsIngestionPipeline(sources=[source])
+
+    first = pipeline.run(db)["fixture"]
+    assert first == {"fetched": 3, "new": 3, "duplicates": 0}
+    stored = {a.title: a for a in db.query(models.NewsArticle).all()}
+    delhi = stored["Smog chokes New Delhi as AQI crosses 400"]
+    assert (delhi.category, delhi.location, delhi.lat, delhi.long) == ("air", "New Delhi", 28.61, 77.21)
+    assert stored["Sewage contamination in the Ganga near Patna"].category == "water"
+    assert stored["Leopard sighted in Western Ghats forest corridor"].category == "biodiversity"
+
+    # Nothing newer than the cursor: nothing is fetched again
+    assert pipeline.run(db)["fixture"]["fetched"] == 0
+
+    # A newer article and a syndicated copy of the Delhi story under another URL
+    articles.append(_article("Mumbai construction dust pushes PM10 up", 1, "Particulate levels rise."))
+    articles.append(_article("Smog chokes New Delhi as AQI crosses 400", 1, STORY, url="https://mirror.example.org/delhi"))
+    second = pipeline.run(db)["fixture"]
+    assert second == {"fetched": 2, "new": 1, "duplicates": 1}
+    db.refresh(delhi)
+    assert delhi.syndicated_count == 1
+
+def test_undated_item_does_not_move_cursor(db):
+    articles = [_article("Heatwave warning for Lucknow", 6, "Temperature to cross 45 degrees.")]
+    articles.append({"title": "Undated rainfall bulletin for Kochi", "description": "Monsoon update.", "url": "https://example.org/undated"})
+    pipeline = NewsIngestionPipeline(sources=[FixtureNewsSource(articles=articles)])
+    assert pipeline.run(db)["fixture"]["new"] == 2
+    cursor = db.query(models.NewsFeedCursor).filter(models.NewsFeedCursor.feed == "fixture").one()
+    assert cursor.last_published_at == datetime(2026, 3, 1, 6) # The dated item, not "now"
+
+    # An item published after the dated one but long before now is still picked up
+    articles.append(_article("Cyclone alert for Chennai coast", 3, "Heavy rainfall expected."))
+    assert pipeline.run(db)["fixture"]["new"] == 1
+
+def test_rolled_back_articles_do_not_poison_the_index(db, monkeypatch):
+    articles = [_article("Smog chokes New Delhi as AQI crosses 400", 5, STORY)]
+    pipeline = NewsIngestionPipeline(sources=[FixtureNewsSource(articles=articles)])
+    pipeline.run(db) # Warms the index
+    db.query(models.NewsArticle).delete()
+    db.query(models.NewsFeedCursor).delete()
+    db.commit()
+    pipeline.index = SimHashIndex()
+
+    real_commit = db.commit
+    def failing_commit():
+        monkeypatch.setattr(db, "commit", real_commit)
+        raise RuntimeError("Simulated commit failure")
+    monkeypatch.setattr(db, "commit", failing_commit)
+    assert "error" in pipeline.run(db)["fixture"]
+    assert db.query(models.NewsArticle).count() == 0
+    assert pipeline.index.find_near(simhash(f"{articles[0]['title']} {STORY}")) is None
+
+    # The retry stores the article instead of dropping it as a copy of the rolled-back row
+    assert pipeline.run(db)["fixture"] == {"fetched": 1, "new": 1, "duplicates": 0}
+
+def test_find_relevant_news_geofence_before_limit(db):
+    now = datetime(2026, 3, 1, 12)
+    regional = models.NewsArticle(
+        external_id="regional", title="Smog in Chennai", category="air", source="T",
+        location="Chennai", lat=13.08, long=80.27, published_at=now - timedelta(days=2)
+    )
+    db.add(regional)
+    # 80 newer national-feed articles tagged far away (London) push it out of the newest 50
+    db.add_all([
+        models.NewsArticle(external_id=f"far-{i}", title=f"London air {i}", category="air", source="T",
+                           location="London", lat=51.5, long=-0.12, published_at=now - timedelta(minutes=i))
+        for i in range(80)
+    ])
+    db.commit()
+    nearby = news_service.find_relevant_news("air", 13.0, 80.2)
+    assert [a["title"] for a in nearby] == ["Smog in Chennai"]
+    # Ingested news exists but none is near: no fallback to the mock set
+    assert news_service.find_relevant_news("air", -33.9, 151.2) == []
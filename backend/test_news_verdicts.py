@@ -0,0 +1,78 @@
+import json
+import time
+import threading
+from types import SimpleNamespace
+from validation_service import NewsValidator
+
+# Verdict memoization in NewsValidator.verify_trend_from_news: concurrent reports with the same
+# key share one LLM call, and service errors are not cached. The news feed and the chat client
+# are replaced by in-process fakes, so no network call is made.
+
+class FakeNews:
+    def find_relevant_news(self, type_cat, lat, long):
+        return [{"title": "Dust storm", "description": "Visibility down across the city"}]
+
+class FakeChatClient:
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures # The first `failures` calls raise
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.failures
+        time.sleep(self.delay)
+        if fail:
+            raise RuntimeError("Simulated LLM outage")
+        content = json.dumps({"justified": True, "reason": "Dust storm", "event_type": "Dust Storm"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _validator(client):
+    validator = NewsValidator()
+    validator.news_service = FakeNews()
+    validator.groq_client = client
+    return validator
+
+def test_concurrent_identical_requests_coalesce():
+    client = FakeChatClient(delay=0.3)
+    validator = _validator(client)
+    start = threading.Barrier(8)
+    results = []
+
+    def report():
+        start.wait()
+        results.append(validator.verify_trend_from_news("air", 28.61, 77.21, 400))
+
+    threads = [threading.Thread(target=report) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert client.calls == 1
+    assert len(results) == 8 and all(r == (True, "Dust storm", "Dust Storm") for r in results)
+    # Same value band and cell: still the cached verdict
+    validator.verify_trend_from_news("air", 28.61, 77.21, 405)
+    assert client.calls == 1
+    # Different value band: a new call
+    validator.verify_trend_from_news("air", 28.61, 77.21, 900)
+    assert client.calls == 2
+
+def test_errors_are_not_cached():
+    client = FakeChatClient(failures=1)
+    validator = _validator(client)
+
+    first = validator.verify_trend_from_news("air", 28.61, 77.21, 400)
+    assert first == (False, "News verification service error", "")
+    second = validator.verify_trend_from_news("air", 28.61, 77.21, 400)
+    assert client.calls == 2 and second[0] is True # Retried, not served the error
+    validator.verify_trend_from_news("air", 28.61, 77.21, 400)
+    assert client.calls == 2 # The successful verdict is cached
+
+if __name__ == "__main__":
+    test_concurrent_identical_requests_coalesce()
+    test_errors_are_not_cached()
+    print("NewsValidator: coalescing and error handling OK")
@@ -0,0 +1,41 @@
+import time
+import asyncio
+import threading
+
+import profiler
+
+# Per-request profiling (profiler.RequestProfilerMiddleware): the sampler is stopped off the
+# event loop, so other requests keep being served while its thread is joined.
+
+def test_sampler_is_stopped_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "secret")
+    stopped_on = []
+    real_stop = profiler.StackSampler.stop
+    def slow_stop(self):
+        stopped_on.append(threading.get_ident())
+        time.sleep(0.2) # A sampler thread slow to finish its last sample
+        real_stop(self)
+    monkeypatch.setattr(profiler.StackSampler, "stop", slow_stop)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def main():
+        loop_thread = threading.get_ident()
+        sent, ticks = [], []
+        async def send(message):
+            sent.append(message)
+        async def ticker(): # Another request's work sharing the loop
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        scope = {"type": "http", "headers": [(b"x-profile", b"1"), (b"x-admin-token", b"secret")]}
+        await asyncio.gather(profiler.RequestProfilerMiddleware(app)(scope, None, send), ticker())
+        return loop_thread, sent, ticks
+
+    loop_thread, sent, ticks = asyncio.run(main())
+    assert stopped_on and stopped_on[0] != loop_thread
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.15 # The loop kept running during the join
+    profile_id = dict(sent[0]["headers"])[b"x-profile-id"].decode()
+    assert profiler.profiler.get_request_profile(profile_id) is not None
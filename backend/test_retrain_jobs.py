@@ -0,0 +1,117 @@
+import pytest
+import numpy as np
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import ml_service as m
+
+# Background retrain jobs (ml_service.submit_retrain): status transitions, the detector swap
+# once a job's future resolves, the pool reset after a worker crash, and eviction of finished
+# job records. The process pool is replaced by a fake whose futures the tests resolve.
+
+class FakeExecutor:
+    def __init__(self, *args, **kwargs):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+class FakeDetector:
+    def __init__(self, version):
+        self.version = version
+
+@pytest.fixture
+def jobs(monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(m, "retrain_jobs", {})
+    monkeypatch.setattr(m, "_retrain_executor", executor)
+    monkeypatch.setattr(m, "_started_jobs", object()) # No watcher thread; tests call _mark_running
+    monkeypatch.setattr(m, "ProcessPoolExecutor", FakeExecutor)
+    monkeypatch.setattr(m, "detector", m.detector) # Restored after the swap tests
+    invalidated = []
+    monkeypatch.setattr(m.shards, "invalidate", lambda names=None: invalidated.append(names))
+    monkeypatch.setattr(m, "load_detector_version", lambda version=None: FakeDetector(version))
+    return executor, invalidated
+
+RESULT = {"version": "v2", "shards": {"air@r1": "v2-air"}, "n_samples": 20, "rows_seen": 20}
+
+def _submit(**kwargs):
+    return m.submit_retrain(np.zeros((20, 3)), **kwargs)
+
+def test_status_transitions_and_swap(jobs):
+    executor, invalidated = jobs
+    before = m.detector
+    job = _submit()
+    assert job["status"] == "queued" and m.get_retrain_job(job["job_id"])["status"] == "queued"
+
+    m._mark_running(job["job_id"])
+    assert m.get_retrain_job(job["job_id"])["status"] == "running"
+    assert m.detector is before # Nothing is swapped while the worker fits
+
+    executor.futures[0].set_result(RESULT)
+    done = m.get_retrain_job(job["job_id"])
+    assert done["status"] == "completed" and done["version"] == "v2" and done["finished_at"]
+    assert done["shards"] == RESULT["shards"] and done["n_samples"] == 20
+    assert isinstance(m.detector, FakeDetector) and m.detector.version == "v2"
+    assert invalidated == [["air@r1"]]
+
+    m._mark_running(job["job_id"]) # A late "started" message never reopens a finished job
+    assert m.get_retrain_job(job["job_id"])["status"] == "completed"
+    assert m.get_retrain_job("unknown") is None
+
+def test_callback_wins_the_race_with_the_watcher(jobs):
+    executor, _ = jobs
+    job = _submit()
+    executor.futures[0].set_result(None) # Finished before the "started" message was read
+    m._mark_running(job["job_id"])
+    assert m.get_retrain_job(job["job_id"])["status"] == "skipped"
+
+def test_failed_load_keeps_the_current_detector(jobs, monkeypatch):
+    executor, invalidated = jobs
+    before = m.detector
+    monkeypatch.setattr(m, "load_detector_version", lambda version=None: None)
+    job = _submit()
+    executor.futures[0].set_result(RESULT)
+    failed = m.get_retrain_job(job["job_id"])
+    assert failed["status"] == "failed" and "v2" in failed["error"]
+    assert m.detector is before and invalidated == []
+
+def test_shadow_only_does_not_swap(jobs, monkeypatch):
+    executor, _ = jobs
+    before = m.detector
+    started = []
+    monkeypatch.setattr(m.shadow, "start", lambda version: started.append(version) or True)
+    job = _submit(shadow_only=True)
+    executor.futures[0].set_result(RESULT)
+    assert m.get_retrain_job(job["job_id"])["status"] == "completed"
+    assert started == ["v2"] and m.detector is before
+
+def test_broken_pool_is_reset(jobs):
+    executor, _ = jobs
+    job = _submit()
+    executor.futures[0].set_exception(BrokenProcessPool("worker killed"))
+    assert m.get_retrain_job(job["job_id"])["status"] == "failed"
+    assert m._retrain_executor is None
+
+    # The next job gets a fresh pool instead of failing on the broken one
+    retry = _submit()
+    assert m._retrain_executor is not executor and isinstance(m._retrain_executor, FakeExecutor)
+    assert m.get_retrain_job(retry["job_id"])["status"] == "queued"
+
+def test_finished_jobs_are_evicted(jobs, monkeypatch):
+    executor, _ = jobs
+    monkeypatch.setattr(m, "RETRAIN_JOBS_MAX", 3)
+    ids = [_submit()["job_id"] for _ in range(5)]
+    for future in executor.futures[:4]:
+        future.set_result(None)
+    # Four finished, at most three kept: the oldest goes; the unfinished job is never evicted
+    assert list(m.retrain_jobs) == ids[1:]
+
+    with m._jobs_lock:
+        m.retrain_jobs[ids[1]]["finished_at"] = (datetime.now() - timedelta(seconds=m.RETRAIN_JOB_TTL_SECONDS + 1)).isoformat()
+    newest = _submit()["job_id"] # Eviction also runs on submit
+    assert list(m.retrain_jobs) == ids[2:] + [newest]
+    assert m.get_retrain_job(ids[4])["status"] == "queued"
@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import rollups
+
+# The incrementally maintained rollups (after_flush hook) must equal a full rebuild() after any
+# mix of inserts, validity changes, edits and deletes. The one documented difference: min/max
+# are not shrunk when an observation leaves a bucket, so they may only be wider than rebuilt.
+# Runs against a throwaway SQLite file, never the configured database.
+
+def _snapshot(db):
+    rows = {}
+    for granularity, table in rollups.TABLES.items():
+        for r in db.query(table).all():
+            rows[(granularity, r.type, r.cell, r.bucket_start)] = (r.count, r.sum, r.sum_sq, r.min, r.max)
+    return rows
+
+def _random_observation(rng, start):
+    return models.Observation(
+        type=rng.choice(["air", "Air", "water", "noise"]),
+        value=round(rng.uniform(0, 300), 1),
+        lat=28.6 + rng.uniform(-0.5, 0.5),
+        long=77.2 + rng.uniform(-0.5, 0.5),
+        timestamp=start + timedelta(minutes=rng.randint(0, 3 * 24 * 60)),
+        is_valid=rng.random() < 0.8
+    )
+
+def test_incremental_rollups_match_rebuild():
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'rollups.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        rollups.install(SessionLocal)
+
+        with SessionLocal() as db:
+            # Inserts, in several flushes
+            for _ in range(4):
+                db.add_all([_random_observation(rng, start) for _ in range(150)])
+                db.commit()
+            ids = [o.id for o in db.query(models.Observation.id).all()]
+            rng.shuffle(ids)
+            invalidate, validate, edit, delete = ids[:60], ids[60:100], ids[100:180], ids[180:230]
+
+            # Validity changes both ways (rejections and manual approvals)
+            for obs in db.query(models.Observation).filter(models.Observation.id.in_(invalidate)):
+                obs.is_valid = False
+            for obs in db.query(models.Observation).filter(models.Observation.id.in_(validate)):
+                obs.is_valid = not obs.is_valid
+            db.commit()
+
+            # Edits that move rows across values, cells, buckets and types, some together with validity
+            for obs in db.query(models.Observation).filter(models.Observation.id.in_(edit)):
+                choice = rng.randrange(5)
+                if choice == 0:
+                    obs.value = round(rng.uniform(0, 300), 1)
+                elif choice == 1:
+                    obs.lat, obs.long = obs.lat + 0.3, obs.long - 0.3
+                elif choice == 2:
+                    obs.timestamp = obs.timestamp + timedelta(hours=rng.randint(1, 30))
+                elif choice == 3:
+                    obs.type = "water" if obs.type != "water" else "air"
+                else:
+                    obs.value = obs.value * 2
+                    obs.is_valid = not obs.is_valid
+            db.commit()
+
+            # Deletes, then a new batch on top
+            for obs in db.query(models.Observation).filter(models.Observation.id.in_(delete)):
+                db.delete(obs)
+            db.add_all([_random_observation(rng, start) for _ in range(50)])
+            db.commit()
+
+            incremental = _snapshot(db)
+            rollups.rebuild(db)
+            rebuilt = _snapshot(db)
+        engine.dispose()
+
+    # Buckets emptied by removals stay behind as zero rows; rebuild() does not create them
+    emptied = {k: v for k, v in incremental.items() if v[0] == 0}
+    for count, total, total_sq, _, _ in emptied.values():
+        assert abs(total) < 1e-6 and abs(total_sq) < 1e-3
+    incremental = {k: v for k, v in incremental.items() if k not in emptied}
+
+    assert rebuilt, "fixture produced no valid observations"
+    assert set(incremental) == set(rebuilt)
+    for key, (count, total, total_sq, lo, hi) in rebuilt.items():
+        inc_count, inc_total, inc_sq, inc_lo, inc_hi = incremental[key]
+        assert inc_count == count, key
+        assert abs(inc_total - total) < 1e-6 * max(1.0, abs(total)), key
+        assert abs(inc_sq - total_sq) < 1e-6 * max(1.0, abs(total_sq)), key
+        assert inc_lo <= lo and inc_hi >= hi, key # Never narrower than the exact range
+
+if __name__ == "__main__":
+    test_incremental_rollups_match_rebuild()
+    print("Rollups: incremental == rebuild")
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pytest
+
+import ml_service as m
+from model_registry import ModelRegistry
+
+# Per-(type, region) shards (ml_service.ShardedDetectorRegistry): readings in a cell without a
+# trained shard, or whose shard cannot be loaded, are scored by the global detector; loaded
+# shards are kept in an LRU cache of fixed capacity and reloaded once retrained elsewhere.
+
+DELHI, CHENNAI, DENVER = (28.6, 77.2), (13.1, 80.3), (39.7, -105.0)
+
+class GlobalDetector:
+    name = m.MODEL_NAME
+    version = "global-v1"
+
+    def check_outlier(self, value, lat, long):
+        return False, 0.5
+
+def _cell(rng, center, n):
+    return np.column_stack([rng.uniform(40, 160, n), rng.normal(center[0], 0.3, n), rng.normal(center[1], 0.3, n)])
+
+@pytest.fixture
+def trained(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "registry", ModelRegistry(str(tmp_path)))
+    monkeypatch.setattr(m, "detector", GlobalDetector())
+    monkeypatch.setattr(m, "REGISTRY_POLL_SECONDS", 0.0) # See retrains by other processes at once
+    rng = np.random.default_rng(0)
+    X = np.vstack([_cell(rng, DELHI, 250), _cell(rng, CHENNAI, 250), _cell(rng, DENVER, 250), _cell(rng, DELHI, 50)])
+    types = ["air"] * 750 + ["water"] * 50 # Only 50 water readings: too sparse for a shard
+    versions = m.fit_shards(X, types)
+    loads = []
+    real_load = m.AdvancedOutlierDetector.load
+    def counting_load(self, version=None):
+        loads.append(self.name)
+        return real_load(self, version)
+    monkeypatch.setattr(m.AdvancedOutlierDetector, "load", counting_load)
+    return versions, loads
+
+def test_fit_shards_skips_sparse_cells(trained):
+    versions, _ = trained
+    assert sorted(versions) == sorted(m.shard_model_name(*m.shard_key("air", *c)) for c in (DELHI, CHENNAI, DENVER))
+
+def test_falls_back_to_the_global_model(trained):
+    versions, _ = trained
+    shards = m.ShardedDetectorRegistry(capacity=4)
+    assert shards.check_outlier("Air", 90.0, *DELHI)[2] == m.shard_model_name(*m.shard_key("air", *DELHI))
+    assert shards.check_outlier("water", 1.0, *DELHI) == (False, 0.5, m.MODEL_NAME) # Sparse: no shard
+    assert shards.check_outlier("air", 90.0, -33.9, 151.2)[2] == m.MODEL_NAME # No data in that cell
+
+    # Listed as active but the artifact is gone: still answered, by the global model
+    chennai = m.shard_model_name(*m.shard_key("air", *CHENNAI))
+    os.remove(os.path.join(m.registry.artifact_dir, f"{versions[chennai]}.joblib"))
+    assert shards.check_outlier("air", 90.0, *CHENNAI)[2] == m.MODEL_NAME
+    assert chennai not in shards.stats()["cached"]
+
+def test_lru_eviction(trained):
+    _, loads = trained
+    delhi, chennai, denver = (m.shard_model_name(*m.shard_key("air", *c)) for c in (DELHI, CHENNAI, DENVER))
+    shards = m.ShardedDetectorRegistry(capacity=2)
+    shards.get("air", *DELHI)
+    shards.get("air", *CHENNAI)
+    shards.get("air", *DELHI) # Delhi is now the most recently used
+    shards.get("air", *DENVER) # Evicts Chennai, the coldest
+    assert shards.stats()["cached"] == [delhi, denver]
+    assert loads == [delhi, chennai, denver] # Cache hits do not reload
+    shards.get("air", *CHENNAI)
+    assert shards.stats()["cached"] == [denver, chennai] and loads[-1] == chennai
+
+def test_reloads_shards_retrained_elsewhere(trained):
+    versions, loads = trained
+    delhi = m.shard_model_name(*m.shard_key("air", *DELHI))
+    shards = m.ShardedDetectorRegistry(capacity=4)
+    assert shards.get("air", *DELHI).version == versions[delhi]
+
+    rng = np.random.default_rng(1)
+    retrained = m.fit_shards(_cell(rng, DELHI, 300), ["air"] * 300)
+    assert shards.get("air", *DELHI).version == retrained[delhi] != versions[delhi]
+    assert loads.count(delhi) == 2
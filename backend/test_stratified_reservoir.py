@@ -0,0 +1,51 @@
+import numpy as np
+from ml_service import StratifiedReservoir
+
+# The streamed retraining sample: each (type, region) stratum keeps at most `cap` rows, and
+# every row of a stratum is equally likely to be kept, whatever the chunking of the stream.
+
+def _stream(reservoir, key, n_rows, chunk_sizes):
+    rows = np.column_stack([np.arange(n_rows, dtype=float), np.zeros(n_rows), np.zeros(n_rows)])
+    start, i = 0, 0
+    while start < n_rows:
+        size = chunk_sizes[i % len(chunk_sizes)]
+        reservoir.add_batch(key, rows[start:start + size])
+        start += size
+        i += 1
+
+def test_per_stratum_cap():
+    reservoir = StratifiedReservoir(cap=50, seed=1)
+    _stream(reservoir, ("air", "a"), 1000, [7, 64, 300])
+    _stream(reservoir, ("air", "b"), 30, [7]) # Smaller than the cap: kept whole
+    _stream(reservoir, ("water", "a"), 51, [51])
+
+    X, types, rows_seen = reservoir.sample()
+    assert rows_seen == 1000 + 30 + 51
+    assert len(X) == len(types) == 50 + 30 + 50
+    assert types.count("air") == 80 and types.count("water") == 50
+    small, seen = reservoir.strata[("air", "b")]
+    assert sorted(small[:seen, 0]) == list(range(30))
+    for key, (buffer, seen) in reservoir.strata.items():
+        kept = buffer[:min(seen, reservoir.cap), 0]
+        assert len(np.unique(kept)) == len(kept), key # A row is never kept twice
+
+def test_uniform_inclusion():
+    # Inclusion frequency of every row over many seeded runs should be cap / n
+    n, cap, trials = 200, 20, 2000
+    hits = np.zeros(n)
+    for seed in range(trials):
+        reservoir = StratifiedReservoir(cap=cap, seed=seed)
+        _stream(reservoir, ("air", "a"), n, [13, 5, 90]) # Chunks straddle the fill boundary
+        X, _, _ = reservoir.sample()
+        hits[X[:, 0].astype(int)] += 1
+
+    expected = trials * cap / n
+    std = np.sqrt(trials * (cap / n) * (1 - cap / n))
+    assert np.all(np.abs(hits - expected) < 5 * std), (hits.min(), hits.max(), expected)
+    # No drift along the stream: early and late rows are kept equally often
+    assert abs(hits[:n // 2].mean() - hits[n // 2:].mean()) < 0.05 * expected
+
+if __name__ == "__main__":
+    test_per_stratum_cap()
+    test_uniform_inclusion()
+    print("StratifiedReservoir: cap and uniform sampling OK")
@@ -0,0 +1,118 @@
+import itertools
+import pytest
+
+import ml_service as m
+import validation_service
+
+# The staged validate_observation (ml_service.py) against the decision table of the original
+# sequential version: every combination of trust level, range check, ML verdict, live check
+# and news support, under the default cost order and VALIDATION_STAGE_ORDER overrides. Stage
+# results come from fakes; the calls they record show which stages were short-circuited.
+
+def expected(expert, range_ok, outlier, live, news, baseline):
+    """
+    (is_valid, needs_review) of the sequential version (range -> live -> ML -> trust logic),
+    plus the one intended change: a standard user's ML outlier is rejected on the spot when
+    our own readings give a local baseline. live is "ok", "conflict" or "none" (no reference).
+    """
+    if not range_ok:
+        return False, False
+    if live == "conflict":
+        return (True, True) if expert else (False, False)
+    if expert:
+        return True, outlier or live == "none"
+    if outlier and baseline:
+        return False, False
+    return not outlier, live == "none"
+
+class Stages:
+    def __init__(self, range_ok, outlier, live, news, baseline):
+        self.range_ok, self.outlier, self.live, self.news, self.baseline = range_ok, outlier, live, news, baseline
+        self.calls = []
+
+    def validate_ranges(self, type_cat, details):
+        self.calls.append("range")
+        return self.range_ok, "", {}
+
+    def check_outlier(self, type_cat, value, lat, long):
+        self.calls.append("ml")
+        return self.outlier, 0.2 if self.outlier else 0.9, "outlier_ensemble"
+
+    def check_live_data(self, type_cat, lat, long, details, value=None):
+        self.calls.append("live")
+        ref = None if self.live == "none" else 100.0
+        return self.live != "conflict", "", ref, {}
+
+    def verify_trend_from_news(self, type_cat, lat, long, value):
+        self.calls.append("news")
+        return (True, "Fire nearby", "Fire") if self.news else (False, "", "")
+
+    def neighbors(self, type_cat, lat, long):
+        return [1.0] * (8 if self.baseline else 2)
+
+@pytest.fixture
+def install(monkeypatch):
+    def _install(stages):
+        validator = validation_service.validator
+        monkeypatch.setattr(validator, "validate_ranges", stages.validate_ranges)
+        monkeypatch.setattr(validator, "check_live_data", stages.check_live_data)
+        monkeypatch.setattr(validator.news_validator, "verify_trend_from_news", stages.verify_trend_from_news)
+        monkeypatch.setattr(validator.local_validator, "neighbors", stages.neighbors)
+        monkeypatch.setattr(validator.local_validator, "min_neighbors", 8)
+        monkeypatch.setattr(m.shards, "check_outlier", stages.check_outlier)
+        monkeypatch.setattr(m.shadow, "submit", lambda *args: None)
+        monkeypatch.setattr(m.monitor, "observe", lambda *args: None)
+        monkeypatch.setattr(m, "_maybe_reload_active", lambda: None)
+    return _install
+
+CASES = list(itertools.product([False, True], [True, False], [False, True], ["ok", "conflict", "none"], [False, True], [False, True]))
+ORDERS = [None, "live,range,ml,news", "ml,live,range,news", "range, live ,ml,bogus,news"]
+
+@pytest.mark.parametrize("order", ORDERS)
+@pytest.mark.parametrize("expert,range_ok,outlier,live,news,baseline", CASES)
+def test_decision_table(install, monkeypatch, order, expert, range_ok, outlier, live, news, baseline):
+    if order:
+        monkeypatch.setenv("VALIDATION_STAGE_ORDER", order)
+    else:
+        monkeypatch.delenv("VALIDATION_STAGE_ORDER", raising=False)
+    stages = Stages(range_ok, outlier, live, news, baseline)
+    install(stages)
+
+    is_valid, report, needs_review = m.validate_observation(120.0, 28.6, 77.2, "air", {"aqi": 120}, is_expert=expert)
+    assert (is_valid, needs_review) == expected(expert, range_ok, outlier, live, news, baseline)
+
+    # Stages run in the configured order; news only for an expert's conflict, and always last
+    names = [name.strip() for name in order.split(",")] if order else ["range", "ml", "live", "news"]
+    assert stages.calls == [n for n in names if n in stages.calls]
+    assert list(report["stage_timings_ms"]) == stages.calls
+    conflict = outlier or live == "conflict"
+    ran_all = "rejected_by" not in report
+    assert ("news" in stages.calls) == (expert and range_ok and conflict)
+    if expert and ran_all and conflict:
+        assert report.get("news_justification") == ("Fire nearby" if news else None)
+    if not ran_all: # A rejection on the spot: the rejecting stage is the last one that ran
+        assert (is_valid, needs_review) == (False, False) and report["rejected_by"] == stages.calls[-1]
+
+@pytest.mark.parametrize("baseline,live_calls", [(True, 0), (False, 1)])
+def test_standard_outlier_short_circuit(install, monkeypatch, baseline, live_calls):
+    # With a local baseline an outlier is rejected before the live (network) stage; without
+    # one the live stage still runs, so an unverifiable reading goes to human review
+    monkeypatch.delenv("VALIDATION_STAGE_ORDER", raising=False)
+    stages = Stages(range_ok=True, outlier=True, live="none", news=False, baseline=baseline)
+    install(stages)
+    is_valid, report, needs_review = m.validate_observation(900.0, 28.6, 77.2, "air", {"aqi": 900})
+    assert stages.calls.count("live") == live_calls
+    assert not is_valid
+    if baseline:
+        assert report["rejected_by"] == "ml" and not needs_review
+    else:
+        assert "rejected_by" not in report and needs_review
+        assert report["hitl_reason"].startswith("Unverified Source")
+
+def test_expert_only_stopped_by_range(install, monkeypatch):
+    monkeypatch.delenv("VALIDATION_STAGE_ORDER", raising=False)
+    stages = Stages(range_ok=True, outlier=True, live="conflict", news=True, baseline=True)
+    install(stages)
+    is_valid, report, needs_review = m.validate_observation(900.0, 28.6, 77.2, "air", {"aqi": 900}, is_expert=True)
+    assert (is_valid, needs_review) == (True, True) and stages.calls == ["range", "ml", "live", "news"]
+    assert report["ml_status"] == "Satellite Conflict justified by News: Fire"
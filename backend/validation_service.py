@@ -1,6 +1,24 @@
 import numpy as np
 import requests
 import os
+import math
+import time
+import hashlib
+import threading
+from collections import deque
+from geo_cells import cell_id
+import metrics
+
+# External data sources; overridable so load tests can point them at local stand-ins
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org").rstrip("/")
+OPENAQ_URL = os.getenv("OPENAQ_URL", "https://api.openaq.org/v2/latest")
+INATURALIST_URL = os.getenv("INATURALIST_URL", "https://api.inaturalist.org/v1/observations")
+OPEN_METEO_AQ_URL = os.getenv("OPEN_METEO_AQ_URL", "https://air-quality-api.open-meteo.com/v1/air-quality")
+
+def _http_get(service, url, **kwargs):
+    # Outbound call to a validation data source, timed per service for /metrics
+    with metrics.timed(metrics.EXTERNAL_HTTP, service):
+        return requests.get(url, **kwargs)
 
 class GeoSpatialValidator:
     def __init__(self):
@@ -21,8 +39,8 @@ class GeoSpatialValidator:
         try:
             # Simple check for nominatim
             headers = {'User-Agent': 'Mechovate-Validation-Service/1.0'}
-            url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={long}&zoom=10"
-            response = requests.get(url, headers=headers, timeout=3)
+            url = f"{NOMINATIM_URL}/reverse?format=json&lat={lat}&lon={long}&zoom=10"
+            response = _http_get("nominatim", url, headers=headers, timeout=3)
             if response.status_code == 200:
                 data = response.json()
                 if "error" in data:
@@ -60,6 +78,23 @@ class NewsValidator:
         from ai_agent_service import client as groq_client
         self.groq_client = groq_client
 
+        # Verdict memoization: a burst of expert reports about the same event (same category,
+        # spatial cell, value band and news context) is answered by a single LLM call.
+        self.verdict_ttl = float(os.getenv("NEWS_VERDICT_TTL_SECONDS", 3600))
+        self.max_cached_verdicts = 5000
+        self._verdicts = {} # key -> (expires_at, verdict)
+        self._inflight = {} # key -> threading.Event for the call currently computing that key
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _value_band(value):
+        # Logarithmic bands ~25% wide: 100 and 110 share a verdict, 100 and 200 do not.
+        return int(math.floor(math.log1p(max(float(value), 0.0)) / math.log(1.25)))
+
+    def _verdict_key(self, type_cat, lat, long, value, news_context):
+        fingerprint = hashlib.sha1(news_context.encode("utf-8")).hexdigest()[:16]
+        return (type_cat.lower(), cell_id(lat, long), self._value_band(value), fingerprint)
+
     def verify_trend_from_news(self, type_cat, lat, long, value):
         """
         Check for sudden environmental changes in news (e.g., fires, leaks, heatwaves).
@@ -76,6 +111,42 @@ class NewsValidator:
         if not self.groq_client:
             return False, "Groq client not available for news analysis.", ""
 
+        # 2. Cached verdict, or wait for an identical request that is already asking the LLM
+        key = self._verdict_key(type_cat, lat, long, value, news_context)
+        while True:
+            with self._lock:
+                cached = self._verdicts.get(key)
+                if cached and cached[0] > time.time():
+                    return cached[1]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = threading.Event()
+                    self._inflight[key] = pending
+                    break
+            # Follower: the leader stores its verdict before signalling; loop to read it
+            # (or take over as leader if the leader failed and cached nothing).
+            pending.wait(timeout=30)
+
+        try:
+            verdict, cacheable = self._ask_llm(type_cat, lat, long, value, news_context)
+            if cacheable:
+                with self._lock:
+                    if len(self._verdicts) >= self.max_cached_verdicts:
+                        now = time.time()
+                        self._verdicts = {k: v for k, v in self._verdicts.items() if v[0] > now}
+                        if len(self._verdicts) >= self.max_cached_verdicts:
+                            self._verdicts.clear()
+                    self._verdicts[key] = (time.time() + self.verdict_ttl, verdict)
+            return verdict
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def _ask_llm(self, type_cat, lat, long, value, news_context):
+        """
+        Returns (verdict, cacheable). Service errors are not cached so the next report retries.
+        """
         prompt = f"""
         An environmental expert reported a sudden outlier:
         - Category: {type_cat}
@@ -96,17 +167,18 @@ class NewsValidator:
         
         try:
             from ai_agent_service import MODEL_NAME
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=MODEL_NAME,
-            )
+            with metrics.timed(metrics.LLM_REQUESTS, "news_verdict"):
+                chat_completion = self.groq_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=MODEL_NAME,
+                )
             import json
             res_text = chat_completion.choices[0].message.content.replace("```json", "").replace("```", "").strip()
             data = json.loads(res_text)
-            return data.get("justified", False), data.get("reason", ""), data.get("event_type", "Incident / Trend")
+            return (data.get("justified", False), data.get("reason", ""), data.get("event_type", "Incident / Trend")), True
         except Exception as e:
             print(f"News validation error: {e}")
-            return False, "News verification service error", ""
+            return (False, "News verification service error", ""), False
 
 class WildTraxValidator:
     """
@@ -177,16 +249,123 @@ class WildTraxValidator:
             "consensus_score": confidence
         }
 
+class LocalNeighborhoodValidator:
+    """
+    Scores a reading against our own recent validated observations of the same type nearby.
+    Keeps an in-memory grid of validated readings from the last `window_hours` (rebuilt from
+    the DB at startup, fed by ingest), so a lookup touches a handful of cells instead of an
+    external API. The reference is the median of the neighbours within `radius_km` and the
+    spread their MAD, which a few bad neighbours cannot drag around.
+    """
+    def __init__(self):
+        self.radius_km = float(os.getenv("LOCAL_VALIDATION_RADIUS_KM", 10))
+        self.window_hours = float(os.getenv("LOCAL_VALIDATION_WINDOW_HOURS", 6))
+        self.min_neighbors = int(os.getenv("LOCAL_VALIDATION_MIN_NEIGHBORS", 8))
+        self.max_z = float(os.getenv("LOCAL_VALIDATION_MAX_Z", 6.0)) # Robust z-score above which we reject
+        self.min_spread = 0.05 # Relative to the median, so uniform neighbourhoods don't reject every small change
+        self.max_per_cell = 500
+        self.cell_size = self.radius_km / 111.0 # Degrees; a lat row is one radius tall
+        self._cells = {} # (type, row, col) -> deque of (ts, value, lat, long)
+        self._lock = threading.Lock()
+
+    def _cell(self, lat, long):
+        return int(math.floor((lat + 90.0) / self.cell_size)), int(math.floor((long + 180.0) / self.cell_size))
+
+    def add(self, type_cat, value, lat, long, timestamp=None):
+        if value is None or lat is None or long is None:
+            return
+        ts = timestamp.timestamp() if timestamp else time.time()
+        key = ((type_cat or "").lower(),) + self._cell(lat, long)
+        with self._lock:
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = deque(maxlen=self.max_per_cell)
+            cell.append((ts, float(value), float(lat), float(long)))
+
+    def rebuild(self, db) -> int:
+        """
+        Reloads the grid from the valid observations of the last `window_hours`.
+        """
+        from datetime import datetime, timedelta
+        from sqlalchemy import select
+        import models
+
+        since = datetime.now() - timedelta(hours=self.window_hours)
+        rows = db.execute(
+            select(models.Observation.type, models.Observation.value, models.Observation.lat,
+                   models.Observation.long, models.Observation.timestamp)
+            .where(models.Observation.is_valid == True, models.Observation.timestamp >= since)
+            .order_by(models.Observation.timestamp)
+        ).all()
+        with self._lock:
+            self._cells.clear()
+        for row in rows:
+            self.add(*row)
+        return len(rows)
+
+    def neighbors(self, type_cat, lat, long):
+        """
+        Values of the validated readings within radius_km and window_hours of (lat, long).
+        """
+        type_key = (type_cat or "").lower()
+        row, col = self._cell(lat, long)
+        # Cells get narrower in km away from the equator: widen the column span to still cover the radius
+        col_span = int(math.ceil(1.0 / max(math.cos(math.radians(lat)), 0.01)))
+        cutoff = time.time() - self.window_hours * 3600
+        candidates = []
+        with self._lock:
+            for dr in (-1, 0, 1):
+                for dc in range(-col_span, col_span + 1):
+                    cell = self._cells.get((type_key, row + dr, col + dc))
+                    if not cell:
+                        continue
+                    while cell and cell[0][0] < cutoff:
+                        cell.popleft()
+                    candidates.extend(cell)
+        if not candidates:
+            return np.empty(0)
+
+        data = np.array(candidates)
+        lat1, lat2 = math.radians(lat), np.radians(data[:, 2])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(np.radians(data[:, 3] - long) / 2) ** 2
+        dist_km = 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return data[(dist_km <= self.radius_km) & (data[:, 0] >= cutoff), 1] # Late adds can sit behind the pruned front
+
+    def check(self, type_cat, lat, long, value):
+        """
+        Returns (covered, is_valid, message, ref_value, meta). covered is False when there are
+        fewer than min_neighbors recent readings nearby; the caller then falls back to external sources.
+        """
+        values = self.neighbors(type_cat, lat, long)
+        if len(values) < self.min_neighbors or value is None:
+            return False, True, "Insufficient local coverage", None, {"local_neighbors": int(len(values))}
+
+        median = float(np.median(values))
+        mad = float(np.median(np.abs(values - median)))
+        spread = max(1.4826 * mad, self.min_spread * abs(median), 1e-6) # 1.4826 * MAD ~ std for normal data
+        z = abs(float(value) - median) / spread
+        meta = {
+            "source": "Local Observations",
+            "local_neighbors": int(len(values)),
+            "local_median": round(median, 2),
+            "local_mad": round(mad, 2),
+            "local_z": round(z, 2)
+        }
+        if z > self.max_z:
+            return True, False, f"Local Consistency Conflict: {value} deviates from the median of {len(values)} nearby readings ({median:.1f}, robust z={z:.1f}).", median, meta
+        return True, True, f"Consistent with {len(values)} nearby validated readings (median {median:.1f})", median, meta
+
 class WorldGeoValidator:
     def __init__(self):
         # External APIs for Global Validation
-        self.api_url_openaq = "https://api.openaq.org/v2/latest"
-        self.api_url_inaturalist = "https://api.inaturalist.org/v1/observations"
-        self.api_url_open_meteo = "https://air-quality-api.open-meteo.com/v1/air-quality"
+        self.api_url_openaq = OPENAQ_URL
+        self.api_url_inaturalist = INATURALIST_URL
+        self.api_url_open_meteo = OPEN_METEO_AQ_URL
         
         self.geo_validator = GeoSpatialValidator()
         self.news_validator = NewsValidator()
         self.wildtrax_validator = WildTraxValidator()
+        self.local_validator = LocalNeighborhoodValidator()
         
         # Valid ranges based on World Health Organization (WHO) & EPA standards
         self.standards = {
@@ -262,11 +441,26 @@ class WorldGeoValidator:
         
         return True, "Ranges valid", report
 
-    def check_live_data(self, type_cat, lat, long, details):
+    def check_live_data(self, type_cat, lat, long, details, value=None):
         """
         Cross-reference with live external data if available.
         Returns (bool, str, ref_value, meta_dict)
         """
+        # 0. Dense, recent local coverage: our own validated readings are the reference,
+        # and the location is evidently valid, so no external call is needed
+        if value is None:
+            value = (details or {}).get("value")
+        covered, local_valid, local_msg, local_ref, local_meta = self.local_validator.check(type_cat, lat, long, value)
+        if covered:
+            consist_valid, consist_msg = self.geo_validator.validate_spatial_consistency(type_cat, lat, long, float(value))
+            if not consist_valid:
+                return False, consist_msg, None, {}
+            sensor_valid, sensor_msg = self.wildtrax_validator.validate_sensor_metadata(lat, long, details)
+            if not sensor_valid:
+                return False, sensor_msg, None, {}
+            local_meta["wildtrax_sensor"] = "Passed"
+            return local_valid, local_msg, local_ref, local_meta
+
         # 1. Geo-Spatial check (Verification of Land/Location)
         geo_valid, geo_msg = self.geo_validator.is_on_land(lat, long)
         if not geo_valid:
@@ -298,7 +492,7 @@ class WorldGeoValidator:
                     "limit": 5,
                     "unit": "ug/m3" # Standardizing
                 }
-                response = requests.get(self.api_url_openaq, params=params, timeout=5)
+                response = _http_get("openaq", self.api_url_openaq, params=params, timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     results = data.get("results", [])
@@ -331,7 +525,7 @@ class WorldGeoValidator:
             if ref_val is None:
                 try:
                     params = {"latitude": lat, "longitude": long, "current": ["pm10", "pm2_5", "us_aqi"]}
-                    response = requests.get(self.api_url_open_meteo, params=params, timeout=5)
+                    response = _http_get("open_meteo", self.api_url_open_meteo, params=params, timeout=5)
                     if response.status_code == 200:
                         data = response.json()
                         current = data.get("current", {})
@@ -345,7 +539,7 @@ class WorldGeoValidator:
             # Source: iNaturalist
             try:
                 params = {"lat": lat, "lng": long, "radius": 10, "per_page": 5, "order": "desc", "order_by": "created_at"}
-                response = requests.get(self.api_url_inaturalist, params=params, timeout=5)
+                response = _http_get("inaturalist", self.api_url_inaturalist, params=params, timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     total_results = data.get("total_results", 0)
@@ -10,6 +10,17 @@ const MapView = dynamic(() => import("./map-view"), { ssr: false });
 
 import { Wind, Droplets, Mountain, ArrowRight, CheckCircle2, FlaskConical, ShieldCheck, UserCheck, Thermometer, CloudRain, Gauge, Activity, Map as MapIcon, Leaf, Bug } from "lucide-react";
 
+// One id per browser, sent as details.client_id so the backend can recognise a double-submitted
+// reading from this browser (readings without it are never deduplicated)
+function getClientId(): string {
+    let id = localStorage.getItem("clientId");
+    if (!id) {
+        id = crypto.randomUUID();
+        localStorage.setItem("clientId", id);
+    }
+    return id;
+}
+
 export default function ObservationForm({ onObservationAdded, selectedLocation, onNavigateToMap }: {
     onObservationAdded: (obs: any) => void,
     selectedLocation?: { lat: number, lng: number } | null,
@@ -119,7 +130,7 @@ export default function ObservationForm({ onObservationAdded, selectedLocation,
             lat: parsedLat,
             long: parsedLong,
             location_name: locationName,
-            details: params,
+            details: { ...params, client_id: getClientId() },
             is_expert: isExpert
         };
 